@@ -0,0 +1,54 @@
+import threading
+
+from flask import g, jsonify, request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+EXEMPT_ENDPOINTS = ('prometheus_metrics', 'static', 'index')
+
+
+class AdmissionControl:
+    """Limita as requisições simultâneas do processo à capacidade do pool de conexões.
+
+    Com workers de várias threads (gunicorn gthread), mais requisições que
+    conexões só formam fila dentro do pool até DB_POOL_TIMEOUT. Aqui a
+    requisição espera no máximo ADMISSION_TIMEOUT_MS por uma vaga e, sem vaga,
+    recebe 503 com Retry-After. A vaga fica presa até o fim da resposta,
+    inclusive em respostas em streaming (exportação, SSE), que seguram a conexão.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('ADMISSION_MAX_CONCURRENT', 0)
+        app.config.setdefault('ADMISSION_TIMEOUT_MS', 100)
+        # as threads de tarefas (jobs.py) também ocupam conexões do pool
+        limit = app.config['ADMISSION_MAX_CONCURRENT'] or max(
+            app.config.get('DB_POOL_SIZE', 5) + app.config.get('DB_MAX_OVERFLOW', 10)
+            - app.config.get('JOBS_WORKERS', 0), 1
+        )
+        timeout = app.config['ADMISSION_TIMEOUT_MS'] / 1000
+        slots = app.extensions['admission'] = threading.BoundedSemaphore(limit)
+
+        @app.before_request
+        def _admit():
+            if request.endpoint in EXEMPT_ENDPOINTS:
+                return None
+            if not slots.acquire(timeout=timeout):
+                return _overloaded()
+            g._admission_slot = True
+            return None
+
+        @app.teardown_request
+        def _release(exc):
+            if g.pop('_admission_slot', False):
+                slots.release()
+
+        @app.errorhandler(PoolTimeoutError)
+        def _pool_timeout(e):
+            # pool esgotado mesmo assim (ex.: conexões presas fora de requisições)
+            return _overloaded()
+
+
+def _overloaded():
+    return jsonify({"msg": "Servidor sobrecarregado, tente novamente"}), 503, {"Retry-After": "1"}
+
+
+admission = AdmissionControl()
@@ -1,25 +1,76 @@
-from flask import Flask, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from sqlalchemy import desc, asc, or_
+import threading
+from datetime import datetime, timezone
+
+import click
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import (create_access_token, create_refresh_token, decode_token, get_jwt,
+                                get_jwt_identity, jwt_required)
 from flask_cors import CORS
 from marshmallow import ValidationError # <--- NOVO: Importar para tratamento de erros
+from sqlalchemy.exc import IntegrityError
 from config import Config
-from extensions import db, migrate, jwt
-from models import User, Categoria, Dispositivo
+from extensions import db, init_migrate, jwt
+from database import configure_engine, engine_options
+from replicas import read_replica, replica_router
+from models import User, Categoria, Dispositivo, Tarefa
+from passwords import PasswordHasherBusy, password_hasher
+from tokens import revoke_token
 # ASSUMIDA A CRIAÇÃO DO arquivo schemas.py
-from schemas import AuthSchema, CategoriaSchema, DispositivoSchema # <--- NOVO: Importar Schemas
-
-
-def create_app():
+from schemas import (auth_schema, batch_selection_schema, categoria_output, categoria_schema, # <--- NOVO: Importar Schemas
+                     dispositivo_output, dispositivo_schema, tarefa_schema)
+import cache
+from cache import response_cache
+from conditional import (categoria_fingerprint, categorias_fingerprint, conditional_response,
+                         dispositivo_fingerprint, dispositivos_fingerprint)
+from batch import BatchSelection, batch_delete, batch_update
+from bulk_import import BulkImport, InvalidEncoding, detect_format
+from export import export_query, generate_export
+from stats import dispositivo_stats, stats_cli
+from changes import (InvalidChangeCursor, changes_cli, latest_change_id, parse_cursor, read_changes,
+                     stream_changes)
+from idempotency import idempotency, idempotent
+from metrics import metrics
+from ratelimit import rate_limiter
+from admission import admission
+from serialization import init_json
+from compress import compression
+from jobs import job_runner, job_to_dict, submit as submit_job
+from projection import (CATEGORIA_FIELDS, DISPOSITIVO_FIELDS, InvalidFields, parse_fields,
+                        project_categorias, project_dispositivos, rows_to_dicts)
+from pagination import (InvalidCursor, apply_dispositivo_filters, apply_sort,
+                        keyset_page, offset_page_args, resolve_sort)
+
+
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
     # Habilita CORS
     CORS(app)
 
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config)
+    replica_router.init_app(app)
+    # Migrações só quando o app é carregado por um comando "flask" (há um contexto
+    # do click); gunicorn e testes não pagam o import do Alembic
+    if click.get_current_context(silent=True) is not None:
+        init_migrate(app)
     jwt.init_app(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    idempotency.init_app(app)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(changes_cli)
+    init_json(app)
+    compression.init_app(app)
+    metrics.init_app(app)
+    job_runner.init_app(app)
+    # rate limit antes da admissão: 429 não ocupa vaga de conexão
+    rate_limiter.init_app(app)
+    admission.init_app(app)
 
     @app.route("/")
     def index():
@@ -30,6 +81,15 @@ def create_app():
         # O Marshmallow retorna um dicionário de erros
         return jsonify({"msg": "Erro de validação", "errors": e.messages}), 400
 
+    def exists(*criteria):
+        # SELECT EXISTS(...): para no primeiro registro, sem COUNT nem hidratar objeto
+        return db.session.query(db.exists().where(*criteria)).scalar()
+
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e):
+        # Pool de hashing saturado (rajada de logins): melhor recusar logo do que enfileirar
+        return jsonify({"msg": "Servidor ocupado, tente novamente"}), 503, {"Retry-After": "1"}
+
     # ---------- ROTAS DE AUTENTICAÇÃO ----------
     @app.route("/auth/register", methods=["POST"])
     def register():
@@ -37,7 +97,7 @@ def create_app():
         
         try:
             # NOVO: Validação de entrada usando Marshmallow
-            validated_data = AuthSchema().load(data)
+            validated_data = auth_schema.load(data)
         except ValidationError as err:
             return handle_validation_error(err)
 
@@ -60,7 +120,7 @@ def create_app():
         
         try:
             # NOVO: Validação de entrada usando Marshmallow
-            validated_data = AuthSchema().load(data)
+            validated_data = auth_schema.load(data)
         except ValidationError as err:
             return handle_validation_error(err)
 
@@ -70,46 +130,108 @@ def create_app():
         user = User.query.filter_by(username=username).first()
 
         if user and user.check_password(password):
+            # Método ou custo do hash mudou no Config: regrava com a senha em mãos
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             access_token = create_access_token(identity=str(user.id))
-            return jsonify(access_token=access_token), 200
+            refresh_token = create_refresh_token(identity=str(user.id))
+            return jsonify(access_token=access_token, refresh_token=refresh_token), 200
 
         return jsonify({"msg": "Credenciais inválidas"}), 401
 
+    @app.route("/auth/refresh", methods=["POST"])
+    @jwt_required(refresh=True)
+    def refresh():
+        access_token = create_access_token(identity=get_jwt_identity())
+        return jsonify(access_token=access_token), 200
+
+    @app.route("/auth/logout", methods=["POST"])
+    @jwt_required(verify_type=False)
+    def logout():
+        # Revoga o token enviado (access ou refresh) até ele expirar e, se vier
+        # no corpo, o refresh token da mesma sessão
+        claims = get_jwt()
+        revoke_token(claims)
+
+        refresh_token = (request.get_json(silent=True) or {}).get("refresh_token")
+        if refresh_token:
+            refresh_claims = decode_token(refresh_token)
+            if refresh_claims["sub"] != claims["sub"] or refresh_claims["type"] != "refresh":
+                return jsonify({"msg": "refresh_token inválido"}), 422
+            revoke_token(refresh_claims)
+
+        return jsonify({"msg": "Logout realizado com sucesso"}), 200
+
+    # ---------- MÉTRICAS ----------
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        # Formato texto do Prometheus; sem JWT para o scraper poder coletar
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    # ---------- CACHE ----------
+    @app.route("/cache/stats", methods=["GET"])
+    @jwt_required()
+    def cache_stats():
+        return jsonify({**response_cache.stats(), "compression": compression.stats()}), 200
+
     # ---------- CRUD DE CATEGORIAS ----------
     @app.route("/categorias", methods=["POST"])
     @jwt_required()
+    @idempotent
     def create_categoria():
         data = request.get_json() or {}
         
         try:
             # NOVO: Validação de entrada usando Marshmallow
-            validated_data = CategoriaSchema().load(data)
+            validated_data = categoria_schema.load(data)
         except ValidationError as err:
             return handle_validation_error(err)
 
         nome = validated_data.get("nome")
         descricao = validated_data.get("descricao", "")
 
-        if Categoria.query.filter_by(nome=nome).first():
-            return jsonify({"msg": "Categoria com este nome já existe"}), 409
-
+        # A unicidade fica com a constraint de "nome": sem SELECT prévio e sem corrida
         new_categoria = Categoria(nome=nome, descricao=descricao)
         db.session.add(new_categoria)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"msg": "Categoria com este nome já existe"}), 409
 
-        return jsonify(new_categoria.to_dict()), 201
+        return jsonify(categoria_output.dump(new_categoria)), 201
 
     @app.route("/categorias", methods=["GET"])
     @jwt_required()
+    @read_replica
     def list_categorias():
-        categorias = Categoria.query.all()
-        return jsonify([cat.to_dict() for cat in categorias]), 200
+        try:
+            fields = parse_fields(request.args.get('fields', type=str), CATEGORIA_FIELDS)
+        except InvalidFields as err:
+            return jsonify({"msg": str(err)}), 400
+
+        def build_list():
+            if fields:
+                return rows_to_dicts(project_categorias(Categoria.query, fields).all(), fields)
+            return categoria_output.dump_many(Categoria.query.all())
+
+        # O ETag entra na chave do cache: um corpo só é servido com o ETag de quando foi
+        # gerado, mesmo que o cache deste processo não tenha visto a escrita de outro worker
+        fingerprint = categorias_fingerprint(fields)
+        return conditional_response(fingerprint, lambda: response_cache.cached_json(
+            cache.CATEGORIAS, ('all', fields, fingerprint.etag), build_list,
+        ))
 
     @app.route("/categorias/<int:id>", methods=["GET"])
     @jwt_required()
+    @read_replica
     def get_categoria(id):
-        categoria = Categoria.query.get_or_404(id)
-        return jsonify(categoria.to_dict()), 200
+        fingerprint = categoria_fingerprint(id)
+        return conditional_response(fingerprint, lambda: response_cache.cached_json(
+            cache.CATEGORIA, (id, fingerprint.etag),
+            lambda: categoria_output.dump(Categoria.query.get_or_404(id)),
+        ))
 
     @app.route("/categorias/<int:id>", methods=["PUT", "PATCH"])
     @jwt_required()
@@ -119,7 +241,7 @@ def create_app():
         
         try:
             # NOVO: Validação de entrada. Usamos partial=True para permitir que campos obrigatórios (nome) sejam omitidos no PATCH.
-            validated_data = CategoriaSchema().load(data, partial=True)
+            validated_data = categoria_schema.load(data, partial=True)
         except ValidationError as err:
             return handle_validation_error(err)
 
@@ -127,7 +249,7 @@ def create_app():
         descricao = validated_data.get("descricao")
 
         if nome:
-            if nome != categoria.nome and Categoria.query.filter_by(nome=nome).first():
+            if nome != categoria.nome and exists(Categoria.nome == nome):
                 return jsonify({"msg": "Categoria com este nome já existe"}), 409
             categoria.nome = nome
 
@@ -136,15 +258,32 @@ def create_app():
             categoria.descricao = descricao
 
         db.session.commit()
-        return jsonify(categoria.to_dict()), 200
+        return jsonify(categoria_output.dump(categoria)), 200
 
     @app.route("/categorias/<int:id>", methods=["DELETE"])
     @jwt_required()
     def delete_categoria(id):
         categoria = Categoria.query.get_or_404(id)
 
-        if categoria.dispositivos.count() > 0:
-            return jsonify({"msg": "Não é possível excluir a categoria, pois existem dispositivos vinculados."}), 400
+        # ?dispositivos=reatribuir&destino=<id>, desvincular (categoria_id NULL) ou excluir:
+        # os dispositivos vinculados são tratados na mesma transação da exclusão
+        modo = request.args.get('dispositivos', type=str)
+        vinculados = BatchSelection(categoria_id=id)
+
+        if modo is None:
+            if exists(Dispositivo.categoria_id == id):
+                return jsonify({"msg": "Não é possível excluir a categoria, pois existem dispositivos vinculados."}), 400
+        elif modo == 'reatribuir':
+            destino = request.args.get('destino', type=int)
+            if destino is None or destino == id or not exists(Categoria.id == destino):
+                return jsonify({"msg": "Informe em \"destino\" outra categoria existente."}), 400
+            batch_update(vinculados, {"categoria_id": destino})
+        elif modo == 'desvincular':
+            batch_update(vinculados, {"categoria_id": None})
+        elif modo == 'excluir':
+            batch_delete(vinculados)
+        else:
+            return jsonify({"msg": "dispositivos deve ser 'reatribuir', 'desvincular' ou 'excluir'."}), 400
 
         db.session.delete(categoria)
         db.session.commit()
@@ -153,12 +292,13 @@ def create_app():
     # ---------- CRUD DE DISPOSITIVOS ----------
     @app.route("/dispositivos", methods=["POST"])
     @jwt_required()
+    @idempotent
     def create_dispositivo():
         data = request.get_json() or {}
         
         try:
             # NOVO: Validação de entrada usando Marshmallow. 'nome' e 'serial' são obrigatórios.
-            validated_data = DispositivoSchema().load(data)
+            validated_data = dispositivo_schema.load(data)
         except ValidationError as err:
             return handle_validation_error(err)
 
@@ -167,10 +307,7 @@ def create_app():
         categoria_id = validated_data.get("categoria_id")
         status = validated_data.get("status", "ativo")
 
-        if Dispositivo.query.filter_by(serial=serial).first():
-            return jsonify({"msg": "Dispositivo com este serial já existe."}), 409
-
-        if categoria_id is not None and not Categoria.query.get(categoria_id):
+        if categoria_id is not None and not exists(Categoria.id == categoria_id):
             return jsonify({"msg": "Categoria_id inválida."}), 400
 
         dispositivo = Dispositivo(
@@ -180,58 +317,248 @@ def create_app():
             status=status
         )
         db.session.add(dispositivo)
+        # Serial duplicado é barrado pela constraint unique no INSERT, sem SELECT prévio
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"msg": "Dispositivo com este serial já existe."}), 409
+        return jsonify(dispositivo_output.dump(dispositivo)), 201
+
+    @app.route("/dispositivos/bulk", methods=["POST"])
+    @jwt_required()
+    def bulk_create_dispositivos():
+        fmt = detect_format(request.mimetype)
+        if fmt is None:
+            return jsonify({"msg": "Envie o corpo como NDJSON (application/x-ndjson) ou CSV (text/csv)."}), 415
+
+        importer = BulkImport(
+            chunk_size=app.config["BULK_IMPORT_CHUNK_SIZE"],
+            max_errors=app.config["BULK_IMPORT_MAX_ERRORS"],
+        )
+        try:
+            report = importer.run(request.stream, fmt)
+        except InvalidEncoding as err:
+            # Lotes anteriores à linha já foram gravados: o relatório diz quantos
+            return jsonify({"msg": str(err), "line": err.line_no, **importer.report()}), 400
+        return jsonify(report), 200
+
+    def batch_selection(data):
+        """Seleção de PATCH/DELETE em lote: "ids" do corpo e/ou filtros da query string."""
+        ids = batch_selection_schema.load(data).get("ids")
+        if ids and len(ids) > app.config["BATCH_MAX_IDS"]:
+            raise ValidationError({"ids": [f"Máximo de {app.config['BATCH_MAX_IDS']} ids; use filtros."]})
+        return BatchSelection(
+            ids=ids,
+            status=request.args.get('status', type=str),
+            categoria_id=request.args.get('categoria_id', type=int),
+            busca=request.args.get('busca', type=str),
+        )
+
+    @app.route("/dispositivos/batch", methods=["PATCH"])
+    @jwt_required()
+    def batch_update_dispositivos():
+        data = request.get_json() or {}
+
+        try:
+            # Validação feita uma vez para o lote inteiro
+            selection = batch_selection(data)
+            validated_data = dispositivo_schema.load(data, partial=True)
+        except ValidationError as err:
+            return handle_validation_error(err)
+
+        if selection.empty:
+            return jsonify({"msg": "Informe \"ids\" ou ao menos um filtro (status, categoria_id, busca)."}), 400
+        if "serial" in validated_data:
+            return jsonify({"msg": "Serial é único e não pode ser alterado em lote."}), 400
+        if not validated_data:
+            return jsonify({"msg": "Nenhum campo para atualizar."}), 400
+
+        categoria_id = validated_data.get("categoria_id")
+        if categoria_id is not None and not exists(Categoria.id == categoria_id):
+            return jsonify({"msg": "Categoria_id inválida."}), 400
+
+        updated = batch_update(selection, validated_data)
         db.session.commit()
-        return jsonify(dispositivo.to_dict()), 201
+        return jsonify({"updated": updated}), 200
 
-    @app.route("/dispositivos", methods=["GET"])
+    @app.route("/dispositivos/batch", methods=["DELETE"])
     @jwt_required()
-    def list_dispositivos():
-        page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', 10, type=int)
-        sort = request.args.get('sort', 'id', type=str)
-        order = request.args.get('order', 'asc', type=str)
-        filter_status = request.args.get('status', type=str)
-        filter_categoria = request.args.get('categoria_id', type=int)
-        search_term = request.args.get('busca', type=str)
+    def batch_delete_dispositivos():
+        try:
+            selection = batch_selection(request.get_json(silent=True) or {})
+        except ValidationError as err:
+            return handle_validation_error(err)
 
-        query = Dispositivo.query
+        if selection.empty:
+            return jsonify({"msg": "Informe \"ids\" ou ao menos um filtro (status, categoria_id, busca)."}), 400
 
-        if filter_status in ['ativo', 'inativo']:
-            query = query.filter(Dispositivo.status == filter_status)
+        deleted = batch_delete(selection)
+        db.session.commit()
+        return jsonify({"deleted": deleted}), 200
 
-        if filter_categoria:
-            query = query.filter(Dispositivo.categoria_id == filter_categoria)
+    @app.route("/dispositivos/export", methods=["GET"])
+    @jwt_required()
+    @read_replica
+    def export_dispositivos():
+        fmt = request.args.get('format', 'ndjson', type=str).lower()
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({"msg": "Formato deve ser 'ndjson' ou 'csv'."}), 400
+        gzip = request.args.get('gzip', 'false', type=str).lower() in ('true', '1', 'sim')
+
+        stmt = export_query(
+            request.args.get('status', type=str),
+            request.args.get('categoria_id', type=int),
+            request.args.get('busca', type=str),
+        )
+        body = generate_export(stmt, fmt, gzip=gzip, batch_size=app.config["EXPORT_BATCH_SIZE"])
 
-        if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(or_(
-                Dispositivo.nome.ilike(search_pattern),
-                Dispositivo.serial.ilike(search_pattern)
-            ))
+        filename = f"dispositivos.{fmt}" + (".gz" if gzip else "")
+        mimetype = "application/gzip" if gzip else ("application/x-ndjson" if fmt == 'ndjson' else "text/csv")
+        return Response(stream_with_context(body), mimetype=mimetype,
+                        headers={"Content-Disposition": f"attachment; filename={filename}"})
 
-        sort_column = getattr(Dispositivo, sort, Dispositivo.id)
-        if order.lower() == 'desc':
-            query = query.order_by(desc(sort_column))
-        else:
-            query = query.order_by(asc(sort_column))
+    @app.route("/dispositivos/stats", methods=["GET"])
+    @jwt_required()
+    def stats_dispositivos():
+        # Lido das tabelas de estatística mantidas por eventos, não de dispositivo. A versão
+        # do log de alterações na chave impede que um worker sirva o resumo de antes
+        # de uma escrita feita em outro worker
+        return response_cache.cached_json(cache.DISPOSITIVOS, ('stats', latest_change_id()), dispositivo_stats)
 
-        paginated_result = query.paginate(page=page, per_page=limit, error_out=False)
+    @app.route("/dispositivos/changes", methods=["GET"])
+    @jwt_required()
+    def dispositivos_changes():
+        # Sincronização incremental: o cliente guarda next_cursor e pede só o que mudou depois dele
+        limit = min(max(request.args.get('limit', 100, type=int), 1), app.config["CHANGES_MAX_LIMIT"])
+        try:
+            since = parse_cursor(request.args.get('since', type=str))
+        except InvalidChangeCursor as err:
+            return jsonify({"msg": str(err)}), 400
 
-        return jsonify({
-            "items": [dev.to_dict() for dev in paginated_result.items],
-            "pagination": {
-                "total_records": paginated_result.total,
-                "total_pages": paginated_result.pages,
+        updated_since = request.args.get('updated_since', type=str)
+        if updated_since:
+            try:
+                updated_since = datetime.fromisoformat(updated_since)
+            except ValueError:
+                return jsonify({"msg": "updated_since deve estar no formato ISO 8601."}), 400
+            if updated_since.tzinfo is not None:
+                updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+
+        return jsonify(read_changes(since, limit, updated_since or None)), 200
+
+    stream_slots = threading.BoundedSemaphore(app.config["CHANGES_STREAM_MAX_CONCURRENT"])
+
+    @app.route("/dispositivos/changes/stream", methods=["GET"])
+    @jwt_required()
+    def dispositivos_changes_stream():
+        # Reconexão do EventSource manda o último id recebido em Last-Event-ID
+        try:
+            since = parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since', type=str))
+        except InvalidChangeCursor as err:
+            return jsonify({"msg": str(err)}), 400
+
+        # Cada stream prende uma thread do worker até CHANGES_STREAM_MAX_SECONDS
+        if not stream_slots.acquire(blocking=False):
+            return jsonify({"msg": "Limite de streams atingido; use GET /dispositivos/changes."}), \
+                503, {"Retry-After": str(app.config["CHANGES_STREAM_MAX_SECONDS"])}
+        events = stream_changes(since, app.config["CHANGES_MAX_LIMIT"], app.config["CHANGES_POLL_INTERVAL"],
+                                app.config["CHANGES_STREAM_MAX_SECONDS"])
+        response = Response(stream_with_context(events), mimetype="text/event-stream")
+        response.call_on_close(stream_slots.release)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"  # nginx não deve segurar os eventos
+        return response
+
+    @app.route("/dispositivos", methods=["GET"])
+    @jwt_required()
+    @read_replica
+    def list_dispositivos():
+        page = request.args.get('page', 1, type=int)
+        limit = request.args.get('limit', 10, type=int)
+        sort_param = request.args.get('sort', type=str)
+        sort, order = resolve_sort(sort_param or 'id', request.args.get('order', 'asc', type=str))
+        filter_status = request.args.get('status', type=str)
+        filter_categoria = request.args.get('categoria_id', type=int)
+        search_term = request.args.get('busca', type=str)
+        # "cursor" ativa a paginação por keyset (vazio = primeira página)
+        cursor = request.args.get('cursor', type=str)
+        # total=false evita o COUNT(*) em cada página
+        with_total = request.args.get('total', 'true', type=str).lower() not in ('false', '0', 'nao', 'não')
+        # fields=id,serial,status: SELECT só dessas colunas e resposta enxuta
+        try:
+            fields = parse_fields(request.args.get('fields', type=str), DISPOSITIVO_FIELDS)
+        except InvalidFields as err:
+            return jsonify({"msg": str(err)}), 400
+
+        # Com busca e sem "sort" explícito, a página offset vem ordenada por relevância
+        by_relevance = bool(search_term) and sort_param is None and cursor is None
+
+        def build_page():
+            query = Dispositivo.query
+            serialize = dispositivo_output.dump_many
+            if fields:
+                # ordenação e id vão no SELECT para o ORDER BY e o cursor, mas não na resposta
+                query = project_dispositivos(query, fields, extra=(sort, 'id'))
+                serialize = lambda rows: rows_to_dicts(rows, fields)
+            query = apply_dispositivo_filters(query, filter_status, filter_categoria, search_term,
+                                              order_by_relevance=by_relevance)
+
+            if cursor is not None:
+                page_limit = max(limit, 1)
+                items, next_cursor = keyset_page(query, sort, order, cursor, page_limit)
+
+                pagination = {"limit": page_limit, "next_cursor": next_cursor}
+                if with_total:
+                    pagination["total_records"] = query.order_by(None).count()
+
+                return {
+                    "items": serialize(items),
+                    "pagination": pagination,
+                }
+
+            if not by_relevance:
+                query = apply_sort(query, sort, order)
+            page_number, per_page = offset_page_args(page, limit)
+            paginated_result = query.paginate(page=page_number, per_page=per_page, error_out=False,
+                                              count=with_total)
+
+            pagination = {
                 "current_page": paginated_result.page,
                 "limit": paginated_result.per_page,
             }
-        }), 200
+            if with_total:
+                pagination["total_records"] = paginated_result.total
+                pagination["total_pages"] = paginated_result.pages
+
+            return {
+                "items": serialize(paginated_result.items),
+                "pagination": pagination,
+            }
+
+        fingerprint = dispositivos_fingerprint(request.args)
+
+        def make_response():
+            if search_term:
+                # buscas livres têm cardinalidade alta demais para valer o cache
+                return jsonify(build_page())
+            return response_cache.cached_json(
+                cache.DISPOSITIVOS, (sorted(request.args.items(multi=True)), fingerprint.etag), build_page,
+            )
+        try:
+            return conditional_response(fingerprint, make_response)
+        except InvalidCursor as err:
+            return jsonify({"msg": str(err)}), 400
 
     @app.route("/dispositivos/<int:id>", methods=["GET"])
     @jwt_required()
+    @read_replica
     def get_dispositivo(id):
-        dispositivo = Dispositivo.query.get_or_404(id)
-        return jsonify(dispositivo.to_dict()), 200
+        fingerprint = dispositivo_fingerprint(id)
+        return conditional_response(fingerprint, lambda: response_cache.cached_json(
+            cache.DISPOSITIVO, (id, fingerprint.etag),
+            lambda: dispositivo_output.dump(Dispositivo.query.get_or_404(id)),
+        ))
 
     @app.route("/dispositivos/<int:id>", methods=["PUT", "PATCH"])
     @jwt_required()
@@ -241,7 +568,7 @@ def create_app():
 
         try:
             # NOVO: Validação de entrada. Usamos partial=True para permitir campos opcionais (PATCH).
-            validated_data = DispositivoSchema().load(data, partial=True)
+            validated_data = dispositivo_schema.load(data, partial=True)
         except ValidationError as err:
             return handle_validation_error(err)
             
@@ -257,17 +584,17 @@ def create_app():
             dispositivo.status = status
 
         if serial:
-            if serial != dispositivo.serial and Dispositivo.query.filter_by(serial=serial).first():
+            if serial != dispositivo.serial and exists(Dispositivo.serial == serial):
                 return jsonify({"msg": "Serial já em uso."}), 409
             dispositivo.serial = serial
 
         if 'categoria_id' in validated_data: # Checa se a chave foi enviada (mesmo que seja null/None)
-            if categoria_id is not None and not Categoria.query.get(categoria_id):
+            if categoria_id is not None and not exists(Categoria.id == categoria_id):
                 return jsonify({"msg": "Categoria_id inválida."}), 400
             dispositivo.categoria_id = categoria_id
 
         db.session.commit()
-        return jsonify(dispositivo.to_dict()), 200
+        return jsonify(dispositivo_output.dump(dispositivo)), 200
 
     @app.route("/dispositivos/<int:id>", methods=["DELETE"])
     @jwt_required()
@@ -277,6 +604,32 @@ def create_app():
         db.session.commit()
         return '', 204
 
+    # ---------- TAREFAS EM SEGUNDO PLANO ----------
+    @app.route("/jobs", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def create_job():
+        data = request.get_json() or {}
+
+        try:
+            validated_data = tarefa_schema.load(data)
+            tarefa = submit_job(validated_data["tipo"], validated_data["params"],
+                                user_id=int(get_jwt_identity()))
+        except ValidationError as err:
+            return handle_validation_error(err)
+
+        # 202: a tarefa roda nos workers de jobs.py; o progresso sai em GET /jobs/<id>
+        return jsonify(job_to_dict(tarefa)), 202, {"Location": f"/jobs/{tarefa.id}"}
+
+    @app.route("/jobs/<int:id>", methods=["GET"])
+    @jwt_required()
+    def get_job(id):
+        # Sempre do primário: o progresso muda a cada parte executada
+        tarefa = db.session.get(Tarefa, id)
+        if tarefa is None or tarefa.user_id != int(get_jwt_identity()):
+            return jsonify({"msg": "Tarefa não encontrada"}), 404
+        return jsonify(job_to_dict(tarefa)), 200
+
     return app
 
 
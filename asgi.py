@@ -0,0 +1,498 @@
+"""Modo de serviço ASGI com handlers assíncronos e engine async do SQLAlchemy.
+
+Serve as mesmas rotas de autenticação, categorias e dispositivos de
+``app.create_app``, pelos mesmos caminhos: models, instâncias de schema e de
+saída (``schemas``), provider JSON, regras de paginação (``pagination``),
+funções de lote (``batch``) e o ``CachingJWTManager`` com a blocklist (um
+token emitido ou revogado num modo vale no outro). Execução:
+
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 'asgi:create_asgi_app()'
+
+Requer ``starlette``, ``uvicorn`` e o driver async do banco (``aiosqlite`` para
+SQLite, ``asyncpg`` para Postgres).
+
+Diferenças em relação ao modo WSGI, cobertas por tests/test_asgi.py:
+
+- ``Idempotency-Key`` é ignorado: um retry de POST cria de novo (ou recebe
+  409 pela constraint unique);
+- sem cache de leitura, ETag, ``fields`` nem rate limit;
+- só as rotas de CRUD e autenticação (sem lote, importação, exportação,
+  feed de alterações, estatísticas e tarefas).
+"""
+import contextlib
+
+import jwt as pyjwt
+from flask import Flask
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from flask_jwt_extended.exceptions import JWTDecodeError
+from marshmallow import ValidationError
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import changes  # noqa: F401 - eventos que gravam o log de alterações (alteracao)
+import stats  # noqa: F401 - eventos que mantêm as tabelas estatistica_*
+from batch import BatchSelection, batch_delete, batch_update
+from config import Config
+from database import configure_engine, engine_options
+from extensions import jwt
+from models import Categoria, Dispositivo, User
+from passwords import PasswordHasherBusy, password_hasher
+from pagination import (InvalidCursor, apply_cursor, apply_dispositivo_filters, apply_sort,
+                        decode_cursor, encode_cursor, offset_page_args, resolve_sort)
+from schemas import (auth_schema, categoria_output, categoria_schema, dispositivo_output,
+                     dispositivo_schema)
+from search import backend_for
+from serialization import init_json
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    """Troca o driver síncrono da URL pelo equivalente async (sqlite -> aiosqlite...)."""
+    scheme, sep, rest = url.partition('://')
+    base = scheme.split('+', 1)[0]
+    return ASYNC_DRIVERS.get(base, scheme) + sep + rest
+
+
+class JWTError(Exception):
+    def __init__(self, msg, status):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+
+class AsyncAPI:
+    def __init__(self, config):
+        self.config = config
+        settings = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+        self.engine = create_async_engine(async_database_url(config.SQLALCHEMY_DATABASE_URI),
+                                          **engine_options(settings))
+        configure_engine(self.engine.sync_engine, settings)
+        password_hasher.configure(
+            method=settings['PASSWORD_HASH_METHOD'],
+            salt_length=settings['PASSWORD_SALT_LENGTH'],
+            workers=settings['PASSWORD_HASH_WORKERS'],
+            max_pending=settings['PASSWORD_HASH_MAX_PENDING'],
+        )
+        # expire_on_commit=False: no modo async não há lazy load implícito após o commit
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.search_backend = None
+
+        # App Flask só de configuração, que não atende requisições: tokens passam pelo
+        # mesmo CachingJWTManager do modo WSGI (claims, verificação, cache de tokens
+        # verificados e blocklist) e as respostas pelo mesmo provider JSON
+        self.flask_app = Flask(__name__)
+        self.flask_app.config.from_object(config)
+        jwt.init_app(self.flask_app)
+        init_json(self.flask_app)
+        self.blocklist = self.flask_app.extensions['jwt_blocklist']
+
+    def json_response(self, content, status_code=200):
+        return Response(self.flask_app.json.dumps(content), status_code=status_code,
+                        media_type=self.flask_app.json.mimetype)
+
+    # ---------- JWT (mesmas claims e erros do Flask-JWT-Extended) ----------
+    def create_access_token(self, identity):
+        with self.flask_app.app_context():
+            return create_access_token(identity)
+
+    def create_refresh_token(self, identity):
+        with self.flask_app.app_context():
+            return create_refresh_token(identity)
+
+    def decode_token(self, token):
+        with self.flask_app.app_context():
+            try:
+                return decode_token(token)
+            except pyjwt.ExpiredSignatureError:
+                raise JWTError("Token has expired", 401)
+            except (pyjwt.InvalidTokenError, JWTDecodeError) as exc:
+                raise JWTError(str(exc), 422)
+
+    async def is_revoked(self, claims):
+        # A consulta ao store (arquivo SQLite, Redis) bloqueia: fora do event loop
+        revoked = self.blocklist.cached(claims['jti'])
+        if revoked is None:
+            revoked = await run_in_threadpool(self.blocklist.__contains__, claims['jti'])
+        return revoked
+
+    async def verify_request(self, request, token_type='access'):
+        header = request.headers.get('Authorization')
+        if not header:
+            raise JWTError("Missing Authorization Header", 401)
+        parts = header.split()
+        if parts[0] != 'Bearer' or len(parts) != 2:
+            raise JWTError("Bad Authorization header. Expected 'Authorization: Bearer <JWT>'", 422)
+        claims = self.decode_token(parts[1])
+        if token_type == 'access' and claims.get('type') != 'access':
+            raise JWTError("Only non-refresh tokens are allowed", 422)
+        if token_type == 'refresh' and claims.get('type') != 'refresh':
+            raise JWTError("Only refresh tokens are allowed", 422)
+        if await self.is_revoked(claims):
+            raise JWTError("Token has been revoked", 401)
+        return claims
+
+    async def revoke(self, claims):
+        await run_in_threadpool(self.blocklist.add, claims['jti'], claims['exp'])
+
+    async def startup(self):
+        async with self.engine.connect() as conn:
+            self.search_backend = await conn.run_sync(backend_for)
+
+    async def shutdown(self):
+        await self.engine.dispose()
+
+
+def _validation_error(err):
+    return JSONResponse({"msg": "Erro de validação", "errors": err.messages}, status_code=400)
+
+
+def _busy():
+    return JSONResponse({"msg": "Servidor ocupado, tente novamente"}, status_code=503,
+                        headers={"Retry-After": "1"})
+
+
+def _not_found():
+    return JSONResponse({"msg": "Recurso não encontrado."}, status_code=404)
+
+
+def _int_arg(args, name, default):
+    # mesmo comportamento do request.args.get(..., type=int) do Flask
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def _json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data or {}
+
+
+def create_asgi_app(config_class=Config):
+    api = AsyncAPI(config_class)
+
+    def protected(handler, token_type='access'):
+        async def wrapper(request):
+            try:
+                request.state.jwt = await api.verify_request(request, token_type)
+            except JWTError as err:
+                return JSONResponse({"msg": err.msg}, status_code=err.status)
+            return await handler(request)
+        return wrapper
+
+    async def index(request):
+        return JSONResponse({"message": "API de Gerenciamento de Dispositivos iniciada com sucesso!"})
+
+    # ---------- ROTAS DE AUTENTICAÇÃO ----------
+    async def register(request):
+        try:
+            validated_data = auth_schema.load(await _json(request))
+        except ValidationError as err:
+            return _validation_error(err)
+
+        async with api.sessionmaker() as session:
+            if await session.scalar(select(User.id).where(User.username == validated_data["username"])):
+                return JSONResponse({"msg": "Nome de usuário já existe"}, status_code=409)
+
+            # hash de senha é CPU pesado: roda no pool de hashing, fora do event loop
+            try:
+                password_hash = await password_hasher.hash_async(validated_data["password"])
+            except PasswordHasherBusy:
+                return _busy()
+            session.add(User(username=validated_data["username"], password_hash=password_hash))
+            await session.commit()
+
+        return JSONResponse({"msg": "Usuário criado com sucesso"}, status_code=201)
+
+    async def login(request):
+        try:
+            validated_data = auth_schema.load(await _json(request))
+        except ValidationError as err:
+            return _validation_error(err)
+
+        password = validated_data["password"]
+        async with api.sessionmaker() as session:
+            user = await session.scalar(select(User).where(User.username == validated_data["username"]))
+
+            try:
+                valid = user is not None and await password_hasher.verify_async(user.password_hash, password)
+                if valid and user.password_needs_rehash():
+                    user.password_hash = await password_hasher.hash_async(password)
+                    await session.commit()
+            except PasswordHasherBusy:
+                return _busy()
+
+        if valid:
+            return JSONResponse({"access_token": api.create_access_token(str(user.id)),
+                                 "refresh_token": api.create_refresh_token(str(user.id))})
+
+        return JSONResponse({"msg": "Credenciais inválidas"}, status_code=401)
+
+    async def refresh(request):
+        return JSONResponse({"access_token": api.create_access_token(request.state.jwt['sub'])})
+
+    async def logout(request):
+        claims = request.state.jwt
+        await api.revoke(claims)
+
+        refresh_token = (await _json(request)).get("refresh_token")
+        if refresh_token:
+            try:
+                refresh_claims = api.decode_token(refresh_token)
+            except JWTError as err:
+                return JSONResponse({"msg": err.msg}, status_code=err.status)
+            if await api.is_revoked(refresh_claims):
+                return JSONResponse({"msg": "Token has been revoked"}, status_code=401)
+            if refresh_claims["sub"] != claims["sub"] or refresh_claims["type"] != "refresh":
+                return JSONResponse({"msg": "refresh_token inválido"}, status_code=422)
+            await api.revoke(refresh_claims)
+
+        return JSONResponse({"msg": "Logout realizado com sucesso"})
+
+    # ---------- CRUD DE CATEGORIAS ----------
+    async def categorias(request):
+        if request.method == "GET":
+            async with api.sessionmaker() as session:
+                result = await session.scalars(select(Categoria))
+                return api.json_response(categoria_output.dump_many(result))
+
+        try:
+            validated_data = categoria_schema.load(await _json(request))
+        except ValidationError as err:
+            return _validation_error(err)
+
+        async with api.sessionmaker() as session:
+            # A unicidade fica com a constraint de "nome", como no modo WSGI: sem SELECT prévio e sem corrida
+            categoria = Categoria(nome=validated_data["nome"], descricao=validated_data.get("descricao", ""))
+            session.add(categoria)
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return JSONResponse({"msg": "Categoria com este nome já existe"}, status_code=409)
+            return api.json_response(categoria_output.dump(categoria), status_code=201)
+
+    async def categoria(request):
+        id = request.path_params['id']
+        async with api.sessionmaker() as session:
+            categoria = await session.get(Categoria, id)
+            if categoria is None:
+                return _not_found()
+
+            if request.method == "GET":
+                return api.json_response(categoria_output.dump(categoria))
+
+            if request.method == "DELETE":
+                # ?dispositivos=reatribuir&destino=<id>, desvincular ou excluir, como no modo WSGI:
+                # mesmas funções de lote, na mesma transação da exclusão
+                modo = request.query_params.get('dispositivos')
+                vinculados = BatchSelection(categoria_id=id)
+                if modo is None:
+                    if await session.scalar(select(exists().where(Dispositivo.categoria_id == id))):
+                        return JSONResponse({"msg": "Não é possível excluir a categoria, pois existem dispositivos vinculados."},
+                                            status_code=400)
+                elif modo == 'reatribuir':
+                    destino = _int_arg(request.query_params, 'destino', None)
+                    if destino is None or destino == id or not await session.scalar(
+                            select(exists().where(Categoria.id == destino))):
+                        return JSONResponse({"msg": "Informe em \"destino\" outra categoria existente."},
+                                            status_code=400)
+                    await session.run_sync(lambda sync: batch_update(vinculados, {"categoria_id": destino}, sync))
+                elif modo == 'desvincular':
+                    await session.run_sync(lambda sync: batch_update(vinculados, {"categoria_id": None}, sync))
+                elif modo == 'excluir':
+                    await session.run_sync(lambda sync: batch_delete(vinculados, sync))
+                else:
+                    return JSONResponse({"msg": "dispositivos deve ser 'reatribuir', 'desvincular' ou 'excluir'."},
+                                        status_code=400)
+                await session.delete(categoria)
+                await session.commit()
+                return Response(status_code=204)
+
+            try:
+                validated_data = categoria_schema.load(await _json(request), partial=True)
+            except ValidationError as err:
+                return _validation_error(err)
+
+            nome = validated_data.get("nome")
+            if nome:
+                if nome != categoria.nome and await session.scalar(
+                        select(exists().where(Categoria.nome == nome))):
+                    return JSONResponse({"msg": "Categoria com este nome já existe"}, status_code=409)
+                categoria.nome = nome
+
+            if 'descricao' in validated_data:
+                categoria.descricao = validated_data.get("descricao")
+
+            await session.commit()
+            return api.json_response(categoria_output.dump(categoria))
+
+    # ---------- CRUD DE DISPOSITIVOS ----------
+    async def _load_dispositivo(session, id):
+        # populate_existing recarrega junto a categoria (JOIN), já que não há lazy load async
+        return await session.get(Dispositivo, id, populate_existing=True)
+
+    async def _categoria_invalida(session, categoria_id):
+        return categoria_id is not None and not await session.scalar(
+            select(exists().where(Categoria.id == categoria_id)))
+
+    async def dispositivos(request):
+        if request.method == "GET":
+            return await list_dispositivos(request)
+
+        try:
+            validated_data = dispositivo_schema.load(await _json(request))
+        except ValidationError as err:
+            return _validation_error(err)
+
+        async with api.sessionmaker() as session:
+            categoria_id = validated_data.get("categoria_id")
+            if await _categoria_invalida(session, categoria_id):
+                return JSONResponse({"msg": "Categoria_id inválida."}, status_code=400)
+
+            dispositivo = Dispositivo(
+                nome=validated_data["nome"],
+                serial=validated_data["serial"],
+                categoria_id=categoria_id,
+                status=validated_data.get("status", "ativo"),
+            )
+            session.add(dispositivo)
+            # Serial duplicado é barrado pela constraint unique no INSERT, sem SELECT prévio
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return JSONResponse({"msg": "Dispositivo com este serial já existe."}, status_code=409)
+            dispositivo = await _load_dispositivo(session, dispositivo.id)
+            return api.json_response(dispositivo_output.dump(dispositivo), status_code=201)
+
+    async def list_dispositivos(request):
+        args = request.query_params
+        limit = _int_arg(args, 'limit', 10)
+        sort_param = args.get('sort')
+        sort, order = resolve_sort(sort_param or 'id', args.get('order', 'asc'))
+        search_term = args.get('busca')
+        cursor = args.get('cursor')
+        with_total = args.get('total', 'true').lower() not in ('false', '0', 'nao', 'não')
+        by_relevance = bool(search_term) and sort_param is None and cursor is None
+        categoria_id = _int_arg(args, 'categoria_id', None)
+
+        stmt = apply_dispositivo_filters(
+            select(Dispositivo), args.get('status'), categoria_id,
+            search_term, order_by_relevance=by_relevance, search_backend=api.search_backend,
+        )
+
+        async with api.sessionmaker() as session:
+            total = None
+            if with_total:
+                count_stmt = apply_dispositivo_filters(
+                    select(func.count(Dispositivo.id)), args.get('status'), categoria_id, search_term,
+                    search_backend=api.search_backend,
+                )
+                total = await session.scalar(count_stmt)
+
+            if cursor is not None:
+                limit = max(limit, 1)
+                try:
+                    if cursor:
+                        value, last_id = decode_cursor(cursor, sort, order)
+                        stmt = apply_cursor(stmt, sort, order, value, last_id)
+                except InvalidCursor as err:
+                    return JSONResponse({"msg": str(err)}, status_code=400)
+
+                rows = (await session.scalars(apply_sort(stmt, sort, order).limit(limit + 1))).all()
+                items = rows[:limit]
+                pagination = {
+                    "limit": limit,
+                    "next_cursor": encode_cursor(items[-1], sort, order) if len(rows) > limit else None,
+                }
+            else:
+                page, limit = offset_page_args(_int_arg(args, 'page', 1), limit)
+                if not by_relevance:
+                    stmt = apply_sort(stmt, sort, order)
+                items = (await session.scalars(stmt.limit(limit).offset((page - 1) * limit))).all()
+                pagination = {"current_page": page, "limit": limit}
+                if with_total:
+                    pagination["total_pages"] = -(-total // limit)
+
+            if with_total:
+                pagination["total_records"] = total
+
+            return api.json_response({"items": dispositivo_output.dump_many(items), "pagination": pagination})
+
+    async def dispositivo(request):
+        id = request.path_params['id']
+        async with api.sessionmaker() as session:
+            dispositivo = await _load_dispositivo(session, id)
+            if dispositivo is None:
+                return _not_found()
+
+            if request.method == "GET":
+                return api.json_response(dispositivo_output.dump(dispositivo))
+
+            if request.method == "DELETE":
+                await session.delete(dispositivo)
+                await session.commit()
+                return Response(status_code=204)
+
+            try:
+                validated_data = dispositivo_schema.load(await _json(request), partial=True)
+            except ValidationError as err:
+                return _validation_error(err)
+
+            if validated_data.get("nome"):
+                dispositivo.nome = validated_data["nome"]
+
+            if validated_data.get("status"):
+                dispositivo.status = validated_data["status"]
+
+            serial = validated_data.get("serial")
+            if serial:
+                if serial != dispositivo.serial and await session.scalar(
+                        select(exists().where(Dispositivo.serial == serial))):
+                    return JSONResponse({"msg": "Serial já em uso."}, status_code=409)
+                dispositivo.serial = serial
+
+            if 'categoria_id' in validated_data:
+                if await _categoria_invalida(session, validated_data["categoria_id"]):
+                    return JSONResponse({"msg": "Categoria_id inválida."}, status_code=400)
+                dispositivo.categoria_id = validated_data["categoria_id"]
+
+            await session.commit()
+            dispositivo = await _load_dispositivo(session, id)
+            return api.json_response(dispositivo_output.dump(dispositivo))
+
+    routes = [
+        Route("/", index),
+        Route("/auth/register", register, methods=["POST"]),
+        Route("/auth/login", login, methods=["POST"]),
+        Route("/auth/refresh", protected(refresh, 'refresh'), methods=["POST"]),
+        Route("/auth/logout", protected(logout, None), methods=["POST"]),
+        Route("/categorias", protected(categorias), methods=["GET", "POST"]),
+        Route("/categorias/{id:int}", protected(categoria), methods=["GET", "PUT", "PATCH", "DELETE"]),
+        Route("/dispositivos", protected(dispositivos), methods=["GET", "POST"]),
+        Route("/dispositivos/{id:int}", protected(dispositivo), methods=["GET", "PUT", "PATCH", "DELETE"]),
+    ]
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await api.startup()
+        yield
+        await api.shutdown()
+
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.api = api
+    return app
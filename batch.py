@@ -0,0 +1,117 @@
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import Integer, any_, bindparam, delete, false, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from cache import DISPOSITIVO, DISPOSITIVOS, invalidate_on_commit
+from changes import DELETE, DISPOSITIVO as DISPOSITIVO_ENTIDADE, UPDATE, log_changes
+from extensions import db
+from models import Dispositivo, EstatisticaDispositivo
+from pagination import apply_dispositivo_filters
+from stats import apply_deltas
+
+
+class BatchSelection:
+    """Conjunto de dispositivos de uma operação em lote: ids do corpo e/ou os
+    mesmos filtros da listagem (status, categoria_id, busca), combinados com AND.
+    """
+
+    def __init__(self, ids=None, status=None, categoria_id=None, busca=None):
+        self.ids = ids
+        self.status = status
+        self.categoria_id = categoria_id
+        self.busca = busca
+
+    @property
+    def empty(self):
+        # Sem nenhum seletor a operação pegaria a tabela inteira: recusado na rota
+        return not (self.ids or self.status in ('ativo', 'inativo') or self.categoria_id or self.busca)
+
+    def apply(self, stmt):
+        if self.ids:
+            stmt = stmt.filter(Dispositivo.id.in_(self.ids))
+        return apply_dispositivo_filters(stmt, self.status, self.categoria_id, self.busca)
+
+
+def _as_date(value):
+    # created_at do RETURNING; datetime é subclasse de date, por isso vem antes
+    if isinstance(value, datetime):
+        return value.date()
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _lock_selection(session, selection):
+    """Lê (id, status, categoria_id) do conjunto e trava essas linhas até o fim da transação.
+
+    Os deltas de estatística do UPDATE saem desta leitura, então nenhuma
+    escrita concorrente pode mudar as linhas entre ela e o UPDATE. No
+    Postgres é um SELECT ... FOR UPDATE. O SQLite não tem lock de linha: uma
+    escrita vazia antes da leitura abre a transação já com o lock de escrita
+    do banco (o efeito de um BEGIN IMMEDIATE), e as outras escritas esperam.
+    """
+    if session.get_bind().dialect.name == 'sqlite':
+        session.execute(update(EstatisticaDispositivo).where(false())
+                        .values(total=EstatisticaDispositivo.total))
+    stmt = selection.apply(select(Dispositivo.id, Dispositivo.status, Dispositivo.categoria_id))
+    return session.execute(stmt.with_for_update()).all()
+
+
+def batch_update(selection, values, session=None):
+    """Aplica ``values`` a todo o conjunto com um único UPDATE ... WHERE.
+
+    Não faz commit, para caber na transação de quem chama. ``session`` é a do
+    Flask-SQLAlchemy por padrão (o modo ASGI passa a sua via ``run_sync``).
+    Devolve o número de linhas alteradas.
+    """
+    session = session or db.session
+    rows = _lock_selection(session, selection)
+    if not rows:
+        return 0
+    ids = [row.id for row in rows]
+
+    pairs = Counter()
+    for _, status, categoria_id in rows:
+        new_status = values.get('status', status)
+        new_categoria = values['categoria_id'] if 'categoria_id' in values else categoria_id
+        if (new_status, new_categoria) != (status, categoria_id):
+            pairs[(status, categoria_id)] -= 1
+            pairs[(new_status, new_categoria)] += 1
+
+    stmt = selection.apply(update(Dispositivo)).values(**values, updated_at=datetime.utcnow())
+    if session.get_bind().dialect.name == 'postgresql':
+        # o FOR UPDATE não trava linhas que entraram no filtro depois da leitura
+        stmt = stmt.where(Dispositivo.id == any_(bindparam('ids', ids, type_=ARRAY(Integer))))
+    result = session.execute(stmt.execution_options(synchronize_session=False))
+
+    log_changes(session, DISPOSITIVO_ENTIDADE, UPDATE, ids)
+    apply_deltas(session.connection(), pairs, Counter())
+    # UPDATE via Core não dispara os eventos de mapper do cache
+    invalidate_on_commit(session, DISPOSITIVOS)
+    invalidate_on_commit(session, DISPOSITIVO)
+    return result.rowcount
+
+
+def batch_delete(selection, session=None):
+    """Remove todo o conjunto com um único DELETE ... WHERE, sem commit. Devolve o número de linhas.
+
+    Os deltas de estatística e o log saem do RETURNING: são exatamente as
+    linhas removidas, mesmo com escritas concorrentes no conjunto.
+    """
+    session = session or db.session
+    stmt = selection.apply(delete(Dispositivo)).returning(
+        Dispositivo.id, Dispositivo.status, Dispositivo.categoria_id, Dispositivo.created_at)
+    rows = session.execute(stmt.execution_options(synchronize_session=False)).all()
+
+    pairs, days = Counter(), Counter()
+    for _, status, categoria_id, created_at in rows:
+        pairs[(status, categoria_id)] -= 1
+        days[_as_date(created_at)] -= 1
+
+    log_changes(session, DISPOSITIVO_ENTIDADE, DELETE, [row.id for row in rows])
+    apply_deltas(session.connection(), pairs, days)
+    invalidate_on_commit(session, DISPOSITIVOS)
+    invalidate_on_commit(session, DISPOSITIVO)
+    return len(rows)
@@ -0,0 +1,205 @@
+"""Utilitários compartilhados pelos benchmarks: seed do banco, servidores e gerador de carga."""
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BENCH_USER = {'username': 'benchmark', 'password': 'benchmark'}
+
+
+def bench_config(database_url, **overrides):
+    from config import Config
+
+    # benchmarks medem a API, não o rate limit
+    attrs = {'SQLALCHEMY_DATABASE_URI': database_url, 'RATELIMIT_ENABLED': False, **overrides}
+    return type('BenchConfig', (Config,), attrs)
+
+
+def seed(database_url, categorias=10, dispositivos=10_000, reset=True, chunk=5_000, **overrides):
+    """Cria o schema e popula categorias/dispositivos com inserts em lote.
+
+    ``overrides`` vão para o Config (ex.: PASSWORD_HASH_METHOD do usuário de benchmark).
+    """
+    from sqlalchemy import insert
+
+    from app import create_app
+    from extensions import db
+    from models import Categoria, Dispositivo, User
+    from stats import rebuild_stats
+
+    app = create_app(bench_config(database_url, **overrides))
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        db.create_all()
+
+        user = User(username=BENCH_USER['username'])
+        user.set_password(BENCH_USER['password'])
+        db.session.add(user)
+
+        now = datetime.utcnow()
+        if categorias:
+            db.session.execute(insert(Categoria.__table__), [
+                {'nome': f'Categoria {i}', 'descricao': '', 'created_at': now, 'updated_at': now}
+                for i in range(categorias)
+            ])
+        for start in range(0, dispositivos, chunk):
+            db.session.execute(insert(Dispositivo.__table__), [
+                {
+                    'nome': f'Dispositivo {i}',
+                    'serial': f'SN-{i:09d}',
+                    'status': 'ativo' if i % 3 else 'inativo',
+                    'categoria_id': (i % categorias) + 1 if categorias else None,
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for i in range(start, min(start + chunk, dispositivos))
+            ])
+        db.session.commit()
+        # inserts via Core não passam pelos eventos que mantêm as estatísticas
+        rebuild_stats(db.session)
+    return app
+
+
+def sqlite_url(path):
+    return 'sqlite:///' + os.path.abspath(path)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, port, env=None, timeout=30):
+    """Sobe um servidor HTTP em subprocesso e espera a porta aceitar conexões."""
+    process = subprocess.Popen(command, cwd=ROOT, env={**os.environ, 'RATELIMIT_ENABLED': 'false', **(env or {})},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor terminou ao iniciar: {' '.join(command)}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"Servidor não respondeu em {timeout}s: {' '.join(command)}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def http_login(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/auth/login', body=json.dumps(BENCH_USER),
+                 headers={'Content-Type': 'application/json'})
+    token = json.loads(conn.getresponse().read())['access_token']
+    conn.close()
+    return token
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Resumo padrão dos benchmarks (latências em milissegundos)."""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else None,
+        'p50_ms': percentile(50),
+        'p99_ms': percentile(99),
+    }
+
+
+def http_load(port, make_request, concurrency, duration):
+    """Gerador de carga em malha fechada: ``concurrency`` clientes, cada um com
+    conexão keep-alive, disparando ``make_request(i)`` -> (método, path, corpo, headers)
+    durante ``duration`` segundos."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(worker_id):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local, local_errors, i = [], 0, 0
+        while time.monotonic() < stop_at:
+            method, path, body, headers = make_request(worker_id * 1_000_000 + i)
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+                else:
+                    local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.monotonic() - started, errors[0])
+
+
+def metadata(params):
+    """Contexto da execução, para comparar resultados entre commits e máquinas."""
+    import platform
+
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'params': params,
+    }
+
+
+def emit(results, output=None):
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as fh:
+            fh.write(text + '\n')
+    print(text)
@@ -0,0 +1,69 @@
+"""Compara o modo WSGI (gunicorn, workers sync) com o modo ASGI (gunicorn + UvicornWorker)
+no mesmo número de workers.
+
+Para cada nível de concorrência mede vazão e latência p50/p99 em GET /dispositivos
+e GET /dispositivos/<id>. O resultado sai em JSON.
+
+    python benchmarks/bench_asgi_vs_wsgi.py --workers 2 --concurrency 1 8 32 64
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import (emit, free_port, http_load, http_login, seed, sqlite_url, start_server,  # noqa: E402
+                     stop_server)
+
+SERVERS = {
+    'wsgi': lambda workers, port: [sys.executable, '-m', 'gunicorn', '-w', str(workers),
+                                   '-b', f'127.0.0.1:{port}', 'app:create_app()'],
+    # mesmo gerenciador de processos nos dois modos; só muda a classe do worker
+    'asgi': lambda workers, port: [sys.executable, '-m', 'gunicorn', '-w', str(workers),
+                                   '-k', 'uvicorn.workers.UvicornWorker',
+                                   '-b', f'127.0.0.1:{port}', 'asgi:create_asgi_app()'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--dispositivos', type=int, default=10_000)
+    parser.add_argument('--database-url', help='Postgres, por exemplo; padrão é um SQLite temporário')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    database_url = args.database_url or sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    seed(database_url, dispositivos=args.dispositivos)
+
+    scenarios = {
+        'list': lambda i: ('GET', '/dispositivos?limit=20&total=false', None),
+        'get': lambda i: ('GET', f'/dispositivos/{i % args.dispositivos + 1}', None),
+    }
+
+    results = {'workers': args.workers, 'dispositivos': args.dispositivos, 'modes': {}}
+    for mode, command in SERVERS.items():
+        port = free_port()
+        server = start_server(command(args.workers, port), port, env={'DATABASE_URL': database_url})
+        try:
+            token = http_login(port)
+            headers = {'Authorization': f'Bearer {token}'}
+            results['modes'][mode] = {
+                name: {
+                    str(concurrency): http_load(
+                        port, lambda i, make=make: (*make(i), headers), concurrency, args.duration)
+                    for concurrency in args.concurrency
+                }
+                for name, make in scenarios.items()
+            }
+        finally:
+            stop_server(server)
+
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Guarda de exclusão de categoria e reatribuição/exclusão em lote numa categoria grande.
+
+Popula uma categoria com ``--dispositivos`` itens (padrão 1M) e mede:
+
+* a guarda antiga (COUNT(*) pela relação dinâmica) contra o EXISTS atual;
+* DELETE /categorias/<id> recusado pela guarda;
+* DELETE /categorias/<id>?dispositivos=reatribuir|excluir, uma transação cada.
+
+    python benchmarks/bench_categoria_delete.py --dispositivos 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import BENCH_USER, emit, seed, sqlite_url  # noqa: E402
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(min(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dispositivos', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', help='Postgres, por exemplo; padrão é um SQLite temporário')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    database_url = args.database_url or sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    # duas categorias: todos os dispositivos ficam na primeira, a segunda recebe a reatribuição
+    app = seed(database_url, categorias=1, dispositivos=args.dispositivos, chunk=20_000)
+
+    from extensions import db
+    from models import Categoria, Dispositivo
+
+    with app.app_context():
+        db.session.add(Categoria(nome='Destino', descricao=''))
+        db.session.commit()
+        origem = db.session.execute(db.select(Categoria).filter_by(nome='Categoria 0')).scalar_one()
+        origem_id = origem.id
+        destino_id = db.session.execute(db.select(Categoria.id).filter_by(nome='Destino')).scalar_one()
+
+        results = {
+            'dispositivos': args.dispositivos,
+            'guard_count_ms': timed(lambda: origem.dispositivos.count() > 0, args.repeat),
+            'guard_exists_ms': timed(lambda: db.session.query(
+                db.exists().where(Dispositivo.categoria_id == origem_id)).scalar(), args.repeat),
+        }
+
+    client = app.test_client()
+    token = client.post('/auth/login', json=BENCH_USER).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    results['delete_refused_ms'] = timed(
+        lambda: client.delete(f'/categorias/{origem_id}', headers=headers), args.repeat)
+
+    started = time.perf_counter()
+    response = client.delete(f'/categorias/{origem_id}', headers=headers,
+                             query_string={'dispositivos': 'reatribuir', 'destino': destino_id})
+    results['reassign_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    assert response.status_code == 204, response.get_json()
+
+    started = time.perf_counter()
+    response = client.delete(f'/categorias/{destino_id}', headers=headers,
+                             query_string={'dispositivos': 'excluir'})
+    results['cascade_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    assert response.status_code == 204, response.get_json()
+
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
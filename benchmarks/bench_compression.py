@@ -0,0 +1,81 @@
+"""Compressão das listagens: CPU gasta contra bytes economizados, por tamanho de página.
+
+Para cada página de ``/dispositivos`` (o mesmo JSON que a rota devolve) e
+cada codec/nível disponível, mede a mediana do tempo de compressão, o tamanho
+comprimido e quanto custa servir o mesmo corpo do cache de corpos comprimidos.
+br e zstd só entram com os pacotes brotli/zstandard instalados.
+
+    python benchmarks/bench_compression.py --items 1 10 100 1000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import emit, seed, sqlite_url  # noqa: E402
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from compress import CODECS, _CompressionState
+    from cache import LRUCache
+    from extensions import db
+    from models import Dispositivo
+    from schemas import dispositivo_output
+
+    codecs = []
+    for name, levels in LEVELS.items():
+        for level in levels:
+            try:
+                codecs.append(CODECS[name](level))
+            except ImportError:
+                break
+
+    database_url = sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    app = seed(database_url, dispositivos=max(args.items))
+
+    results = {'repeat': args.repeat, 'codecs': sorted({codec.name for codec in codecs}), 'sizes': {}}
+    with app.test_request_context():
+        for size in args.items:
+            items = db.session.execute(db.select(Dispositivo).limit(size)).scalars().all()
+            body = app.json.response({'items': dispositivo_output.dump_many(items),
+                                      'pagination': {'current_page': 1, 'limit': size}}).get_data()
+            entry = results['sizes'][size] = {'bytes': len(body), 'codecs': {}}
+            for codec in codecs:
+                compressed = codec.compress(body)
+                state = _CompressionState([codec], LRUCache())
+                state.compress(codec, body, 'etag', 60)
+                seconds = timed(lambda: codec.compress(body), args.repeat)
+                entry['codecs'][f'{codec.name}-{getattr(codec, "level", "")}'.rstrip('-')] = {
+                    'bytes': len(compressed),
+                    'ratio': round(len(body) / len(compressed), 2),
+                    'compress_ms': round(seconds * 1000, 4),
+                    # bytes economizados por ms de CPU: o que decide se vale comprimir
+                    'saved_kb_per_cpu_ms': round((len(body) - len(compressed)) / 1024 / (seconds * 1000), 1),
+                    'cached_ms': round(timed(lambda: state.compress(codec, body, 'etag', 60), args.repeat) * 1000, 4),
+                }
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
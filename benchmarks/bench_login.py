@@ -0,0 +1,97 @@
+"""Mede logins/s por núcleo para cada configuração de hash de senha.
+
+Para cada método: tempo de uma verificação isolada e vazão de POST /auth/login
+(in-process, via test client) com ``--concurrency`` threads disputando o pool de
+hashing. ``logins_per_core`` divide a vazão pelos núcleos efetivamente usados.
+
+    python benchmarks/bench_login.py --methods scrypt:32768:8:1 pbkdf2:sha256:600000 --concurrency 1 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import BENCH_USER, bench_config, emit, seed, sqlite_url, summarize  # noqa: E402
+
+DEFAULT_METHODS = ['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:100000']
+
+
+def verify_cost(hasher, rounds):
+    password_hash = hasher.hash(BENCH_USER['password'])
+    started = time.perf_counter()
+    for _ in range(rounds):
+        hasher.verify(password_hash, BENCH_USER['password'])
+    return round((time.perf_counter() - started) / rounds * 1000, 3)
+
+
+def login_load(app, concurrency, duration):
+    latencies, errors, lock = [], [0], threading.Lock()
+    body = json.dumps(BENCH_USER)
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        client = app.test_client()
+        local, local_errors = [], 0
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            response = client.post('/auth/login', data=body, content_type='application/json')
+            if response.status_code == 200:
+                local.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.monotonic() - started, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=20, help='verificações isoladas por método')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from app import create_app
+    from passwords import password_hasher
+
+    cores = os.cpu_count() or 1
+    database_url = sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    results = {'cores': cores, 'methods': {}}
+    for method in args.methods:
+        overrides = {'PASSWORD_HASH_METHOD': method}
+        # seed() grava o usuário de benchmark com o método configurado
+        seed(database_url, categorias=0, dispositivos=0, **overrides)
+
+        entry = {'verify_ms': verify_cost(password_hasher, args.rounds), 'load': {}}
+        for concurrency in args.concurrency:
+            # pool limitado ao nível de concorrência (e aos núcleos disponíveis)
+            workers = min(concurrency, cores)
+            app = create_app(bench_config(database_url, PASSWORD_HASH_WORKERS=workers,
+                                          PASSWORD_HASH_MAX_PENDING=concurrency, **overrides))
+            summary = login_load(app, concurrency, args.duration)
+            summary['hash_workers'] = workers
+            summary['logins_per_core'] = (round(summary['throughput_rps'] / workers, 1)
+                                          if summary['throughput_rps'] else None)
+            entry['load'][str(concurrency)] = summary
+        results['methods'][method] = entry
+
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
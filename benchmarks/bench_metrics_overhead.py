@@ -0,0 +1,77 @@
+"""Custo da instrumentação (/metrics, Server-Timing) por requisição.
+
+Roda as mesmas requisições in-process com métricas desligadas, amostrando tudo
+e amostrando ``--sample-rate``, intercalando as rodadas para diluir ruído.
+
+    python benchmarks/bench_metrics_overhead.py --requests 3000 --rounds 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import BENCH_USER, bench_config, emit, seed, sqlite_url  # noqa: E402
+
+PATHS = ['/dispositivos?limit=20&total=false', '/dispositivos/{i}', '/categorias']
+
+
+def run(client, headers, requests, dispositivos):
+    started = time.perf_counter()
+    for i in range(requests):
+        path = PATHS[i % len(PATHS)].format(i=i % dispositivos + 1)
+        client.get(path, headers=headers)
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    parser.add_argument('--dispositivos', type=int, default=5000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    database_url = sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    seed(database_url, dispositivos=args.dispositivos)
+
+    modes = {
+        'off': {'METRICS_ENABLED': False},
+        'sampled_all': {'METRICS_SAMPLE_RATE': 1.0},
+        f'sampled_{args.sample_rate}': {'METRICS_SAMPLE_RATE': args.sample_rate},
+    }
+    clients = {}
+    for mode, overrides in modes.items():
+        client = create_app(bench_config(database_url, **overrides)).test_client()
+        token = client.post('/auth/login', json=BENCH_USER).get_json()['access_token']
+        clients[mode] = (client, {'Authorization': f'Bearer {token}'})
+        run(client, clients[mode][1], 200, args.dispositivos)  # aquece cache e conexões
+
+    samples = {mode: [] for mode in modes}
+    order = list(clients)
+    for _ in range(args.rounds):
+        random.shuffle(order)
+        for mode in order:
+            client, headers = clients[mode]
+            samples[mode].append(run(client, headers, args.requests, args.dispositivos))
+
+    baseline = statistics.median(samples['off'])
+    results = {'requests_per_round': args.requests, 'rounds': args.rounds, 'modes': {}}
+    for mode, values in samples.items():
+        median = statistics.median(values)
+        results['modes'][mode] = {
+            'mean_us': round(median * 1e6, 2),
+            'overhead_pct': round((median / baseline - 1) * 100, 2),
+        }
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
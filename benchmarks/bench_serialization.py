@@ -0,0 +1,71 @@
+"""Serialização da listagem: caminho antigo (to_dict + json do Flask) contra o novo
+(OutputSchema + provider orjson), sobre páginas de ``/dispositivos`` já carregadas.
+
+Mede só a montagem do payload e o dumps, sem banco nem HTTP, com os mesmos
+objetos ORM nos dois caminhos.
+
+    python benchmarks/bench_serialization.py --items 1000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import emit, seed, sqlite_url  # noqa: E402
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from flask.json.provider import DefaultJSONProvider
+
+    from extensions import db
+    from models import Dispositivo
+    from schemas import dispositivo_output
+    from serialization import ORJSONProvider
+
+    database_url = sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    app = seed(database_url, dispositivos=max(args.items))
+    stdlib, fast = DefaultJSONProvider(app), ORJSONProvider(app)
+
+    results = {'repeat': args.repeat, 'sizes': {}}
+    with app.test_request_context():
+        for size in args.items:
+            items = db.session.execute(db.select(Dispositivo).limit(size)).scalars().all()
+            pagination = {'current_page': 1, 'limit': size}
+
+            def old():
+                return stdlib.response({'items': [dev.to_dict() for dev in items], 'pagination': pagination})
+
+            def new():
+                return fast.response({'items': dispositivo_output.dump_many(items), 'pagination': pagination})
+
+            assert old().get_json() == new().get_json()
+            old_s, new_s = timed(old, args.repeat), timed(new, args.repeat)
+            results['sizes'][size] = {
+                'old_ms': round(old_s * 1000, 3),
+                'new_ms': round(new_s * 1000, 3),
+                'speedup': round(old_s / new_s, 2),
+            }
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
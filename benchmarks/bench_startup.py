@@ -0,0 +1,173 @@
+"""Cold start: tempo de import do app, tempo até a primeira resposta e memória por worker.
+
+* import: ``import app`` + ``create_app()`` em processos novos (mediana de
+  ``--runs``). Falha se o Alembic for importado fora da CLI.
+* gunicorn com e sem ``--preload``: do spawn até o primeiro 200 em ``/`` e
+  RSS/PSS de cada worker depois que todos sobem (Linux, via /proc).
+
+Com ``--baseline`` compara com um resultado anterior e sai com código 1 se
+alguma métrica piorar mais que ``--threshold`` (%), para uso em CI:
+
+    python benchmarks/bench_startup.py --output base.json
+    python benchmarks/bench_startup.py --baseline base.json --threshold 20
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import ROOT, emit, free_port, sqlite_url  # noqa: E402
+
+IMPORT_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "create_app_ms": (created - imported) * 1000,
+                  "alembic_loaded": "alembic" in sys.modules}))
+'''
+# Métricas em que menor é melhor, comparadas com o baseline
+BUDGETED = ('import_ms', 'create_app_ms', 'ttfr_ms', 'worker_rss_mb', 'worker_pss_mb')
+
+
+def measure_import(runs, env):
+    samples = [json.loads(subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=ROOT, env=env, check=True,
+                                         capture_output=True, text=True).stdout) for _ in range(runs)]
+    return {
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 1),
+        'create_app_ms': round(statistics.median(s['create_app_ms'] for s in samples), 1),
+        'alembic_loaded': any(s['alembic_loaded'] for s in samples),
+    }
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as fh:
+                    # o nome do processo vem entre parênteses e pode ter espaços
+                    if int(fh.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+
+def _memory_kb(pid, field, path='status'):
+    with open(f'/proc/{pid}/{path}') as fh:
+        for line in fh:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _first_response(port, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn terminou ao iniciar')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError(f'gunicorn não respondeu em {timeout}s')
+
+
+def _settled_workers(pid, workers, timeout=15):
+    """Espera todos os workers subirem e a memória deles parar de crescer."""
+    deadline, previous = time.monotonic() + timeout, None
+    while time.monotonic() < deadline:
+        children = _children(pid)
+        if len(children) == workers:
+            current = [_memory_kb(child, 'VmRSS') for child in children]
+            if current == previous:
+                return children
+            previous = current
+        time.sleep(0.3)
+    return _children(pid)
+
+
+def measure_server(preload, workers, env):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()']
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env={
+        **env, 'GUNICORN_BIND': f'127.0.0.1:{port}', 'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_PRELOAD': 'true' if preload else 'false',
+    })
+    try:
+        _first_response(port, process, timeout=30)
+        ttfr = time.perf_counter() - started
+        children = _settled_workers(process.pid, workers)
+        rss = [_memory_kb(child, 'VmRSS') / 1024 for child in children]
+        pss = [_memory_kb(child, 'Pss', 'smaps_rollup') / 1024 for child in children]
+        return {
+            'ttfr_ms': round(ttfr * 1000, 1),
+            'workers': len(children),
+            'worker_rss_mb': round(statistics.fmean(rss), 1) if rss else None,
+            # PSS divide as páginas compartilhadas entre os processos: mostra o ganho do preload
+            'worker_pss_mb': round(statistics.fmean(pss), 1) if pss else None,
+            'master_rss_mb': round(_memory_kb(process.pid, 'VmRSS') / 1024, 1),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def regressions(base, current, threshold):
+    found = []
+    for section, values in current.items():
+        if not isinstance(values, dict):
+            continue
+        for metric in BUDGETED:
+            before, after = base.get(section, {}).get(metric), values.get(metric)
+            if before and after is not None and (after / before - 1) * 100 > threshold:
+                found.append(f'{section}.{metric}: {before} -> {after} (+{(after / before - 1) * 100:.1f}%)')
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='processos para medir o import')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--baseline', help='resultado anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=20.0, help='piora tolerada, em %%')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'DATABASE_URL': sqlite_url(os.path.join(tempfile.mkdtemp(), 'startup.db')),
+           'RATELIMIT_ENABLED': 'false'}
+    results = {
+        'params': {'runs': args.runs, 'workers': args.workers},
+        'import': measure_import(args.runs, env),
+        'gunicorn': measure_server(False, args.workers, env),
+        'gunicorn_preload': measure_server(True, args.workers, env),
+    }
+    emit(results, args.output)
+
+    failures = []
+    if results['import']['alembic_loaded']:
+        failures.append('alembic importado fora da CLI')
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            failures += regressions(json.load(fh), results, args.threshold)
+    for failure in failures:
+        print(f'REGRESSÃO: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Compara dois resultados de ``benchmarks/suite.py`` cenário a cenário.
+
+Mostra vazão e p50/p99 de antes e depois e marca regressões acima de
+``--threshold`` (em %). Sai com código 1 se houver alguma, para uso em CI.
+
+    python benchmarks/compare.py base.json atual.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+METRICS = ('throughput_rps', 'p50_ms', 'p99_ms')
+
+
+def change_pct(before, after):
+    if not before or after is None:
+        return None
+    return (after / before - 1) * 100
+
+
+def is_regression(metric, pct, threshold):
+    if pct is None:
+        return False
+    # vazão: pior quando cai; latência: pior quando sobe
+    return pct < -threshold if metric == 'throughput_rps' else pct > threshold
+
+
+def compare(base, current, threshold):
+    rows, regressions = [], []
+    for mode, data in current['modes'].items():
+        base_scenarios = base['modes'].get(mode, {}).get('scenarios', {})
+        for name, after in data['scenarios'].items():
+            before = base_scenarios.get(name)
+            if before is None:
+                continue
+            row = {'mode': mode, 'scenario': name}
+            for metric in METRICS:
+                pct = change_pct(before[metric], after[metric])
+                row[metric] = (before[metric], after[metric], pct)
+                if is_regression(metric, pct, threshold):
+                    regressions.append((mode, name, metric, pct))
+            rows.append(row)
+    return rows, regressions
+
+
+def fmt(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0, help='variação tolerada, em %%')
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as fh:
+        base = json.load(fh)
+    with open(args.current, encoding='utf-8') as fh:
+        current = json.load(fh)
+
+    print(f"base:  {base['metadata'].get('commit')}  atual: {current['metadata'].get('commit')}")
+    rows, regressions = compare(base, current, args.threshold)
+    header = f"{'modo':<10} {'cenário':<44}" + ''.join(f' {metric:>24}' for metric in METRICS)
+    print(header)
+    for row in rows:
+        cells = ''.join(
+            f" {fmt(before):>8} → {fmt(after):>8} {fmt(pct):>5}%"
+            for before, after, pct in (row[metric] for metric in METRICS)
+        )
+        print(f"{row['mode']:<10} {row['scenario']:<44}{cells}")
+
+    if regressions:
+        print(f'\n{len(regressions)} regressão(ões) acima de {args.threshold}%:')
+        for mode, name, metric, pct in regressions:
+            print(f'  {mode}/{name}: {metric} {pct:+.1f}%')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
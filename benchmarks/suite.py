@@ -0,0 +1,202 @@
+"""Suíte de benchmarks da API: vazão e latência p50/p99 por cenário.
+
+Popula o banco (SQLite temporário ou ``--database-url``) e mede login, create,
+cada combinação de filtro/ordenação/busca da listagem (inclusive páginas
+profundas por offset e por cursor), get, update e delete:
+
+* ``inprocess``: via test client do Flask, sequencial e sem rede. Estável, bom
+  para acompanhar regressões commit a commit;
+* ``http``: gunicorn de verdade + gerador de carga em malha fechada.
+
+O resultado sai em JSON (com commit, Python e parâmetros) para comparar com
+``benchmarks/compare.py``.
+
+    python benchmarks/suite.py --mode inprocess --output atual.json
+    python benchmarks/suite.py --mode http --workers 4 --concurrency 16 --duration 10
+    python benchmarks/suite.py --scenarios 'list_*' --dispositivos 100000
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _common import (BENCH_USER, bench_config, emit, free_port, http_load, http_login, metadata,  # noqa: E402
+                     seed, sqlite_url, start_server, stop_server, summarize)
+
+LIST_LIMIT = 20
+
+
+def list_scenarios(dispositivos, categorias, deep_cursors):
+    """Combinações de listagem: filtros x ordenações x paginação (rasa, profunda, cursor)."""
+    deep_page = max(dispositivos // LIST_LIMIT - 1, 1)
+    filters = {
+        'all': {},
+        'status': {'status': 'inativo'},
+        'categoria': {'categoria_id': 1} if categorias else {},
+        'status_categoria': {'status': 'ativo', 'categoria_id': 1} if categorias else {'status': 'ativo'},
+        'busca': {'busca': 'Dispositivo 12'},
+        'busca_serial': {'busca': 'SN-0000001'},
+    }
+    sorts = [('id', 'asc'), ('nome', 'asc'), ('created_at', 'desc')]
+
+    scenarios = {}
+    for filter_name, filter_params in filters.items():
+        for sort, order in sorts:
+            params = {**filter_params, 'sort': sort, 'order': order, 'limit': LIST_LIMIT}
+            base = f'list_{filter_name}_{sort}_{order}'
+            scenarios[base] = params
+            scenarios[f'{base}_nototal'] = {**params, 'total': 'false'}
+            if filter_name == 'all':
+                scenarios[f'{base}_deep_offset'] = {**params, 'page': deep_page, 'total': 'false'}
+                scenarios[f'{base}_deep_cursor'] = {**params, 'cursor': deep_cursors[(sort, order)],
+                                                    'total': 'false'}
+    # projeção (fields=): só as colunas pedidas, sem hidratar o ORM
+    scenarios['list_all_id_asc_fields'] = {'fields': 'id,serial,status', 'sort': 'id', 'limit': 100, 'total': 'false'}
+    scenarios['list_all_id_asc_full'] = {'sort': 'id', 'limit': 100, 'total': 'false'}
+    # busca sem "sort": ordenação por relevância
+    scenarios['list_busca_relevancia'] = {'busca': 'Dispositivo 12', 'limit': LIST_LIMIT}
+    return scenarios
+
+
+def build_scenarios(dispositivos, categorias, deep_cursors):
+    """Cada cenário é ``make(i) -> (método, path, corpo)``; corpo já serializado em JSON.
+
+    Ordem importa: leituras antes das escritas, delete por último.
+    """
+    from urllib.parse import urlencode
+
+    run_id = uuid.uuid4().hex[:8]
+    created, updated, deleted = itertools.count(), itertools.count(), itertools.count()
+
+    def body(data):
+        return json.dumps(data)
+
+    scenarios = {}
+    for name, params in list_scenarios(dispositivos, categorias, deep_cursors).items():
+        scenarios[name] = lambda i, query=urlencode(params): ('GET', f'/dispositivos?{query}', None)
+
+    scenarios.update({
+        'get': lambda i: ('GET', f'/dispositivos/{i % dispositivos + 1}', None),
+        'get_categorias': lambda i: ('GET', '/categorias', None),
+        'stats': lambda i: ('GET', '/dispositivos/stats', None),
+        'login': lambda i: ('POST', '/auth/login', body(BENCH_USER)),
+        'create': lambda i: ('POST', '/dispositivos', body({
+            'nome': f'Bench {i}', 'serial': f'BENCH-{run_id}-{next(created)}',
+            'categoria_id': (i % categorias) + 1 if categorias else None,
+        })),
+        'update': lambda i: ('PATCH', f'/dispositivos/{next(updated) % dispositivos + 1}', body({
+            'nome': f'Atualizado {i}', 'status': 'ativo' if i % 2 else 'inativo',
+        })),
+        # apaga do fim para o começo, sem repetir id entre clientes
+        'delete': lambda i: ('DELETE', f'/dispositivos/{dispositivos - next(deleted) % dispositivos}', None),
+    })
+    return scenarios
+
+
+def deep_cursors_for(app, dispositivos):
+    """Cursor apontando para ~90% da listagem em cada ordenação usada."""
+    from extensions import db
+    from models import Dispositivo
+    from pagination import apply_sort, encode_cursor
+
+    cursors = {}
+    with app.app_context():
+        for sort, order in [('id', 'asc'), ('nome', 'asc'), ('created_at', 'desc')]:
+            stmt = apply_sort(db.select(Dispositivo), sort, order).offset(int(dispositivos * 0.9)).limit(1)
+            row = db.session.execute(stmt).scalar_one_or_none()
+            cursors[(sort, order)] = encode_cursor(row, sort, order) if row is not None else ''
+    return cursors
+
+
+def run_inprocess(app, scenarios, requests, login_requests):
+    client = app.test_client()
+    token = client.post('/auth/login', json=BENCH_USER).get_json()['access_token']
+    auth = {'Authorization': f'Bearer {token}'}
+
+    results = {}
+    for name, make in scenarios.items():
+        total = login_requests if name == 'login' else requests
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for i in range(total):
+            method, path, data = make(i)
+            request_started = time.perf_counter()
+            response = client.open(path, method=method, data=data, headers=auth,
+                                   content_type='application/json' if data else None)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - request_started)
+        results[name] = summarize(latencies, time.perf_counter() - started, errors)
+    return results
+
+
+def run_http(database_url, scenarios, workers, concurrency, duration, login_duration, cache_type):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               'app:create_app()']
+    server = start_server(command, port, env={'DATABASE_URL': database_url, 'CACHE_TYPE': cache_type})
+    try:
+        auth = {'Authorization': f'Bearer {http_login(port)}', 'Content-Type': 'application/json'}
+        return {
+            name: http_load(port, lambda i, make=make: (*make(i), auth), concurrency,
+                            login_duration if name == 'login' else duration)
+            for name, make in scenarios.items()
+        }
+    finally:
+        stop_server(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['inprocess', 'http', 'both'], default='inprocess')
+    parser.add_argument('--scenarios', nargs='+', default=['*'], help="padrões glob, ex.: 'list_*' get")
+    parser.add_argument('--categorias', type=int, default=20)
+    parser.add_argument('--dispositivos', type=int, default=20_000)
+    parser.add_argument('--database-url', help='Postgres, por exemplo; padrão é um SQLite temporário')
+    parser.add_argument('--requests', type=int, default=300, help='requisições por cenário (inprocess)')
+    parser.add_argument('--login-requests', type=int, default=20, help='login é caro de propósito (hash)')
+    parser.add_argument('--workers', type=int, default=2, help='workers do gunicorn (http)')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes simultâneos (http)')
+    parser.add_argument('--duration', type=float, default=5.0, help='segundos por cenário (http)')
+    parser.add_argument('--cache', choices=['null', 'lru'], default='null',
+                        help='cache de respostas; "null" mede o caminho até o banco em toda requisição')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    database_url = args.database_url or sqlite_url(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    modes = ['inprocess', 'http'] if args.mode == 'both' else [args.mode]
+
+    results = {'metadata': metadata(vars(args)), 'modes': {}}
+    for mode in modes:
+        # cada modo parte do mesmo estado inicial, já que os cenários escrevem
+        seed_started = time.perf_counter()
+        app = seed(database_url, categorias=args.categorias, dispositivos=args.dispositivos)
+        seed_seconds = round(time.perf_counter() - seed_started, 2)
+
+        scenarios = build_scenarios(args.dispositivos, args.categorias,
+                                    deep_cursors_for(app, args.dispositivos))
+        scenarios = {name: make for name, make in scenarios.items()
+                     if any(fnmatch.fnmatch(name, pattern) for pattern in args.scenarios)}
+
+        if mode == 'inprocess':
+            from app import create_app
+            app = create_app(bench_config(database_url, CACHE_TYPE=args.cache))
+            scenario_results = run_inprocess(app, scenarios, args.requests, args.login_requests)
+        else:
+            scenario_results = run_http(database_url, scenarios, args.workers, args.concurrency,
+                                        args.duration, min(args.duration, 2.0), args.cache)
+        results['modes'][mode] = {'seed_seconds': seed_seconds, 'scenarios': scenario_results}
+
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
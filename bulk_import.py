@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from cache import DISPOSITIVOS, invalidate_on_commit
+from changes import DISPOSITIVO, INSERT, log_changes_from_select
+from extensions import db
+from models import Categoria, Dispositivo
+from schemas import DispositivoSchema
+from stats import record_inserted
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines')
+CSV_TYPES = ('text/csv', 'application/csv')
+
+_schema = DispositivoSchema(many=True)
+
+
+def detect_format(mimetype):
+    if mimetype in NDJSON_TYPES:
+        return 'ndjson'
+    if mimetype in CSV_TYPES:
+        return 'csv'
+    return None
+
+
+def _ndjson_rows(stream):
+    for line_no, raw_line in enumerate(stream, start=1):
+        line = raw_line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError:
+            yield line_no, None, {"_schema": ["JSON inválido."]}
+
+
+class InvalidEncoding(ValueError):
+    """Linha do CSV que não é UTF-8 (ex.: exportado em Latin-1/Windows-1252)."""
+
+    def __init__(self, line_no):
+        super().__init__(f"Arquivo CSV deve estar em UTF-8 (linha {line_no}).")
+        self.line_no = line_no
+
+
+def _decoded_lines(stream):
+    for line_no, raw_line in enumerate(stream, start=1):
+        try:
+            # utf-8-sig: aceita o BOM que o Excel põe no início do arquivo
+            yield raw_line.decode('utf-8-sig' if line_no == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise InvalidEncoding(line_no) from None
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(_decoded_lines(stream))
+    for row in reader:
+        # Células vazias no CSV equivalem a campo ausente (ex.: categoria_id sem valor)
+        yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+
+
+def _log_inserted(rows):
+    # INSERT via Core não passa pelos eventos do log de alterações
+    serials = [values['serial'] for values in rows]
+    log_changes_from_select(db.session, DISPOSITIVO, INSERT,
+                            select(Dispositivo.id).where(Dispositivo.serial.in_(serials)))
+
+
+class BulkImport:
+    """Importa dispositivos em lotes a partir de um stream NDJSON ou CSV.
+
+    Cada lote de ``chunk_size`` linhas é validado de uma vez, confere seriais e
+    categorias com uma consulta por lote e é inserido com executemany numa única
+    transação, então a memória usada depende do tamanho do lote e não do arquivo.
+    """
+
+    def __init__(self, chunk_size=1000, max_errors=1000):
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def run(self, stream, fmt):
+        if isinstance(stream, io.RawIOBase):
+            # O stream cru do WSGI lê poucos bytes por chamada; o buffer deixa o
+            # readline por linha ordens de grandeza mais barato.
+            stream = io.BufferedReader(stream, buffer_size=64 * 1024)
+        rows = _ndjson_rows(stream) if fmt == 'ndjson' else _csv_rows(stream)
+
+        chunk = []
+        for line_no, data, error in rows:
+            if error is not None:
+                self._reject(line_no, error)
+                continue
+            chunk.append((line_no, data))
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk)
+
+        return self.report()
+
+    def report(self):
+        return {
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+
+    def _reject(self, line_no, messages):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_no, "errors": messages})
+
+    def _process_chunk(self, chunk):
+        try:
+            loaded = _schema.load([data for _, data in chunk])
+            invalid = {}
+        except ValidationError as err:
+            loaded = err.valid_data
+            invalid = err.messages
+
+        candidates = []
+        seen_serials = set()
+        for index, (line_no, _) in enumerate(chunk):
+            if index in invalid:
+                self._reject(line_no, invalid[index])
+                continue
+            data = loaded[index]
+            if data['serial'] in seen_serials:
+                self._reject(line_no, {"serial": ["Serial duplicado no arquivo."]})
+                continue
+            seen_serials.add(data['serial'])
+            candidates.append((line_no, data))
+
+        if not candidates:
+            return
+
+        existing_serials = set(db.session.scalars(
+            select(Dispositivo.serial).where(Dispositivo.serial.in_(seen_serials))
+        ))
+        categoria_ids = {data['categoria_id'] for _, data in candidates if data.get('categoria_id') is not None}
+        valid_categorias = set(db.session.scalars(
+            select(Categoria.id).where(Categoria.id.in_(categoria_ids))
+        )) if categoria_ids else set()
+
+        now = datetime.utcnow()
+        records = []
+        for line_no, data in candidates:
+            if data['serial'] in existing_serials:
+                self._reject(line_no, {"serial": ["Dispositivo com este serial já existe."]})
+                continue
+            categoria_id = data.get('categoria_id')
+            if categoria_id is not None and categoria_id not in valid_categorias:
+                self._reject(line_no, {"categoria_id": ["Categoria_id inválida."]})
+                continue
+            records.append((line_no, {
+                'nome': data['nome'],
+                'serial': data['serial'],
+                'status': data.get('status', 'ativo'),
+                'categoria_id': categoria_id,
+                'created_at': now,
+                'updated_at': now,
+            }))
+
+        if records:
+            self._insert(records)
+
+    def _insert(self, records):
+        try:
+            db.session.execute(insert(Dispositivo.__table__), [values for _, values in records])
+            record_inserted(db.session, [values for _, values in records])
+            _log_inserted([values for _, values in records])
+            invalidate_on_commit(db.session, DISPOSITIVOS)
+            db.session.commit()
+            self.inserted += len(records)
+        except IntegrityError:
+            # Outro processo inseriu um dos seriais entre a checagem e o INSERT:
+            # refaz o lote linha a linha para apontar exatamente quais falharam.
+            db.session.rollback()
+            for line_no, values in records:
+                try:
+                    db.session.execute(insert(Dispositivo.__table__), [values])
+                    record_inserted(db.session, [values])
+                    _log_inserted([values])
+                    invalidate_on_commit(db.session, DISPOSITIVOS)
+                    db.session.commit()
+                    self.inserted += 1
+                except IntegrityError:
+                    db.session.rollback()
+                    self._reject(line_no, {"serial": ["Dispositivo com este serial já existe."]})
@@ -0,0 +1,297 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import Categoria, Dispositivo
+from replicas import read_staleness
+
+# Namespaces das respostas em cache. Listas e itens ficam em namespaces
+# separados para que cada evento invalide só o que realmente mudou.
+CATEGORIAS = 'categorias'
+CATEGORIA = 'categoria'
+DISPOSITIVOS = 'dispositivos'
+DISPOSITIVO = 'dispositivo'
+
+
+def _new_generation():
+    return uuid.uuid4().hex[:12]
+
+
+class LRUCache:
+    """Cache em memória do processo, com limite de entradas e TTL por entrada."""
+
+    name = 'lru'
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        # Gerações ficam fora do LRU: se fossem descartadas, entradas antigas
+        # poderiam voltar a ser servidas.
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.setdefault(namespace, _new_generation())
+
+    def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] = _new_generation()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Backend compartilhado entre processos.
+
+    Aceita qualquer cliente com a interface de ``redis.Redis`` (get/set/delete),
+    o que permite usar um fake local nos testes.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client, prefix='api-cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def generation(self, namespace):
+        key = f'{self.prefix}gen:{namespace}'
+        value = self.client.get(key)
+        if value is None:
+            self.client.set(key, _new_generation(), nx=True)
+            value = self.client.get(key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def bump(self, namespace):
+        self.client.set(f'{self.prefix}gen:{namespace}', _new_generation())
+
+    # Sem __len__: contar as chaves do prefixo exigiria um SCAN no Redis inteiro.
+    # /cache/stats omite "entries" para este backend.
+
+
+class NullCache:
+    name = 'null'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def generation(self, namespace):
+        return '0'
+
+    def bump(self, namespace):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+def _create_backend(config):
+    cache_type = config.get('CACHE_TYPE', 'lru')
+    if cache_type == 'lru':
+        return LRUCache(config.get('CACHE_MAX_ENTRIES', 2048))
+    if cache_type == 'redis':
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_TYPE='redis' requer o pacote 'redis' instalado.") from exc
+        return RedisCache(redis.Redis.from_url(config['CACHE_REDIS_URL']))
+    if cache_type == 'null':
+        return NullCache()
+    raise ValueError(f"CACHE_TYPE desconhecido: {cache_type!r}")
+
+
+class ResponseCache:
+    """Cache de leitura (read-through) dos corpos JSON das rotas GET.
+
+    As entradas são invalidadas pelos eventos after_insert/after_update/
+    after_delete de Categoria e Dispositivo, aplicados só depois do commit.
+    Com o backend "lru" essa invalidação só alcança o processo que escreveu;
+    por isso as rotas com ETag põem o ETag na chave e nunca servem um corpo
+    gerado para outra versão (as entradas antigas expiram pelo TTL).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TYPE', 'lru')
+        app.config.setdefault('CACHE_DEFAULT_TTL', 60)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 2048)
+        app.extensions['response_cache'] = _CacheState(_create_backend(app.config),
+                                                       app.config['CACHE_DEFAULT_TTL'])
+
+    @property
+    def state(self):
+        return current_app.extensions['response_cache']
+
+    def key(self, namespace, *parts):
+        raw = ':'.join(str(part) for part in parts)
+        if len(raw) > 64:
+            raw = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        return f'{namespace}:{self.state.backend.generation(namespace)}:{raw}'
+
+    def cached_json(self, namespace, parts, producer, ttl=None):
+        """Devolve a resposta JSON em cache ou gera, guarda e devolve."""
+        state = self.state
+        ttl = ttl or state.ttl
+        staleness = read_staleness()
+        if staleness is not None:
+            # Lido de réplica: entrada separada, para quem lê do primário (logo
+            # depois de escrever) não receber um corpo atrasado, e que expira
+            # dentro da tolerância de atraso da própria requisição
+            parts = (*parts, 'replica')
+            ttl = max(1, min(ttl, int(staleness)))
+        key = self.key(namespace, *parts)
+        body = state.backend.get(key)
+        if body is None:
+            state.misses[namespace] += 1
+            body = current_app.json.dumps(producer()) + '\n'
+            state.backend.set(key, body, ttl)
+        else:
+            state.hits[namespace] += 1
+        return current_app.response_class(body, status=200, mimetype=current_app.json.mimetype)
+
+    def invalidate(self, namespace, *parts):
+        """Sem ``parts`` descarta o namespace inteiro; com ``parts``, só aquela entrada."""
+        backend = self.state.backend
+        if parts:
+            backend.delete(self.key(namespace, *parts))
+            backend.delete(self.key(namespace, *parts, 'replica'))
+        else:
+            backend.bump(namespace)
+
+    def stats(self):
+        state = self.state
+        stats = {
+            'backend': state.backend.name,
+            'hits': dict(state.hits),
+            'misses': dict(state.misses),
+        }
+        if hasattr(state.backend, '__len__'):
+            stats['entries'] = len(state.backend)
+        return stats
+
+
+class _CacheState:
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = Counter()
+        self.misses = Counter()
+
+
+response_cache = ResponseCache()
+
+
+# ---------- INVALIDAÇÃO POR EVENTOS ----------
+# Os eventos de mapper só registram o que precisa ser invalidado; a invalidação
+# acontece no after_commit. Invalidar no flush deixaria outra requisição
+# recolocar no cache o valor antigo antes do commit.
+
+def _pending(target):
+    session = inspect(target).session
+    return session.info.setdefault('cache_invalidations', set()) if session is not None else None
+
+
+def invalidate_on_commit(session, namespace, *parts):
+    """Agenda uma invalidação para o próximo commit da sessão.
+
+    Para escritas em lote (INSERT/UPDATE/DELETE via Core), que não disparam os
+    eventos de mapper abaixo.
+    """
+    session.info.setdefault('cache_invalidations', set()).add((namespace, *parts))
+
+
+@event.listens_for(Categoria, 'after_insert')
+def _categoria_inserted(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        pending.add((CATEGORIAS,))
+
+
+@event.listens_for(Categoria, 'after_update')
+@event.listens_for(Categoria, 'after_delete')
+def _categoria_changed(mapper, connection, target):
+    pending = _pending(target)
+    if pending is None:
+        return
+    pending.update({(CATEGORIAS,), (CATEGORIA, target.id)})
+    if inspect(target).attrs.nome.history.has_changes():
+        # categoria_nome aparece nas respostas de dispositivos
+        pending.update({(DISPOSITIVOS,), (DISPOSITIVO,)})
+
+
+@event.listens_for(Dispositivo, 'after_insert')
+def _dispositivo_inserted(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        pending.add((DISPOSITIVOS,))
+
+
+@event.listens_for(Dispositivo, 'after_update')
+@event.listens_for(Dispositivo, 'after_delete')
+def _dispositivo_changed(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        pending.update({(DISPOSITIVOS,), (DISPOSITIVO, target.id)})
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    pending = session.info.pop('cache_invalidations', None)
+    if not pending or not has_app_context() or 'response_cache' not in current_app.extensions:
+        return
+    for namespace, *parts in pending:
+        response_cache.invalidate(namespace, *parts)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidations', None)
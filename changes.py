@@ -0,0 +1,222 @@
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, inspect, select, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Alteracao, Categoria, Dispositivo
+from projection import DISPOSITIVO_FIELDS, project_dispositivos
+from schemas import categoria_output
+
+INSERT, UPDATE, DELETE = 'insert', 'update', 'delete'
+DISPOSITIVO, CATEGORIA = 'dispositivo', 'categoria'
+
+# Chave do advisory lock do Postgres que serializa os commits que gravam no log
+_LOG_LOCK_KEY = 7_301_996
+
+
+class InvalidChangeCursor(ValueError):
+    """Cursor do feed de alterações não é um número válido."""
+
+
+# ---------- ESCRITA (mesma transação da alteração) ----------
+# As linhas do log ficam pendentes na sessão e só são gravadas no before_commit.
+# O id vem da sequência no INSERT, mas a linha só aparece no commit: duas
+# transações concorrentes no Postgres poderiam ficar visíveis fora de ordem e
+# um leitor pularia a de id menor. O advisory lock (até o fim da transação)
+# faz a ordem dos ids ser a ordem de commit; tomado só no before_commit, ele
+# cobre o INSERT do log e o COMMIT, e não o trabalho da transação (flush,
+# UPDATEs em lote, estatísticas). No SQLite a escrita já é serial.
+
+def _pending(session):
+    return session.info.setdefault('alteracoes', [])
+
+
+def log_change(session, entidade, operacao, entidade_id):
+    _pending(session).append((entidade, entidade_id, operacao, datetime.utcnow()))
+
+
+def log_changes(session, entidade, operacao, ids):
+    """Registra uma alteração por id (caminhos em lote, com os ids já lidos)."""
+    now = datetime.utcnow()
+    _pending(session).extend((entidade, entidade_id, operacao, now) for entidade_id in ids)
+
+
+def log_changes_from_select(session, entidade, operacao, ids_select):
+    """Registra uma alteração por id de ``ids_select``, lido agora."""
+    log_changes(session, entidade, operacao, session.execute(ids_select).scalars().all())
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_log(session):
+    session.flush()  # os eventos de mapper do último flush ainda entram no log
+    pending = session.info.pop('alteracoes', None)
+    if not pending:
+        return
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOG_LOCK_KEY})
+    connection.execute(insert(Alteracao.__table__), [
+        {'entidade': entidade, 'entidade_id': entidade_id, 'operacao': operacao, 'created_at': created_at}
+        for entidade, entidade_id, operacao, created_at in pending
+    ])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_log(session):
+    session.info.pop('alteracoes', None)
+
+
+def _has_changes(target):
+    state = inspect(target)
+    return any(state.attrs[column.key].history.has_changes() for column in state.mapper.column_attrs)
+
+
+def _listen(model, entidade):
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        log_change(inspect(target).session, entidade, INSERT, target.id)
+
+    @event.listens_for(model, 'after_update')
+    def _updated(mapper, connection, target):
+        # after_update também dispara para objetos "sujos" sem mudança efetiva
+        if _has_changes(target):
+            log_change(inspect(target).session, entidade, UPDATE, target.id)
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        log_change(inspect(target).session, entidade, DELETE, target.id)
+
+
+_listen(Dispositivo, DISPOSITIVO)
+_listen(Categoria, CATEGORIA)
+
+
+# ---------- LEITURA ----------
+
+def latest_change_id():
+    """Id da última alteração: muda a cada commit que altera dispositivos ou categorias."""
+    return db.session.execute(select(func.max(Alteracao.id))).scalar()
+
+
+def parse_cursor(value):
+    if value in (None, ''):
+        return 0
+    try:
+        cursor = int(value)
+    except ValueError:
+        raise InvalidChangeCursor("Cursor inválido em since.") from None
+    if cursor < 0:
+        raise InvalidChangeCursor("Cursor inválido em since.")
+    return cursor
+
+
+def _current_state(entries):
+    """Estado atual das entidades da página, uma consulta por tipo, só das colunas da resposta."""
+    ids = {DISPOSITIVO: set(), CATEGORIA: set()}
+    for entry in entries:
+        if entry.operacao != DELETE:
+            ids[entry.entidade].add(entry.entidade_id)
+
+    state = {}
+    if ids[DISPOSITIVO]:
+        fields = tuple(DISPOSITIVO_FIELDS)
+        rows = project_dispositivos(Dispositivo.query, fields).filter(Dispositivo.id.in_(ids[DISPOSITIVO]))
+        for row in rows:
+            state[(DISPOSITIVO, row.id)] = dict(zip(fields, row))
+    if ids[CATEGORIA]:
+        for categoria in Categoria.query.filter(Categoria.id.in_(ids[CATEGORIA])):
+            state[(CATEGORIA, categoria.id)] = categoria_output.dump(categoria)
+    return state
+
+
+def read_changes(since=0, limit=100, updated_since=None):
+    """Uma página do feed: alterações com id > ``since`` em ordem de commit.
+
+    Várias alterações da mesma entidade na página viram uma só (a última), com
+    o estado atual da entidade; exclusões viram tombstones (``data`` nulo). O
+    custo depende só do volume de alterações, não do tamanho do inventário.
+    """
+    stmt = select(Alteracao).where(Alteracao.id > since).order_by(Alteracao.id).limit(limit + 1)
+    if updated_since is not None:
+        stmt = stmt.where(Alteracao.created_at > updated_since)
+    entries = db.session.execute(stmt).scalars().all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.entidade, entry.entidade_id), None)
+        latest[(entry.entidade, entry.entidade_id)] = entry
+
+    state = _current_state(latest.values())
+    changes = []
+    for key, entry in latest.items():
+        data = None
+        if entry.operacao != DELETE:
+            data = state.get(key)
+            if data is None:
+                # excluída depois desta página: o tombstone vem numa página seguinte
+                continue
+        changes.append({
+            'cursor': str(entry.id),
+            'entidade': entry.entidade,
+            'id': entry.entidade_id,
+            'op': entry.operacao,
+            'changed_at': entry.created_at,
+            'data': data,
+        })
+
+    next_cursor = entries[-1].id if entries else since
+    return {'changes': changes, 'next_cursor': str(next_cursor), 'has_more': has_more}
+
+
+def stream_changes(since, limit, poll_interval, max_seconds, heartbeat=15.0):
+    """Gerador de Server-Sent Events com as alterações a partir de ``since``.
+
+    Consulta o log a cada ``poll_interval`` segundos e encerra depois de
+    ``max_seconds``: o EventSource reconecta sozinho mandando ``Last-Event-ID``,
+    e o worker não fica preso indefinidamente a um cliente.
+    """
+    dumps = current_app.json.dumps
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.monotonic()
+    yield f'retry: {int(poll_interval * 1000)}\n\n'
+    while time.monotonic() < deadline:
+        page = read_changes(since, limit)
+        # encerra a transação de leitura para a próxima consulta enxergar novos commits
+        db.session.rollback()
+        for change in page['changes']:
+            yield f"id: {change['cursor']}\nevent: change\ndata: {dumps(change)}\n\n"
+            last_sent = time.monotonic()
+        since = int(page['next_cursor'])
+        if page['has_more']:
+            continue
+        if time.monotonic() - last_sent >= heartbeat:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        time.sleep(poll_interval)
+
+
+# ---------- RETENÇÃO ----------
+
+changes_cli = AppGroup('changes', help='Log de alterações (feed de sincronização).')
+
+
+@changes_cli.command('prune')
+@click.option('--days', default=30, show_default=True, help='Mantém só as alterações mais novas que isso.')
+def prune_command(days):
+    """Remove alterações antigas. Consumidores com cursor anterior precisam ressincronizar."""
+    # A última linha fica sempre: MAX(id) é o ETag das listagens (conditional.py) e,
+    # sem ela, o SQLite voltaria a numerar do 1 e repetiria ETags antigos
+    latest = select(func.max(Alteracao.id)).scalar_subquery()
+    result = db.session.execute(
+        delete(Alteracao).where(Alteracao.created_at < datetime.utcnow() - timedelta(days=days),
+                                Alteracao.id < latest)
+    )
+    db.session.commit()
+    click.echo(f'{result.rowcount} alterações removidas.')
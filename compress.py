@@ -0,0 +1,220 @@
+import zlib
+from collections import Counter
+
+from flask import current_app, request
+
+from cache import LRUCache
+
+# Só o que é texto compensa comprimir. text/event-stream fica de fora: proxies
+# costumam segurar respostas comprimidas e os eventos deixariam de chegar na hora.
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # wbits=31 -> cabeçalho gzip
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        # Z_SYNC_FLUSH entrega cada pedaço ao cliente sem esperar o fim da resposta
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+                compressor.flush)
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        import brotli
+        self.brotli = brotli
+        self.level = level
+
+    def compress(self, data):
+        return self.brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        compressor = self.brotli.Compressor(quality=self.level)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        import zstandard
+        self.zstandard = zstandard
+        self.level = level
+
+    def _compressor(self):
+        # ZstdCompressor não é thread-safe (workers gthread, exportações em streaming
+        # simultâneas): um por chamada, que custa pouco perto da compressão
+        return self.zstandard.ZstdCompressor(level=self.level)
+
+    def compress(self, data):
+        return self._compressor().compress(data)
+
+    def stream(self):
+        compressor = self._compressor().compressobj()
+        flush_block = self.zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(flush_block), compressor.flush)
+
+
+CODECS = {'zstd': ZstdCodec, 'br': BrotliCodec, 'gzip': GzipCodec}
+DEFAULT_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+
+
+def create_codecs(config):
+    """Codecs na ordem de preferência do servidor, pulando os de pacotes não instalados.
+
+    gzip é da biblioteca padrão e está sempre disponível; br precisa de
+    ``brotli`` e zstd de ``zstandard``.
+    """
+    levels = {**DEFAULT_LEVELS, **config.get('COMPRESS_LEVELS', {})}
+    codecs = []
+    for name in config.get('COMPRESS_ALGORITHMS', ('zstd', 'br', 'gzip')):
+        if name not in CODECS:
+            raise ValueError(f"Algoritmo de compressão desconhecido: {name!r}")
+        try:
+            codecs.append(CODECS[name](levels[name]))
+        except ImportError:
+            continue
+    return codecs
+
+
+def negotiate(accept_encodings, codecs):
+    """Codec de maior qualidade no Accept-Encoding do cliente; empate fica com a ordem do servidor."""
+    best, best_quality = None, 0
+    for codec in codecs:
+        quality = accept_encodings.quality(codec.name)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def encoded_etag(etag, encoding):
+    # Cada codificação é uma representação diferente, então precisa de um ETag forte próprio
+    return f'{etag}-{encoding}'
+
+
+def etag_variants(etag):
+    return (etag, *(encoded_etag(etag, name) for name in CODECS))
+
+
+def _stream(chunks, codec):
+    compress_chunk, finish = codec.stream()
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress_chunk(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class Compression:
+    """Compressão das respostas negociada pelo Accept-Encoding (zstd, br, gzip).
+
+    Corpos abaixo de COMPRESS_MIN_SIZE vão sem compressão: o ganho em bytes
+    não paga a CPU. Respostas em streaming (exportação) são comprimidas pedaço
+    a pedaço. Respostas com ETag (listagens e itens) guardam o corpo
+    comprimido num LRU indexado por (codificação, ETag): o ETag já identifica
+    a representação, então o mesmo corpo não é comprimido de novo.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('COMPRESS_CACHE_TTL', 300)
+        if not app.config['COMPRESS_ENABLED']:
+            return
+
+        state = app.extensions['compression'] = _CompressionState(
+            create_codecs(app.config), LRUCache(app.config['COMPRESS_CACHE_MAX_ENTRIES']),
+        )
+        min_size = app.config['COMPRESS_MIN_SIZE']
+        ttl = app.config['COMPRESS_CACHE_TTL']
+
+        @app.after_request
+        def _compress(response):
+            etag, weak = response.get_etag()
+            if response.status_code == 304:
+                # 304 não tem corpo (nem mimetype útil): só devolve o mesmo ETag
+                # que o cliente recebeu junto com o corpo comprimido
+                codec = negotiate(request.accept_encodings, state.codecs)
+                if codec and etag and request.if_none_match.contains(encoded_etag(etag, codec.name)):
+                    response.set_etag(encoded_etag(etag, codec.name), weak)
+                    response.vary.add('Accept-Encoding')
+                return response
+            if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+                return response
+            response.vary.add('Accept-Encoding')
+            codec = negotiate(request.accept_encodings, state.codecs)
+            if codec is None or 'Content-Encoding' in response.headers:
+                return response
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+
+            if response.is_streamed:
+                response.response = _stream(response.response, codec)
+                response.headers.pop('Content-Length', None)
+            else:
+                body = response.get_data()
+                if len(body) < min_size:
+                    return response
+                response.set_data(state.compress(codec, body, etag if request.method == 'GET' else None, ttl))
+
+            response.headers['Content-Encoding'] = codec.name
+            if etag:
+                response.set_etag(encoded_etag(etag, codec.name), weak)
+            return response
+
+    def stats(self):
+        state = current_app.extensions.get('compression')
+        if state is None:
+            return None
+        return {
+            'codecs': [codec.name for codec in state.codecs],
+            'entries': len(state.cache),
+            'hits': state.hits,
+            'misses': state.misses,
+            'bytes_in': state.bytes['in'],
+            'bytes_out': state.bytes['out'],
+        }
+
+
+class _CompressionState:
+    def __init__(self, codecs, cache):
+        self.codecs = codecs
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self.bytes = Counter()
+
+    def compress(self, codec, body, etag, ttl):
+        key = f'{codec.name}:{etag}' if etag else None
+        data = self.cache.get(key) if key else None
+        if data is None:
+            data = codec.compress(body)
+            if key:
+                self.misses += 1
+                self.cache.set(key, data, ttl)
+        else:
+            self.hits += 1
+        self.bytes['in'] += len(body)
+        self.bytes['out'] += len(data)
+        return data
+
+
+compression = Compression()
@@ -0,0 +1,96 @@
+import hashlib
+from datetime import timezone
+
+from flask import abort, current_app, request
+from sqlalchemy import func, select
+
+from compress import etag_variants
+from extensions import db
+from changes import latest_change_id
+from models import Categoria, Dispositivo
+
+
+class Fingerprint:
+    """ETag forte (e Last-Modified, quando faz sentido) calculado sem hidratar linhas."""
+
+    def __init__(self, *parts, last_modified=None):
+        raw = '|'.join(str(part) for part in parts)
+        self.etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        self.last_modified = last_modified.replace(tzinfo=timezone.utc) if last_modified else None
+
+
+def _latest(*values):
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def categoria_fingerprint(id):
+    updated_at = db.session.execute(
+        select(Categoria.updated_at).where(Categoria.id == id)
+    ).one_or_none()
+    if updated_at is None:
+        abort(404)
+    return Fingerprint('categoria', id, updated_at[0], last_modified=updated_at[0])
+
+
+def dispositivo_fingerprint(id):
+    # categoria_nome faz parte do corpo, então o updated_at da categoria entra no ETag
+    row = db.session.execute(
+        select(Dispositivo.updated_at, Categoria.updated_at)
+        .outerjoin(Categoria, Categoria.id == Dispositivo.categoria_id)
+        .where(Dispositivo.id == id)
+    ).one_or_none()
+    if row is None:
+        abort(404)
+    return Fingerprint('dispositivo', id, *row, last_modified=_latest(*row))
+
+
+def categorias_fingerprint(fields=None):
+    # fields muda a representação, então entra no ETag
+    total, latest = db.session.execute(
+        select(func.count(Categoria.id), func.max(Categoria.updated_at))
+    ).one()
+    return Fingerprint('categorias', total, latest, fields)
+
+
+def dispositivos_fingerprint(args):
+    """ETag de uma listagem: id da última alteração no log + parâmetros da requisição.
+
+    Toda escrita em dispositivo ou categoria (inclusive em lote) grava uma linha
+    em ``alteracao`` na mesma transação, então MAX(id) muda a cada commit que
+    pode alterar alguma página. É uma busca pela ponta da chave primária, sem
+    varrer o conjunto filtrado: custa o mesmo numa página por cursor com
+    total=false e numa listagem de 500 mil linhas.
+
+    Coleções não recebem Last-Modified: uma exclusão não avança nenhum
+    updated_at, então If-Modified-Since daria 304 para uma lista que perdeu itens.
+    """
+    return Fingerprint('dispositivos', sorted(args.items(multi=True)), latest_change_id())
+
+
+def _is_fresh(fingerprint):
+    if request.if_none_match:
+        # o cliente pode ter recebido o ETag de uma versão comprimida (ex.: "<etag>-gzip")
+        return any(request.if_none_match.contains(etag) for etag in etag_variants(fingerprint.etag))
+    if request.if_modified_since and fingerprint.last_modified:
+        return fingerprint.last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _tag(response, fingerprint):
+    response.set_etag(fingerprint.etag)
+    if fingerprint.last_modified:
+        response.last_modified = fingerprint.last_modified
+    # Conteúdo autenticado: só o cliente guarda, sempre revalidando
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_response(fingerprint, make_response):
+    """Responde 304 se o cliente já tem a versão atual; senão chama ``make_response``.
+
+    A checagem acontece antes de qualquer consulta que carregue as linhas ou serialize a resposta.
+    """
+    if _is_fresh(fingerprint):
+        return _tag(current_app.response_class(status=304), fingerprint)
+    return _tag(make_response(), fingerprint)
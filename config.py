@@ -8,7 +8,138 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or \
         "sqlite:///" + os.path.join(BASE_DIR, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexões (repassado ao create_engine via database.engine_options)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Só no Postgres; 0 desativa
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+
+    # Réplicas de leitura (DATABASE_REPLICA_URLS separadas por vírgula). As rotas GET
+    # de listagem e detalhe leem delas em round-robin; escritas vão ao primário
+    SQLALCHEMY_REPLICA_URIS = [url for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url]
+    # Atraso máximo aceito (s) quando o cliente não manda X-Max-Staleness
+    REPLICA_MAX_STALENESS = float(os.environ.get("REPLICA_MAX_STALENESS", 10))
+    # Depois de escrever, o usuário lê do primário por esse tempo (s)
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+    REPLICA_HEALTH_INTERVAL = float(os.environ.get("REPLICA_HEALTH_INTERVAL", 5))
+
+    # PRAGMAs aplicados em cada conexão SQLite
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    # Negativo = tamanho em KiB (64 MiB)
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -64000))
     
     JWT_SECRET_KEY = "super-secret-key" 
     
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=2)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=2)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Claims de tokens já verificados ficam em memória até expirar (0 desativa)
+    JWT_TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("JWT_TOKEN_CACHE_MAX_ENTRIES", 4096))
+    # Tokens revogados (/auth/logout): "sqlite" (padrão) é compartilhada entre os
+    # workers do gunicorn na mesma máquina; com várias instâncias use "redis".
+    # "memory" vale só no processo que recebeu o logout
+    JWT_BLOCKLIST_TYPE = os.environ.get("JWT_BLOCKLIST_TYPE", "sqlite")
+    # Com "sqlite"/"redis", um jti não revogado só é consultado de novo no store
+    # depois desse intervalo: é o atraso máximo para um logout valer nos outros workers
+    JWT_BLOCKLIST_RECHECK_SECONDS = float(os.environ.get("JWT_BLOCKLIST_RECHECK_SECONDS", 5))
+    JWT_BLOCKLIST_SQLITE_PATH = os.environ.get("JWT_BLOCKLIST_SQLITE_PATH")
+    JWT_BLOCKLIST_REDIS_URL = os.environ.get("JWT_BLOCKLIST_REDIS_URL") or \
+        os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Hash de senha (formato do werkzeug: "scrypt:N:r:p" ou "pbkdf2:sha256:iterações").
+    # Trocar o método ou o custo re-gera o hash de cada usuário no próximo login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.environ.get("PASSWORD_SALT_LENGTH", 16))
+    # Threads de hashing por processo (padrão: núcleos) e limite de chamadas em
+    # execução + na fila antes de responder 503
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0)) or None
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 0)) or None
+
+    # Importação em lote (POST /dispositivos/bulk)
+    BULK_IMPORT_CHUNK_SIZE = int(os.environ.get("BULK_IMPORT_CHUNK_SIZE", 1000))
+    BULK_IMPORT_MAX_ERRORS = int(os.environ.get("BULK_IMPORT_MAX_ERRORS", 1000))
+
+    # Operações em lote (PATCH/DELETE /dispositivos/batch): máximo de ids no corpo
+    BATCH_MAX_IDS = int(os.environ.get("BATCH_MAX_IDS", 10000))
+
+    # Exportação completa (GET /dispositivos/export): linhas buscadas por vez
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+    # Instrumentação (/metrics e header Server-Timing). METRICS_SAMPLE_RATE é a
+    # fração das requisições medidas em detalhe (latência, SQL, JSON, validação)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 1.0))
+    METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "true").lower() == "true"
+
+    # Rate limit (token bucket). Por usuário: RATELIMIT_CAPACITY tokens, repostos a
+    # RATELIMIT_REFILL_RATE por segundo; login/registro por IP com os limites AUTH.
+    # "sqlite" compartilha os buckets entre os workers da máquina; "memory" é por processo
+    RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "true").lower() == "true"
+    RATELIMIT_STORAGE = os.environ.get("RATELIMIT_STORAGE", "sqlite")
+    RATELIMIT_SQLITE_PATH = os.environ.get("RATELIMIT_SQLITE_PATH")
+    RATELIMIT_CAPACITY = int(os.environ.get("RATELIMIT_CAPACITY", 120))
+    RATELIMIT_REFILL_RATE = float(os.environ.get("RATELIMIT_REFILL_RATE", 20))
+    RATELIMIT_AUTH_CAPACITY = int(os.environ.get("RATELIMIT_AUTH_CAPACITY", 10))
+    RATELIMIT_AUTH_REFILL_RATE = float(os.environ.get("RATELIMIT_AUTH_REFILL_RATE", 0.2))
+
+    # Admissão: requisições simultâneas por processo (0 = DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # e espera máxima por uma vaga antes do 503
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", 0))
+    ADMISSION_TIMEOUT_MS = int(os.environ.get("ADMISSION_TIMEOUT_MS", 100))
+
+    # Feed de alterações (GET /dispositivos/changes e /changes/stream)
+    CHANGES_MAX_LIMIT = int(os.environ.get("CHANGES_MAX_LIMIT", 1000))
+    CHANGES_POLL_INTERVAL = float(os.environ.get("CHANGES_POLL_INTERVAL", 1.0))
+    # Duração máxima de uma conexão SSE; o cliente reconecta com Last-Event-ID.
+    # Abaixo do timeout do gunicorn, que mata o worker sync preso numa requisição
+    CHANGES_STREAM_MAX_SECONDS = int(os.environ.get("CHANGES_STREAM_MAX_SECONDS", 25))
+    # Streams SSE simultâneos por processo; acima disso, 503. Cada stream prende
+    # uma thread do worker, então o padrão deixa uma thread livre para o resto da
+    # API: com o worker sync (GUNICORN_THREADS=1) o SSE fica desligado
+    CHANGES_STREAM_MAX_CONCURRENT = int(os.environ.get(
+        "CHANGES_STREAM_MAX_CONCURRENT", max(int(os.environ.get("GUNICORN_THREADS", 1)) - 1, 0)))
+
+    # Tarefas em segundo plano (POST /jobs): threads de execução por processo
+    # (0 = nenhuma; use "flask jobs work" num processo separado), itens por parte
+    # e tempo sem heartbeat até outra thread retomar a tarefa do checkpoint
+    JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", 1))
+    JOBS_CHUNK_SIZE = int(os.environ.get("JOBS_CHUNK_SIZE", 500))
+    JOBS_POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", 1.0))
+    JOBS_LEASE_SECONDS = int(os.environ.get("JOBS_LEASE_SECONDS", 60))
+
+    # Idempotency-Key em POST /dispositivos e /categorias: "database" (tabela
+    # chave_idempotencia, compartilhada entre workers) ou "memory" (por processo).
+    # A resposta fica guardada por IDEMPOTENCY_TTL; enquanto a primeira requisição
+    # roda, a chave fica reservada só por IDEMPOTENCY_LEASE_SECONDS (o timeout do
+    # gunicorn), para um worker que morreu no meio não travar os retries
+    IDEMPOTENCY_STORE = os.environ.get("IDEMPOTENCY_STORE", "database")
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600))
+    IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", 30))
+
+    # Provider JSON das respostas: "orjson" (rápido, serializa datetime em C) ou "stdlib"
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "orjson")
+
+    # Compressão negociada pelo Accept-Encoding. Ordem = preferência do servidor;
+    # br e zstd só entram com os pacotes brotli/zstandard instalados
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_ALGORITHMS = tuple(os.environ.get("COMPRESS_ALGORITHMS", "zstd,br,gzip").split(","))
+    # Abaixo disso (bytes) o corpo vai sem compressão
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    # Corpos já comprimidos, indexados por (codificação, ETag)
+    COMPRESS_CACHE_MAX_ENTRIES = int(os.environ.get("COMPRESS_CACHE_MAX_ENTRIES", 512))
+
+    # Cache das respostas GET: "lru" (memória do processo), "redis" ou "null".
+    # Com "lru" cada worker tem o próprio cache e a invalidação só chega ao worker
+    # que escreveu; as chaves levam a versão do banco (ETag ou último id de
+    # alteracao), então um worker nunca serve um corpo desatualizado
+    CACHE_TYPE = os.environ.get("CACHE_TYPE", "lru")
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 60))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 2048))
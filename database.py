@@ -0,0 +1,81 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config, uri=None):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS (pool, pre-ping, recycle, timeout) a partir do Config.
+
+    ``uri`` é o banco do engine (padrão: SQLALCHEMY_DATABASE_URI); as réplicas usam as mesmas opções.
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+
+    # SQLite em memória usa StaticPool (uma conexão só), que não aceita dimensionamento
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+
+    return options
+
+
+def sqlite_pragmas(config, url):
+    pragmas = {
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'cache_size': config['SQLITE_CACHE_SIZE'],
+    }
+    # WAL não se aplica a banco em memória
+    if not _is_sqlite_memory(url):
+        pragmas = {'journal_mode': config['SQLITE_JOURNAL_MODE'], **pragmas}
+    return pragmas
+
+
+def configure_engine(engine, config):
+    """Aplica os PRAGMAs do SQLite em cada nova conexão do pool.
+
+    WAL deixa leitores e um escritor trabalharem ao mesmo tempo, e o
+    busy_timeout faz um escritor esperar a vez em vez de falhar com
+    "database is locked" quando vários workers do gunicorn escrevem juntos.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(config, engine.url)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value is not None:
+                cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def dispose_after_fork(app):
+    """Descarta, num processo filho, os pools de conexão herdados do pai.
+
+    Com ``preload_app`` o gunicorn cria o app no master e faz fork dos
+    workers: uma conexão aberta antes do fork seria compartilhada por vários
+    processos. ``dispose(close=False)`` troca o pool sem fechar as conexões
+    do pai, que continuam dele.
+    """
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            engine.dispose(close=False)
+    router = app.extensions.get('replicas')
+    for replica in router.replicas if router else ():
+        replica.engine.dispose(close=False)
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Categoria, Dispositivo
+from pagination import apply_dispositivo_filters
+
+EXPORT_FIELDS = ('id', 'nome', 'serial', 'status', 'categoria_id', 'created_at', 'updated_at', 'categoria_nome')
+
+# Tamanho aproximado de cada pedaço enviado ao cliente
+_FLUSH_BYTES = 64 * 1024
+
+
+def export_query(filter_status=None, filter_categoria=None, search_term=None):
+    """SELECT só de colunas (sem hidratar objetos ORM) com os mesmos filtros da listagem."""
+    stmt = (
+        select(
+            Dispositivo.id,
+            Dispositivo.nome,
+            Dispositivo.serial,
+            Dispositivo.status,
+            Dispositivo.categoria_id,
+            Dispositivo.created_at,
+            Dispositivo.updated_at,
+            Categoria.nome.label('categoria_nome'),
+        )
+        .outerjoin(Categoria, Categoria.id == Dispositivo.categoria_id)
+        .order_by(Dispositivo.id)
+    )
+    return apply_dispositivo_filters(stmt, filter_status, filter_categoria, search_term)
+
+
+def _iter_rows(stmt, batch_size):
+    # stream_results usa cursor do lado do servidor onde o driver suporta (Postgres);
+    # yield_per busca e entrega as linhas em lotes, mantendo a memória constante.
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    for row in result:
+        yield row._asdict()
+
+
+def _to_ndjson(rows):
+    for row in rows:
+        for key in ('created_at', 'updated_at'):
+            if row[key] is not None:
+                row[key] = row[key].isoformat()
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _buffered(chunks):
+    pending, size = [], 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= _FLUSH_BYTES:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> cabeçalho gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def generate_export(stmt, fmt, gzip=False, batch_size=1000):
+    """Gera o corpo da exportação em pedaços de bytes, sem materializar a consulta."""
+    rows = _iter_rows(stmt, batch_size)
+    chunks = _buffered(_to_ndjson(rows) if fmt == 'ndjson' else _to_csv(rows))
+    return _gzipped(chunks) if gzip else chunks
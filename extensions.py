@@ -1,7 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
+from replicas import RoutingSession
+from tokens import CachingJWTManager, is_token_revoked
 
-db = SQLAlchemy()
-migrate = Migrate()
-jwt = JWTManager()
+# RoutingSession manda as leituras das rotas @read_replica às réplicas, se houver
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+jwt = CachingJWTManager()
+
+
+def init_migrate(app):
+    """Registra o Flask-Migrate e o grupo ``flask db``.
+
+    Só é chamado nos comandos de CLI: importar Flask-Migrate traz o Alembic
+    junto (~0,2s), que os workers do gunicorn nunca usam.
+    """
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+
+@jwt.token_in_blocklist_loader
+def token_in_blocklist(jwt_header, jwt_payload):
+    # Consulta só a blocklist em memória (ou o store compartilhado), nunca o banco
+    return is_token_revoked(jwt_payload)
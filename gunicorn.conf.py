@@ -0,0 +1,50 @@
+"""Configuração do gunicorn (gunicorn -c gunicorn.conf.py 'app:create_app()').
+
+Com ``preload_app`` o app é importado e criado uma vez no master e os
+workers nascem por fork já prontos: o start de cada worker não paga imports
+nem create_app, e as páginas de memória do código ficam compartilhadas.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Estado que, com esses valores, fica na memória de cada worker: com mais de um
+# worker o efeito (logout, limite, replay da Idempotency-Key) vale só no processo
+# que atendeu. Os padrões do Config são compartilhados (sqlite/database)
+PER_PROCESS_SETTINGS = (
+    ("JWT_BLOCKLIST_TYPE", "memory"),
+    ("RATELIMIT_STORAGE", "memory"),
+    ("IDEMPOTENCY_STORE", "memory"),
+)
+
+
+def on_starting(server):
+    if server.cfg.workers <= 1:
+        return
+    from config import Config
+
+    for name, value in PER_PROCESS_SETTINGS:
+        if getattr(Config, name, None) == value:
+            server.log.warning("%s=%s com %s workers: o estado fica separado em cada worker",
+                               name, value, server.cfg.workers)
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        # sem preload o worker cria o próprio app depois do fork
+        return
+    from database import dispose_after_fork
+
+    dispose_after_fork(worker.app.wsgi())
+
+
+def post_worker_init(worker):
+    # threads de tarefas em segundo plano (jobs.py) sobem em cada worker, depois do fork
+    from jobs import job_runner
+
+    app = worker.wsgi
+    if app.config.get('JOBS_WORKERS'):
+        job_runner.start(app)
@@ -0,0 +1,197 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import ChaveIdempotencia
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+StoredResponse = namedtuple('StoredResponse', 'request_hash status_code body mimetype')
+
+
+class DatabaseIdempotencyStore:
+    """Respostas guardadas na tabela chave_idempotencia, visíveis a todos os workers.
+
+    A chave primária garante que só uma requisição reserva cada chave: quem
+    chega depois recebe o registro existente (em andamento ou concluído).
+    Enquanto a requisição roda, ``expires_at`` é só o lease curto passado ao
+    ``begin``; ``complete`` estende para o TTL de replay. Assim a chave de um
+    worker que morreu no meio volta a ficar livre quando o lease vence.
+    """
+
+    name = 'database'
+
+    def __init__(self, purge_interval=60):
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+
+    def begin(self, key, request_hash, lease):
+        """Reserva ``key`` por ``lease`` segundos. Devolve None se reservou, ou o StoredResponse já existente."""
+        now = datetime.utcnow()
+        self._purge_expired(now)
+        expires_at = now + timedelta(seconds=lease)
+
+        db.session.add(ChaveIdempotencia(chave=key, request_hash=request_hash, expires_at=expires_at))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        # Registro vencido ainda não removido (resposta antiga ou lease de uma
+        # requisição que nunca terminou): reaproveita, com UPDATE condicional
+        # para que só um dos retries simultâneos fique com ele
+        reclaimed = db.session.execute(
+            update(ChaveIdempotencia)
+            .where(ChaveIdempotencia.chave == key, ChaveIdempotencia.expires_at <= now)
+            .values(request_hash=request_hash, status_code=None, body=None, mimetype=None,
+                    created_at=now, expires_at=expires_at)
+        )
+        db.session.commit()
+        if reclaimed.rowcount:
+            return None
+
+        record = db.session.get(ChaveIdempotencia, key)
+        if record is None:
+            # liberada entre o INSERT e a leitura (a primeira requisição falhou): tenta de novo
+            return self.begin(key, request_hash, lease)
+        return StoredResponse(record.request_hash, record.status_code, record.body, record.mimetype)
+
+    def complete(self, key, status_code, body, mimetype, ttl):
+        db.session.rollback()  # descarta o que a view deixou pendente sem commit
+        db.session.execute(
+            update(ChaveIdempotencia).where(ChaveIdempotencia.chave == key)
+            .values(status_code=status_code, body=body, mimetype=mimetype,
+                    expires_at=datetime.utcnow() + timedelta(seconds=ttl))
+        )
+        db.session.commit()
+
+    def release(self, key):
+        db.session.rollback()
+        db.session.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.chave == key))
+        db.session.commit()
+
+    def _purge_expired(self, now):
+        if time.monotonic() - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = time.monotonic()
+        db.session.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.expires_at <= now))
+        db.session.commit()
+
+
+class MemoryIdempotencyStore:
+    """Respostas guardadas na memória do processo (um worker só, ou testes)."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key, request_hash, lease):
+        now = time.time()
+        with self._lock:
+            for stale in [k for k, (_, expires_at) in self._data.items() if expires_at <= now]:
+                del self._data[stale]
+            item = self._data.get(key)
+            if item is not None:
+                return item[0]
+            self._data[key] = (StoredResponse(request_hash, None, None, None), now + lease)
+            return None
+
+    def complete(self, key, status_code, body, mimetype, ttl):
+        with self._lock:
+            if key not in self._data:
+                return
+            stored, _ = self._data[key]
+            self._data[key] = (stored._replace(status_code=status_code, body=body, mimetype=mimetype),
+                               time.time() + ttl)
+
+    def release(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def create_idempotency_store(config):
+    store_type = config.get('IDEMPOTENCY_STORE', 'database')
+    if store_type == 'database':
+        return DatabaseIdempotencyStore()
+    if store_type == 'memory':
+        return MemoryIdempotencyStore()
+    raise ValueError(f"IDEMPOTENCY_STORE desconhecido: {store_type!r}")
+
+
+class Idempotency:
+    def init_app(self, app):
+        app.config.setdefault('IDEMPOTENCY_STORE', 'database')
+        app.config.setdefault('IDEMPOTENCY_TTL', 24 * 3600)
+        app.config.setdefault('IDEMPOTENCY_LEASE_SECONDS', 30)
+        app.extensions['idempotency'] = create_idempotency_store(app.config)
+
+
+def _scope_key(key):
+    # a mesma Idempotency-Key de usuários ou rotas diferentes não colide
+    raw = f'{get_jwt_identity()}\n{request.method}\n{request.path}\n{key}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def idempotent(view):
+    """Guarda a primeira resposta de requisições com ``Idempotency-Key`` e a repete nos retries.
+
+    Retry com o mesmo corpo recebe a resposta original (inclusive 4xx), com o
+    header ``Idempotent-Replayed: true``, sem executar a view de novo. Corpo
+    diferente com a mesma chave dá 422; retry enquanto a primeira ainda roda
+    dá 409, até IDEMPOTENCY_LEASE_SECONDS; passado esse tempo sem resposta
+    (worker que morreu no meio) o retry executa de novo. Respostas 5xx e
+    exceções liberam a chave para nova tentativa.
+    Deve vir depois de ``jwt_required``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"msg": f"{HEADER} deve ter entre 1 e {MAX_KEY_LENGTH} caracteres."}), 400
+
+        store = current_app.extensions['idempotency']
+        scope = _scope_key(key)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        stored = store.begin(scope, request_hash, current_app.config['IDEMPOTENCY_LEASE_SECONDS'])
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                return jsonify({"msg": f"{HEADER} já usada com outro corpo de requisição."}), 422
+            if stored.status_code is None:
+                return jsonify({"msg": "Requisição com esta Idempotency-Key ainda em processamento."}), \
+                    409, {"Retry-After": "1"}
+            response = current_app.response_class(stored.body, status=stored.status_code,
+                                                  mimetype=stored.mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except BaseException:
+            store.release(scope)
+            raise
+        if response.status_code >= 500:
+            store.release(scope)
+        else:
+            store.complete(scope, response.status_code, response.get_data(as_text=True), response.mimetype,
+                           current_app.config['IDEMPOTENCY_TTL'])
+        return response
+    return wrapper
+
+
+idempotency = Idempotency()
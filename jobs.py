@@ -0,0 +1,336 @@
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from marshmallow import ValidationError
+from sqlalchemy import func, or_, select, update
+
+from batch import BatchSelection, batch_update
+from extensions import db
+from models import Categoria, Dispositivo, Tarefa
+from schemas import reatribuicao_categoria_schema
+from search import rebuild_index
+from stats import rebuild_stats
+
+logger = logging.getLogger(__name__)
+
+PENDENTE, EXECUTANDO, CONCLUIDA, FALHOU = 'pendente', 'executando', 'concluida', 'falhou'
+
+
+# ---------- TIPOS DE TAREFA ----------
+# Cada tipo executa em partes: ``step`` processa uma parte a partir do
+# checkpoint, sem commit, e devolve (novo checkpoint, itens processados,
+# terminou?). O runner grava o checkpoint e o progresso na mesma transação
+# da parte, então uma parte nunca é aplicada duas vezes. Enquanto a parte
+# executa, uma thread renova o heartbeat (ver ``_keep_lease``).
+
+class ReatribuirCategoria:
+    """Move os dispositivos de uma categoria (ou sem categoria) para outra, em lotes por id."""
+
+    name = 'reatribuir_categoria'
+
+    def validate(self, params):
+        params = reatribuicao_categoria_schema.load(params)
+        for field in ('categoria_origem_id', 'categoria_destino_id'):
+            if params[field] is not None and db.session.get(Categoria, params[field]) is None:
+                raise ValidationError({field: ["Categoria não encontrada."]})
+        return params
+
+    def _where(self, params):
+        origem = params['categoria_origem_id']
+        criteria = [Dispositivo.categoria_id.is_(None) if origem is None else Dispositivo.categoria_id == origem]
+        if params.get('status'):
+            criteria.append(Dispositivo.status == params['status'])
+        return criteria
+
+    def count(self, params):
+        return db.session.execute(select(func.count()).select_from(Dispositivo).where(*self._where(params))).scalar()
+
+    def step(self, params, checkpoint, chunk_size):
+        last_id = checkpoint or 0
+        ids = db.session.execute(
+            select(Dispositivo.id).where(*self._where(params), Dispositivo.id > last_id)
+            .order_by(Dispositivo.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return last_id, 0, True
+        # mesmo caminho do PATCH /dispositivos/batch: estatísticas, cache e log de alterações
+        batch_update(BatchSelection(ids=ids), {'categoria_id': params['categoria_destino_id']})
+        return ids[-1], len(ids), len(ids) < chunk_size
+
+
+class RecalcularEstatisticas:
+    """Reconcilia as tabelas de estatística (o mesmo que ``flask stats rebuild``).
+
+    Uma parte só: o GROUP BY precisa ver a tabela inteira de uma vez para não
+    se misturar com os deltas das escritas concorrentes.
+    """
+
+    name = 'recalcular_estatisticas'
+
+    def validate(self, params):
+        return {}
+
+    def count(self, params):
+        return 1
+
+    def step(self, params, checkpoint, chunk_size):
+        rebuild_stats(db.session, commit=False)
+        return None, 1, True
+
+
+class ReindexarBusca:
+    """Reconstroi o índice de busca textual (FTS5 no SQLite; no Postgres o índice é mantido pelo banco).
+
+    Uma parte só: o 'rebuild' do FTS5 troca o índice inteiro na transação, sem
+    deixar a busca com resultados parciais no meio.
+    """
+
+    name = 'reindexar_busca'
+
+    def validate(self, params):
+        return {}
+
+    def count(self, params):
+        return 1
+
+    def step(self, params, checkpoint, chunk_size):
+        rebuild_index(commit=False)
+        return None, 1, True
+
+
+JOB_TYPES = {job.name: job for job in (ReatribuirCategoria(), RecalcularEstatisticas(), ReindexarBusca())}
+
+
+def submit(tipo, params, user_id=None):
+    """Valida os parâmetros e grava a tarefa como pendente. Levanta ValidationError."""
+    job_type = JOB_TYPES.get(tipo)
+    if job_type is None:
+        raise ValidationError({'tipo': [f"Tipo desconhecido. Use um de: {', '.join(sorted(JOB_TYPES))}."]})
+    tarefa = Tarefa(tipo=tipo, status=PENDENTE, params=job_type.validate(params), user_id=user_id)
+    db.session.add(tarefa)
+    db.session.commit()
+    state = current_app.extensions.get('jobs')
+    if state is not None:
+        state.wake.set()
+    return tarefa
+
+
+def job_to_dict(tarefa):
+    percentual = None
+    if tarefa.total:
+        percentual = round(min(tarefa.processados / tarefa.total, 1.0) * 100, 1)
+    elif tarefa.status == CONCLUIDA:
+        percentual = 100.0
+    return {
+        'id': tarefa.id,
+        'tipo': tarefa.tipo,
+        'status': tarefa.status,
+        'params': tarefa.params,
+        'progresso': {'processados': tarefa.processados, 'total': tarefa.total, 'percentual': percentual},
+        'resultado': tarefa.resultado,
+        'erro': tarefa.erro,
+        'created_at': tarefa.created_at,
+        'started_at': tarefa.started_at,
+        'finished_at': tarefa.finished_at,
+    }
+
+
+# ---------- EXECUÇÃO ----------
+
+def _claim(executor, lease):
+    """Pega a próxima tarefa pendente ou abandonada (lease vencido) com um UPDATE condicional.
+
+    Vários processos podem disputar a mesma tarefa: só quem tiver o UPDATE
+    com rowcount 1 fica com ela.
+    """
+    now = datetime.utcnow()
+    available = or_(Tarefa.status == PENDENTE,
+                    (Tarefa.status == EXECUTANDO) & (Tarefa.heartbeat_at < now - timedelta(seconds=lease)))
+    candidates = db.session.execute(select(Tarefa.id).where(available).order_by(Tarefa.id).limit(5)).scalars().all()
+    for tarefa_id in candidates:
+        claimed = db.session.execute(
+            update(Tarefa).where(Tarefa.id == tarefa_id, available)
+            .values(status=EXECUTANDO, executor=executor, heartbeat_at=now,
+                    started_at=func.coalesce(Tarefa.started_at, now))
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return tarefa_id
+    db.session.rollback()
+    return None
+
+
+def _save(tarefa_id, executor, **values):
+    """Grava o estado da tarefa só se ela ainda for deste executor; devolve False se perdeu o lease."""
+    result = db.session.execute(
+        update(Tarefa).where(Tarefa.id == tarefa_id, Tarefa.executor == executor, Tarefa.status == EXECUTANDO)
+        .values(heartbeat_at=datetime.utcnow(), **values)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        return False
+    db.session.commit()
+    return True
+
+
+@contextmanager
+def _keep_lease(tarefa_id, executor, interval):
+    """Renova o heartbeat da tarefa, numa thread e conexão próprias, enquanto uma parte executa.
+
+    Sem isso uma parte mais longa que JOBS_LEASE_SECONDS (ex.: recalcular as
+    estatísticas de uma tabela grande) seria retomada por outro executor no meio.
+    """
+    engine = db.engine
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(interval):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        update(Tarefa).where(Tarefa.id == tarefa_id, Tarefa.executor == executor,
+                                             Tarefa.status == EXECUTANDO)
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+            except Exception:
+                logger.exception('Falha ao renovar o lease da tarefa %s', tarefa_id)
+
+    thread = threading.Thread(target=renew, name=f'job-lease-{tarefa_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(tarefa_id, executor, chunk_size, lease=60):
+    """Executa a tarefa parte a parte a partir do checkpoint gravado."""
+    tarefa = db.session.get(Tarefa, tarefa_id)
+    job_type = JOB_TYPES[tarefa.tipo]
+    params, checkpoint, processados = tarefa.params, tarefa.checkpoint, tarefa.processados
+    try:
+        if tarefa.total is None and not _save(tarefa_id, executor, total=job_type.count(params)):
+            return
+        while True:
+            with _keep_lease(tarefa_id, executor, lease / 3):
+                checkpoint, count, done = job_type.step(params, checkpoint, chunk_size)
+            processados += count
+            values = {'checkpoint': checkpoint, 'processados': processados}
+            if done:
+                values.update(status=CONCLUIDA, finished_at=datetime.utcnow(), resultado={'processados': processados})
+            if not _save(tarefa_id, executor, **values) or done:
+                return
+    except Exception as exc:
+        logger.exception('Tarefa %s falhou', tarefa_id)
+        db.session.rollback()
+        _save(tarefa_id, executor, status=FALHOU, erro=str(exc), finished_at=datetime.utcnow())
+
+
+def run_pending(app, executor=None):
+    """Executa no processo atual todas as tarefas disponíveis e volta. Devolve quantas rodou."""
+    executor = executor or _executor_id()
+    config = app.config
+    count = 0
+    while True:
+        with app.app_context():
+            tarefa_id = _claim(executor, config['JOBS_LEASE_SECONDS'])
+            if tarefa_id is None:
+                return count
+            run_job(tarefa_id, executor, config['JOBS_CHUNK_SIZE'], config['JOBS_LEASE_SECONDS'])
+            count += 1
+
+
+def _executor_id():
+    return f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+
+class _JobsState:
+    def __init__(self):
+        self.wake = threading.Event()
+        self.pid = None
+        self.threads = []
+        self.lock = threading.Lock()
+
+
+class JobRunner:
+    """Pool de threads, por processo, que executa as tarefas da tabela ``tarefa``.
+
+    Sem broker: cada thread pega tarefas com um UPDATE condicional (ver
+    ``_claim``), então vários workers do gunicorn dividem a fila. Tarefas de
+    um processo que morreu ficam com o heartbeat parado e são retomadas do
+    checkpoint depois de JOBS_LEASE_SECONDS. As threads sobem na primeira
+    requisição do processo (ou no post_worker_init do gunicorn), nunca no
+    master antes do fork.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_WORKERS', 1)
+        app.config.setdefault('JOBS_CHUNK_SIZE', 500)
+        app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+        app.config.setdefault('JOBS_LEASE_SECONDS', 60)
+        state = app.extensions['jobs'] = _JobsState()
+        app.cli.add_command(jobs_cli)
+        if not app.config['JOBS_WORKERS']:
+            return
+
+        @app.before_request
+        def _start_job_workers():
+            if state.pid != os.getpid():
+                self.start(app)
+
+    def start(self, app, workers=None):
+        """Sobe as threads de execução neste processo (uma vez por pid)."""
+        state = app.extensions['jobs']
+        with state.lock:
+            if state.pid == os.getpid():
+                return
+            state.pid = os.getpid()
+            state.threads = [
+                threading.Thread(target=self._loop, args=(app, state), name=f'job-worker-{n}', daemon=True)
+                for n in range(workers or app.config['JOBS_WORKERS'])
+            ]
+            for thread in state.threads:
+                thread.start()
+
+    def _loop(self, app, state):
+        executor = _executor_id()
+        while True:
+            try:
+                if not run_pending(app, executor):
+                    state.wake.wait(app.config['JOBS_POLL_INTERVAL'])
+                    state.wake.clear()
+            except Exception:
+                # banco fora do ar etc.: tenta de novo no próximo ciclo
+                logger.exception('Erro no worker de tarefas')
+                state.wake.wait(app.config['JOBS_POLL_INTERVAL'])
+
+
+job_runner = JobRunner()
+
+
+# ---------- CLI ----------
+
+jobs_cli = AppGroup('jobs', help='Tarefas em segundo plano.')
+
+
+@jobs_cli.command('work')
+@click.option('--workers', type=int, default=None, help='Threads de execução (padrão: JOBS_WORKERS).')
+@click.option('--once', is_flag=True, help='Executa as tarefas pendentes e sai.')
+@with_appcontext
+def work_command(workers, once):
+    """Processo dedicado a executar tarefas (com JOBS_WORKERS=0 nos workers HTTP)."""
+    app = current_app._get_current_object()
+    if once:
+        click.echo(f'{run_pending(app)} tarefas executadas.')
+        return
+    job_runner.start(app, workers or app.config['JOBS_WORKERS'] or 1)
+    for thread in app.extensions['jobs'].threads:
+        thread.join()
@@ -0,0 +1,214 @@
+import bisect
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Limites (em segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites dos buckets de comandos SQL por requisição
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    """Medições de uma requisição amostrada (guardada em ``g``)."""
+
+    __slots__ = ('started', 'sql_count', 'sql_time', 'json_time', 'validation_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.json_time = 0.0
+        self.validation_time = 0.0
+
+
+def _current():
+    return g.get('_request_metrics') if has_request_context() else None
+
+
+@contextmanager
+def timed(kind):
+    """Soma o tempo do bloco em ``<kind>_time`` da requisição atual, se amostrada."""
+    metrics = _current()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, f'{kind}_time', getattr(metrics, f'{kind}_time') + time.perf_counter() - started)
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)                  # (endpoint, method, status) -> n
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self.db_time = defaultdict(float)
+        self.json_time = defaultdict(float)
+        self.validation_time = defaultdict(float)
+
+    def record(self, endpoint, method, status, metrics):
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            if metrics is None:
+                return
+            key = (endpoint, method)
+            self.latency[key].observe(time.perf_counter() - metrics.started)
+            self.statements[key].observe(metrics.sql_count)
+            self.db_time[key] += metrics.sql_time
+            self.json_time[key] += metrics.json_time
+            self.validation_time[key] += metrics.validation_time
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histograms):
+    lines = [f'# TYPE {name} histogram']
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(endpoint=endpoint, method=method)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint=endpoint, method=method)} {cumulative}')
+    return lines
+
+
+def _counter_lines(name, values):
+    lines = [f'# TYPE {name} counter']
+    for (endpoint, method), value in sorted(values.items()):
+        lines.append(f'{name}{_labels(endpoint=endpoint, method=method)} {value:.6f}')
+    return lines
+
+
+class Metrics:
+    """Instrumentação por requisição: latência, SQL, serialização JSON e validação.
+
+    Só uma fração ``METRICS_SAMPLE_RATE`` das requisições é medida em detalhe;
+    as demais só incrementam o contador de requisições. Os valores ficam na
+    memória do processo: com vários workers, cada um expõe o seu /metrics.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SAMPLE_RATE', 1.0)
+        app.config.setdefault('METRICS_SERVER_TIMING', True)
+        registry = app.extensions['metrics'] = _Registry()
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        sample_rate = app.config['METRICS_SAMPLE_RATE']
+        server_timing = app.config['METRICS_SERVER_TIMING']
+
+        @app.before_request
+        def _start_request_metrics():
+            if sample_rate >= 1 or random.random() < sample_rate:
+                g._request_metrics = RequestMetrics()
+
+        @app.after_request
+        def _finish_request_metrics(response):
+            metrics = g.pop('_request_metrics', None)
+            registry.record(request.endpoint or '<unmatched>', request.method, response.status_code, metrics)
+            if metrics is not None and server_timing:
+                response.headers['Server-Timing'] = _server_timing(metrics)
+            return response
+
+        # JSON: mede o dumps do provider da aplicação (jsonify e o cache de respostas usam ele)
+        dumps = app.json.dumps
+
+        def timed_dumps(obj, **kwargs):
+            with timed('json'):
+                return dumps(obj, **kwargs)
+
+        app.json.dumps = timed_dumps
+
+        with app.app_context():
+            from extensions import db
+            for engine in db.engines.values():
+                instrument_engine(engine)
+        # réplicas de leitura (replicas.py) têm engines próprios, fora de db.engines
+        router = app.extensions.get('replicas')
+        for replica in router.replicas if router else ():
+            instrument_engine(replica.engine)
+
+    def render(self):
+        registry = current_app.extensions['metrics']
+        with registry.lock:
+            lines = ['# TYPE http_requests_total counter']
+            for (endpoint, method, status), value in sorted(registry.requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {value}')
+            lines += _histogram_lines('http_request_duration_seconds', registry.latency)
+            lines += _histogram_lines('db_statements_per_request', registry.statements)
+            lines += _counter_lines('db_time_seconds_total', registry.db_time)
+            lines += _counter_lines('json_serialization_seconds_total', registry.json_time)
+            lines += _counter_lines('validation_seconds_total', registry.validation_time)
+        lines += ['# TYPE metrics_sample_rate gauge',
+                  f"metrics_sample_rate {current_app.config['METRICS_SAMPLE_RATE']}"]
+        return '\n'.join(lines) + '\n'
+
+
+def _server_timing(metrics):
+    total = (time.perf_counter() - metrics.started) * 1000
+    return (f'app;dur={total:.2f}, '
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.sql_count} queries", '
+            f'json;dur={metrics.json_time * 1000:.2f}, '
+            f'validation;dur={metrics.validation_time * 1000:.2f}')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # O início fica no contexto de execução do próprio comando: um comando que
+    # falha não deixa nada para trás que atrapalhe a medição do próximo
+    if context is not None and _current() is not None:
+        context._metrics_t0 = time.perf_counter()
+
+
+def _finish(context):
+    started = getattr(context, '_metrics_t0', None)
+    metrics = _current()
+    if started is None or metrics is None:
+        return
+    del context._metrics_t0
+    metrics.sql_time += time.perf_counter() - started
+    metrics.sql_count += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish(context)
+
+
+def _handle_error(exception_context):
+    # comando com erro também gastou tempo de banco
+    if exception_context.execution_context is not None:
+        _finish(exception_context.execution_context)
+
+
+def instrument_engine(engine):
+    """Conta comandos SQL e soma o tempo de banco da requisição atual."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+metrics = Metrics()
@@ -0,0 +1,68 @@
+"""Roda ``flask db upgrade`` só quando o banco não está na revisão head.
+
+O ``flask db upgrade`` carrega o app inteiro e o Alembic mesmo quando não há
+nada a fazer, e o container roda isso a cada start. Aqui a revisão atual é
+lida direto da tabela ``alembic_version`` e as heads vêm dos arquivos de
+``migrations/versions``, sem importar Flask nem Alembic.
+
+    python migrate_if_needed.py && gunicorn -c gunicorn.conf.py 'app:create_app()'
+"""
+import ast
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+VERSIONS_DIR = os.path.join(BASE_DIR, 'migrations', 'versions')
+
+
+def _revision_ids(value):
+    if value is None:
+        return ()
+    return (value,) if isinstance(value, str) else tuple(value)
+
+
+def head_revisions(versions_dir=VERSIONS_DIR):
+    """Revisões que nenhuma outra migração tem como ``down_revision``."""
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, name), encoding='utf-8') as fh:
+            tree = ast.parse(fh.read(), name)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                if node.targets[0].id == 'revision':
+                    revisions.add(ast.literal_eval(node.value))
+                elif node.targets[0].id == 'down_revision':
+                    parents.update(_revision_ids(ast.literal_eval(node.value)))
+    return revisions - parents
+
+
+def current_revisions(database_url):
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            if not inspect(connection).has_table('alembic_version'):
+                return set()
+            return set(connection.execute(text('SELECT version_num FROM alembic_version')).scalars())
+    finally:
+        engine.dispose()
+
+
+def main():
+    from config import Config
+
+    heads = head_revisions()
+    current = current_revisions(Config.SQLALCHEMY_DATABASE_URI)
+    if current == heads:
+        print(f"Banco já na revisão head ({', '.join(sorted(heads))}); upgrade pulado.")
+        return 0
+    print(f"Banco em {', '.join(sorted(current)) or '(vazio)'}; aplicando migrações até {', '.join(sorted(heads))}.")
+    return subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'upgrade'], cwd=BASE_DIR).returncode
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -90,9 +90,15 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # tabelas do índice FTS5 (dispositivo_fts e suas tabelas internas) são
+    # gerenciadas por SQL próprio, fora dos models
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == "table" and name.startswith("dispositivo_fts"))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
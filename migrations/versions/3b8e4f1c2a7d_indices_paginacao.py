@@ -0,0 +1,34 @@
+"""Indices para paginacao por cursor
+
+Revision ID: 3b8e4f1c2a7d
+Revises: 9df6d7020706
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e4f1c2a7d'
+down_revision = '9df6d7020706'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('dispositivo', schema=None) as batch_op:
+        batch_op.create_index('ix_dispositivo_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_dispositivo_categoria_id_id', ['categoria_id', 'id'], unique=False)
+        batch_op.create_index('ix_dispositivo_nome_id', ['nome', 'id'], unique=False)
+        batch_op.create_index('ix_dispositivo_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_dispositivo_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('dispositivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_dispositivo_updated_at_id')
+        batch_op.drop_index('ix_dispositivo_created_at_id')
+        batch_op.drop_index('ix_dispositivo_nome_id')
+        batch_op.drop_index('ix_dispositivo_categoria_id_id')
+        batch_op.drop_index('ix_dispositivo_status_id')
@@ -0,0 +1,48 @@
+"""Indice de busca textual (FTS5 / tsvector)
+
+Revision ID: 7c1d2e9a4f60
+Revises: 3b8e4f1c2a7d
+Create Date: 2026-10-18 10:02:13.504117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# mesma DDL do create_all: uma definição só para o índice
+from search import FTS_TABLE, POSTGRES_DDL, SQLITE_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d2e9a4f60'
+down_revision = '3b8e4f1c2a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        # Popula o índice com os dispositivos já existentes
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        # Índices de expressão já são construídos com as linhas existentes
+        for statement in POSTGRES_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS dispositivo_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS dispositivo_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS dispositivo_fts_ai")
+        op.execute("DROP TABLE IF EXISTS dispositivo_fts")
+
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_dispositivo_serial_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_dispositivo_busca_tsv")
@@ -0,0 +1,32 @@
+"""Aumenta user.password_hash para 255 (hash scrypt)
+
+Revision ID: a41f0c6d9b23
+Revises: 7c1d2e9a4f60
+Create Date: 2026-10-18 11:20:47.301955
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f0c6d9b23'
+down_revision = '7c1d2e9a4f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=False)
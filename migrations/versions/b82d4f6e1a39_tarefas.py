@@ -0,0 +1,49 @@
+"""Tarefas em segundo plano
+
+Revision ID: b82d4f6e1a39
+Revises: f1a6c3e8b957
+Create Date: 2026-10-18 18:41:09.532117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b82d4f6e1a39'
+down_revision = 'f1a6c3e8b957'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tarefa',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('checkpoint', sa.JSON(), nullable=True),
+    sa.Column('processados', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('executor', sa.String(length=64), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tarefa', schema=None) as batch_op:
+        batch_op.create_index('ix_tarefa_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_tarefa_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tarefa', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tarefa_user_id'))
+        batch_op.drop_index('ix_tarefa_status_id')
+
+    op.drop_table('tarefa')
@@ -0,0 +1,47 @@
+"""Tabelas de estatisticas de dispositivos
+
+Revision ID: c5e2a8d71f04
+Revises: a41f0c6d9b23
+Create Date: 2026-10-18 12:05:33.870412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e2a8d71f04'
+down_revision = 'a41f0c6d9b23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('estatistica_dispositivo',
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status', 'categoria_id')
+    )
+    op.create_table('estatistica_criacao_diaria',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia')
+    )
+
+    # Carga inicial (mesma consulta do "flask stats rebuild")
+    op.execute("""
+        INSERT INTO estatistica_dispositivo (status, categoria_id, total)
+        SELECT status, COALESCE(categoria_id, 0), COUNT(*)
+        FROM dispositivo GROUP BY status, COALESCE(categoria_id, 0)
+    """)
+    op.execute("""
+        INSERT INTO estatistica_criacao_diaria (dia, total)
+        SELECT date(created_at), COUNT(*)
+        FROM dispositivo WHERE created_at IS NOT NULL GROUP BY date(created_at)
+    """)
+
+
+def downgrade():
+    op.drop_table('estatistica_criacao_diaria')
+    op.drop_table('estatistica_dispositivo')
@@ -0,0 +1,38 @@
+"""Tabela de chaves de idempotencia
+
+Revision ID: e7b3d9a0c152
+Revises: c5e2a8d71f04
+Create Date: 2026-10-18 14:20:11.502318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d9a0c152'
+down_revision = 'c5e2a8d71f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chave_idempotencia',
+    sa.Column('chave', sa.String(length=64), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('mimetype', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('chave')
+    )
+    with op.batch_alter_table('chave_idempotencia', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_chave_idempotencia_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('chave_idempotencia', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_chave_idempotencia_expires_at'))
+
+    op.drop_table('chave_idempotencia')
@@ -0,0 +1,36 @@
+"""Log de alteracoes para o feed de sincronizacao
+
+Revision ID: f1a6c3e8b957
+Revises: e7b3d9a0c152
+Create Date: 2026-10-18 16:02:47.118903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6c3e8b957'
+down_revision = 'e7b3d9a0c152'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('alteracao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entidade', sa.String(length=20), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('alteracao', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_alteracao_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alteracao', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_alteracao_created_at'))
+
+    op.drop_table('alteracao')
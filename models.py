@@ -1,18 +1,22 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from extensions import db 
+from passwords import password_hasher
 
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # scrypt com salt de 16 gera ~160 caracteres
+    password_hash = db.Column(db.String(255), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
 
 class Categoria(db.Model):
@@ -22,7 +26,9 @@ class Categoria(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    dispositivos = db.relationship("Dispositivo", backref="categoria", lazy='dynamic')
+    # O lado Dispositivo.categoria é carregado via JOIN junto com o dispositivo,
+    # evitando um SELECT extra por item na serialização (N+1).
+    dispositivos = db.relationship("Dispositivo", backref=db.backref("categoria", lazy='joined'), lazy='dynamic')
 
     def to_dict(self):
         return {
@@ -35,6 +41,15 @@ class Categoria(db.Model):
 
 
 class Dispositivo(db.Model):
+    # Índices compostos (coluna, id) usados pela paginação por cursor e pelos filtros
+    __table_args__ = (
+        db.Index('ix_dispositivo_status_id', 'status', 'id'),
+        db.Index('ix_dispositivo_categoria_id_id', 'categoria_id', 'id'),
+        db.Index('ix_dispositivo_nome_id', 'nome', 'id'),
+        db.Index('ix_dispositivo_created_at_id', 'created_at', 'id'),
+        db.Index('ix_dispositivo_updated_at_id', 'updated_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(140), nullable=False)
     serial = db.Column(db.String(140), unique=True, nullable=False)
@@ -53,4 +68,84 @@ class Dispositivo(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'categoria_nome': self.categoria.nome if self.categoria else None 
-        }
\ No newline at end of file
+        }
+
+class EstatisticaDispositivo(db.Model):
+    """Contagem de dispositivos por (status, categoria), mantida por eventos em stats.py.
+
+    categoria_id = 0 representa "sem categoria" (NULL não serve como parte da chave).
+    """
+    __tablename__ = 'estatistica_dispositivo'
+
+    status = db.Column(db.String(10), primary_key=True)
+    categoria_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EstatisticaCriacaoDiaria(db.Model):
+    """Dispositivos criados por dia (data de created_at), mantida por eventos em stats.py."""
+    __tablename__ = 'estatistica_criacao_diaria'
+
+    dia = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ChaveIdempotencia(db.Model):
+    """Primeira resposta de uma requisição com Idempotency-Key, repetida nos retries.
+
+    ``chave`` é o SHA-256 de (usuário, método, rota, Idempotency-Key); ``status_code``
+    nulo indica que a primeira requisição ainda está em andamento.
+    """
+    __tablename__ = 'chave_idempotencia'
+
+    chave = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    body = db.Column(db.Text)
+    mimetype = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class Alteracao(db.Model):
+    """Log de alterações de dispositivos e categorias, lido por GET /dispositivos/changes.
+
+    O ``id`` crescente é o cursor do feed e segue a ordem de commit (ver changes.py).
+    Só guarda o quê mudou; o estado atual é lido da própria entidade.
+    """
+    __tablename__ = 'alteracao'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entidade = db.Column(db.String(20), nullable=False)
+    entidade_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class Tarefa(db.Model):
+    """Tarefa em segundo plano (POST /jobs), executada em partes pelos workers de jobs.py.
+
+    ``checkpoint`` guarda onde a última parte terminou, gravado na mesma
+    transação da parte: depois de um restart a tarefa continua dali.
+    ``executor``/``heartbeat_at`` formam o lease de quem está executando.
+    """
+    __tablename__ = 'tarefa'
+    __table_args__ = (
+        db.Index('ix_tarefa_status_id', 'status', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')
+    params = db.Column(db.JSON, nullable=False)
+    checkpoint = db.Column(db.JSON)
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    resultado = db.Column(db.JSON)
+    erro = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    executor = db.Column(db.String(64))
+    heartbeat_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
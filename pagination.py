@@ -0,0 +1,149 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, asc, desc
+
+from models import Dispositivo
+from search import apply_search
+
+
+# Colunas aceitas no parâmetro "sort". Qualquer outro valor cai em "id",
+# como já acontecia antes com o getattr(Dispositivo, sort, Dispositivo.id).
+SORT_COLUMNS = {
+    'id': Dispositivo.id,
+    'nome': Dispositivo.nome,
+    'serial': Dispositivo.serial,
+    'status': Dispositivo.status,
+    'categoria_id': Dispositivo.categoria_id,
+    'created_at': Dispositivo.created_at,
+    'updated_at': Dispositivo.updated_at,
+}
+
+
+# Tamanho de página quando "limit" é menor que 1 na paginação por offset
+DEFAULT_PAGE_SIZE = 20
+
+
+class InvalidCursor(ValueError):
+    """Cursor recebido não pôde ser decodificado ou não bate com a ordenação pedida."""
+
+
+def resolve_sort(sort, order):
+    sort = sort if sort in SORT_COLUMNS else 'id'
+    order = 'desc' if (order or '').lower() == 'desc' else 'asc'
+    return sort, order
+
+
+def offset_page_args(page, limit):
+    """Página e tamanho da paginação por offset, com as regras do ``paginate`` do
+    Flask-SQLAlchemy (error_out=False): página < 1 vira 1 e limite < 1 vira 20.
+    """
+    return max(page, 1), limit if limit >= 1 else DEFAULT_PAGE_SIZE
+
+
+def apply_dispositivo_filters(query, filter_status=None, filter_categoria=None, search_term=None,
+                              order_by_relevance=False, search_backend=None):
+    """Aplica os filtros de listagem (status, categoria_id, busca) a uma query/select."""
+    if filter_status in ['ativo', 'inativo']:
+        query = query.filter(Dispositivo.status == filter_status)
+
+    if filter_categoria:
+        query = query.filter(Dispositivo.categoria_id == filter_categoria)
+
+    if search_term:
+        query = apply_search(query, search_term, order_by_relevance=order_by_relevance,
+                             backend=search_backend)
+
+    return query
+
+
+def apply_sort(query, sort, order):
+    """Ordena pela coluna pedida com "id" como desempate, estável entre páginas."""
+    column = SORT_COLUMNS[sort]
+    direction = desc if order == 'desc' else asc
+
+    if sort == 'id':
+        return query.order_by(direction(Dispositivo.id))
+
+    sort_expr = direction(column)
+    if column.nullable:
+        # NULLs sempre "antes" no asc e "depois" no desc, igual em SQLite e Postgres,
+        # para que a condição do cursor seja a mesma nos dois bancos.
+        sort_expr = sort_expr.nulls_first() if order == 'asc' else sort_expr.nulls_last()
+    return query.order_by(sort_expr, direction(Dispositivo.id))
+
+
+def encode_cursor(dispositivo, sort, order):
+    value = getattr(dispositivo, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'o': order, 'v': value, 'id': dispositivo.id},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, order):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = int(payload['id'])
+        value = payload['v']
+        if payload['s'] != sort or payload['o'] != order:
+            raise InvalidCursor("Cursor gerado para outra ordenação.")
+        if value is not None and SORT_COLUMNS[sort].type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Cursor inválido.") from exc
+    return value, last_id
+
+
+def apply_cursor(query, sort, order, value, last_id):
+    """Filtra as linhas que vêm depois de (value, last_id) na ordenação escolhida.
+
+    Mantém a mesma semântica de NULLs de apply_sort: no asc eles vêm primeiro,
+    no desc vêm por último.
+    """
+    column = SORT_COLUMNS[sort]
+
+    if sort == 'id':
+        return query.filter(Dispositivo.id > last_id if order == 'asc' else Dispositivo.id < last_id)
+
+    if order == 'asc':
+        if value is None:
+            condition = or_(
+                and_(column.is_(None), Dispositivo.id > last_id),
+                column.is_not(None),
+            )
+        else:
+            condition = or_(column > value, and_(column == value, Dispositivo.id > last_id))
+    else:
+        if value is None:
+            condition = and_(column.is_(None), Dispositivo.id < last_id)
+        else:
+            condition = or_(
+                column < value,
+                and_(column == value, Dispositivo.id < last_id),
+            )
+            if column.nullable:
+                condition = or_(condition, column.is_(None))
+
+    return query.filter(condition)
+
+
+def keyset_page(query, sort, order, cursor, limit):
+    """Busca uma página por cursor: custo constante, sem OFFSET e sem COUNT.
+
+    Retorna (itens, next_cursor); next_cursor é None na última página.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, order)
+        query = apply_cursor(query, sort, order, value, last_id)
+
+    rows = apply_sort(query, sort, order).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1], sort, order) if len(rows) > limit else None
+    return items, next_cursor
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashing cheia: o chamador deve responder 503 em vez de esperar."""
+
+
+@lru_cache(maxsize=None)
+def _canonical_method(method):
+    # "scrypt" vira "scrypt:32768:8:1", "pbkdf2" vira "pbkdf2:sha256:<iterações>"...
+    # É o prefixo que o werkzeug grava no hash; calculado uma vez por método.
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+
+class PasswordHasher:
+    """Hash e verificação de senhas num pool de threads limitado.
+
+    scrypt e pbkdf2 do hashlib liberam o GIL, então o pool roda em paralelo de
+    verdade e limita quantos núcleos o login consome. Passado ``max_pending``
+    (em execução + na fila), novas chamadas falham com ``PasswordHasherBusy``
+    em vez de acumular trabalho que o cliente já vai ter desistido de esperar.
+    """
+
+    def __init__(self, method='scrypt', salt_length=16, workers=None, max_pending=None):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(method=method, salt_length=salt_length, workers=workers, max_pending=max_pending)
+
+    def init_app(self, app):
+        self.configure(
+            method=app.config['PASSWORD_HASH_METHOD'],
+            salt_length=app.config['PASSWORD_SALT_LENGTH'],
+            workers=app.config['PASSWORD_HASH_WORKERS'],
+            max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        )
+
+    def configure(self, method, salt_length, workers=None, max_pending=None):
+        workers = workers or os.cpu_count() or 1
+        with self._lock:
+            if self._executor is not None and workers != self.workers:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.method = method
+            self.salt_length = salt_length
+            self.workers = workers
+            self.max_pending = workers * 4 if max_pending is None else max_pending
+            self._slots = threading.BoundedSemaphore(max(1, self.max_pending))
+
+    def _pool(self):
+        # Criado sob demanda: com preload do gunicorn cada worker ganha o seu após o fork
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+            return self._executor
+
+    def _submit(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        try:
+            return self._pool().submit(run)
+        except BaseException:
+            slots.release()
+            raise
+
+    def _hash(self, password):
+        return generate_password_hash(password, method=self.method, salt_length=self.salt_length)
+
+    def hash(self, password):
+        return self._submit(self._hash, password).result()
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password).result()
+
+    async def hash_async(self, password):
+        return await asyncio.wrap_future(self._submit(self._hash, password))
+
+    async def verify_async(self, password_hash, password):
+        return await asyncio.wrap_future(self._submit(check_password_hash, password_hash, password))
+
+    def needs_rehash(self, password_hash):
+        """True se o hash foi gerado com método, custo ou tamanho de salt diferentes dos atuais."""
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != _canonical_method(self.method) or len(salt) != self.salt_length
+
+
+password_hasher = PasswordHasher()
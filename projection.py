@@ -0,0 +1,54 @@
+from models import Categoria, Dispositivo
+from schemas import categoria_output, dispositivo_output
+
+
+class InvalidFields(ValueError):
+    """Parâmetro "fields" pediu campos que a representação não tem."""
+
+
+# Campo da resposta -> expressão SQL. Os nomes são os mesmos dos OutputSchema.
+CATEGORIA_FIELDS = {name: getattr(Categoria, name) for name in categoria_output.fields}
+DISPOSITIVO_FIELDS = {
+    **{name: getattr(Dispositivo, name) for name in dispositivo_output.fields},
+    'categoria_nome': Categoria.nome.label('categoria_nome'),
+}
+
+
+def parse_fields(raw, allowed):
+    """Lê ``fields=a,b,c``. Devolve None (representação completa) se vazio.
+
+    Repetições são ignoradas e a ordem pedida é mantida.
+    """
+    if not raw:
+        return None
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise InvalidFields(
+            f"Campos inválidos em fields: {', '.join(unknown)}. Permitidos: {', '.join(allowed)}."
+        )
+    return fields
+
+
+def project_categorias(query, fields):
+    return query.with_entities(*(CATEGORIA_FIELDS[name] for name in fields))
+
+
+def project_dispositivos(query, fields, extra=()):
+    """SELECT só das colunas pedidas, sem hidratar Dispositivo nem o JOIN eager da categoria.
+
+    ``extra`` são campos que a paginação precisa (ordenação e id do cursor): vão
+    no fim do SELECT e ficam de fora da resposta (ver ``rows_to_dicts``).
+    """
+    names = fields + tuple(name for name in extra if name not in fields)
+    query = query.with_entities(*(DISPOSITIVO_FIELDS[name] for name in names)).select_from(Dispositivo)
+    if 'categoria_nome' in names:
+        query = query.outerjoin(Categoria, Categoria.id == Dispositivo.categoria_id)
+    return query
+
+
+def rows_to_dicts(rows, fields):
+    # zip para no fim de "fields": colunas extras do SELECT não entram
+    return [dict(zip(fields, row)) for row in rows]
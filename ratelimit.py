@@ -0,0 +1,188 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+# Custo em tokens por endpoint; o que não está aqui custa 1. Buscas e
+# exportações varrem muito mais linhas que um GET por id.
+ROUTE_COSTS = {
+    'list_dispositivos': 2,
+    'export_dispositivos': 20,
+    'bulk_create_dispositivos': 10,
+    'batch_update_dispositivos': 5,
+    'batch_delete_dispositivos': 5,
+    'dispositivos_changes_stream': 10,
+    'create_job': 10,
+}
+# Listagem com "busca" (varredura do índice de texto)
+SEARCH_COST = 5
+# Rotas sem identidade: bucket próprio por IP, mais restrito (força bruta de senha)
+AUTH_ENDPOINTS = ('login', 'register')
+EXEMPT_ENDPOINTS = ('prometheus_metrics', 'static')
+
+
+def take_tokens(state, cost, capacity, rate, now):
+    """Token bucket: repõe ``rate`` tokens/s até ``capacity`` e tenta gastar ``cost``.
+
+    ``state`` é (tokens, atualizado_em) ou None para bucket novo (cheio).
+    Devolve (permitido, novo_estado, segundos até haver tokens suficientes).
+    """
+    tokens, updated_at = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    cost = min(cost, capacity)  # custo maior que o bucket nunca passaria
+    if tokens >= cost:
+        return True, (tokens - cost, now), 0.0
+    return False, (tokens, now), (cost - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Buckets na memória do processo: cada worker do gunicorn limita sozinho."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    def take(self, key, cost, capacity, rate, now):
+        with self._lock:
+            allowed, state, retry_after = take_tokens(self._buckets.get(key), cost, capacity, rate, now)
+            self._buckets[key] = state
+            if now - self._last_purge > 60:
+                self._purge(now)
+            return allowed, retry_after
+
+    def _purge(self, now):
+        # bucket parado há tempo suficiente para encher equivale a não existir
+        # (com os limites usuais, bem menos de 1h)
+        self._last_purge = now
+        for key in [key for key, (_, updated_at) in self._buckets.items() if now - updated_at > 3600]:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Buckets num arquivo SQLite local, compartilhados entre os workers da máquina.
+
+    Cada ``take`` é uma transação ``BEGIN IMMEDIATE`` (lê, recalcula e grava
+    sob o lock de escrita), então processos concorrentes não gastam o mesmo
+    token. Uma conexão por thread e por processo (seguro após o fork).
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # estado efêmero: perder os últimos updates numa queda de energia é aceitável
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS bucket '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+            self._local.last_purge = time.time()
+        return conn
+
+    def take(self, key, cost, capacity, rate, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            state = conn.execute('SELECT tokens, updated_at FROM bucket WHERE key = ?', (key,)).fetchone()
+            allowed, (tokens, updated_at), retry_after = take_tokens(state, cost, capacity, rate, now)
+            conn.execute('INSERT INTO bucket (key, tokens, updated_at) VALUES (?, ?, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                         (key, tokens, updated_at))
+            if now - self._local.last_purge > 60:
+                self._local.last_purge = now
+                conn.execute('DELETE FROM bucket WHERE updated_at < ?', (now - 3600,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+
+def create_bucket_store(config):
+    storage = config.get('RATELIMIT_STORAGE', 'sqlite')
+    if storage == 'memory':
+        return MemoryBucketStore()
+    if storage == 'sqlite':
+        path = config.get('RATELIMIT_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'api-ratelimit.db')
+        return SQLiteBucketStore(path)
+    raise ValueError(f"RATELIMIT_STORAGE desconhecido: {storage!r}")
+
+
+def _identity():
+    """Identidade do JWT, se houver um válido; senão None (cai no limite por IP).
+
+    Sem checar a revogação: a rota verifica o token de novo com
+    ``jwt_required``, e a blocklist é consultada só ali.
+    """
+    try:
+        verify_jwt_in_request(optional=True, skip_revocation_check=True)
+    except (JWTExtendedException, PyJWTError):
+        # token inválido/expirado: a própria rota responde 401 depois
+        return None
+    return get_jwt_identity()
+
+
+def request_cost(endpoint, costs):
+    if endpoint == 'list_dispositivos' and request.args.get('busca'):
+        return max(costs.get(endpoint, 1), SEARCH_COST)
+    return costs.get(endpoint, 1)
+
+
+class RateLimiter:
+    """Limite por usuário (identidade do JWT) e por IP nas rotas de autenticação.
+
+    Cada requisição gasta ``ROUTE_COSTS[endpoint]`` tokens; sem tokens, 429
+    com ``Retry-After``.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'sqlite')
+        app.config.setdefault('RATELIMIT_CAPACITY', 120)
+        app.config.setdefault('RATELIMIT_REFILL_RATE', 20.0)
+        app.config.setdefault('RATELIMIT_AUTH_CAPACITY', 10)
+        app.config.setdefault('RATELIMIT_AUTH_REFILL_RATE', 0.2)
+        if not app.config['RATELIMIT_ENABLED']:
+            return
+
+        store = app.extensions['ratelimit'] = create_bucket_store(app.config)
+        costs = {**ROUTE_COSTS, **app.config.get('RATELIMIT_ROUTE_COSTS', {})}
+
+        @app.before_request
+        def _rate_limit():
+            endpoint = request.endpoint
+            if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+                return None
+
+            if endpoint in AUTH_ENDPOINTS:
+                key = f'auth:{request.remote_addr}'
+                capacity, rate = app.config['RATELIMIT_AUTH_CAPACITY'], app.config['RATELIMIT_AUTH_REFILL_RATE']
+            else:
+                identity = _identity()
+                key = f'user:{identity}' if identity is not None else f'ip:{request.remote_addr}'
+                capacity, rate = app.config['RATELIMIT_CAPACITY'], app.config['RATELIMIT_REFILL_RATE']
+
+            allowed, retry_after = store.take(key, request_cost(endpoint, costs), capacity, rate, time.time())
+            if allowed:
+                return None
+            return jsonify({"msg": "Limite de requisições excedido. Tente novamente mais tarde."}), 429, \
+                {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,217 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+
+from database import configure_engine, engine_options
+
+REPLICA_PREFIX = 'replica_'
+# Header em que o cliente diz quantos segundos de atraso aceita (0 = só o primário)
+STALENESS_HEADER = 'X-Max-Staleness'
+SOURCE_HEADER = 'X-Read-Source'
+PRIMARY = 'primary'
+# Marca, em session.info, que a sessão já escreveu: daí em diante tudo vai ao primário
+_WROTE = 'replica_wrote'
+
+
+def create_replica_engines(config):
+    """Um engine por réplica, com as mesmas opções de pool e PRAGMAs do primário.
+
+    Ficam fora de SQLALCHEMY_BINDS: nenhum modelo pertence a elas, e
+    create_all/drop_all não devem mandar DDL a uma réplica.
+    """
+    engines = {}
+    for index, url in enumerate(config.get('SQLALCHEMY_REPLICA_URIS') or ()):
+        engine = create_engine(url, **engine_options(config, url))
+        configure_engine(engine, config)
+        engines[f'{REPLICA_PREFIX}{index}'] = engine
+    return engines
+
+
+def measure_lag(connection):
+    """Atraso da réplica em segundos.
+
+    No Postgres é o tempo desde a última transação reaplicada; com o primário
+    parado esse valor cresce mesmo sem atraso real, o que só manda leituras
+    ao primário por excesso de cautela. Nos outros bancos não há como medir e
+    a réplica é tratada como em dia.
+    """
+    if connection.dialect.name == 'postgresql':
+        lag = connection.execute(text(
+            'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+        )).scalar()
+        return float(lag or 0.0)
+    connection.execute(text('SELECT 1'))
+    return 0.0
+
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+        @event.listens_for(engine, 'handle_error')
+        def _on_error(context):
+            # conexão caiu no meio de uma consulta: sai da rotação até o próximo health check
+            if context.is_disconnect:
+                self.healthy = False
+
+    def refresh(self, interval):
+        """Health check preguiçoso: no máximo um a cada ``interval`` segundos, feito por uma requisição só."""
+        if self.checked_at is not None and time.monotonic() - self.checked_at < interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.check()
+        finally:
+            self._lock.release()
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                self.lag = measure_lag(connection)
+            self.healthy = True
+        except SQLAlchemyError:
+            self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+class RoutingSession(Session):
+    """Sessão que manda as leituras das rotas marcadas com ``@read_replica`` à réplica escolhida.
+
+    Flush e INSERT/UPDATE/DELETE via Core vão sempre ao primário, e depois da
+    primeira escrita a sessão inteira fica no primário (lê o que escreveu).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get(_WROTE):
+            if isinstance(clause, UpdateBase):
+                self.info[_WROTE] = True
+            else:
+                replica = g.get('_replica') if has_request_context() else None
+                if replica is not None:
+                    return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _mark_write(session, flush_context, instances):
+    session.info[_WROTE] = True
+
+
+def _identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # rota sem @jwt_required
+        return None
+
+
+class ReplicaRouter:
+    """Escolha da réplica de leitura: round-robin entre as saudáveis e em dia.
+
+    A requisição vai ao primário quando não há réplica configurada ou
+    saudável, quando o atraso de todas passa da tolerância (``X-Max-Staleness``
+    ou REPLICA_MAX_STALENESS) ou quando o usuário escreveu há menos de
+    REPLICA_STICKY_SECONDS, para ele ler o que acabou de gravar. As escritas
+    recentes ficam na memória do processo; entre workers diferentes o cliente
+    pode mandar ``X-Max-Staleness: 0``.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('REPLICA_MAX_STALENESS', 10.0)
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5.0)
+        app.config.setdefault('REPLICA_HEALTH_INTERVAL', 5.0)
+        replicas = [Replica(name, engine) for name, engine in create_replica_engines(app.config).items()]
+        state = app.extensions['replicas'] = _RouterState(replicas)
+        if not replicas:
+            return
+
+        sticky = app.config['REPLICA_STICKY_SECONDS']
+
+        @app.after_request
+        def _remember_writes(response):
+            session = current_app.extensions['sqlalchemy'].session
+            if response.status_code < 400 and session.info.get(_WROTE):
+                identity = _identity()
+                if identity is not None:
+                    state.note_write(identity, sticky)
+            return response
+
+    def choose(self, max_staleness):
+        state = current_app.extensions['replicas']
+        if not state.replicas or max_staleness <= 0:
+            return None
+        identity = _identity()
+        if identity is not None and state.wrote_recently(identity):
+            return None
+        interval = current_app.config['REPLICA_HEALTH_INTERVAL']
+        start = next(state.counter)
+        for offset in range(len(state.replicas)):
+            replica = state.replicas[(start + offset) % len(state.replicas)]
+            replica.refresh(interval)
+            if replica.healthy and replica.lag <= max_staleness:
+                return replica
+        return None
+
+
+class _RouterState:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.counter = itertools.count()
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def note_write(self, identity, sticky):
+        now = time.monotonic()
+        with self._lock:
+            self._writes[identity] = now + sticky
+            if len(self._writes) > 10_000:
+                self._writes = {key: until for key, until in self._writes.items() if until > now}
+
+    def wrote_recently(self, identity):
+        until = self._writes.get(identity)
+        return until is not None and until > time.monotonic()
+
+
+replica_router = ReplicaRouter()
+
+
+def read_staleness():
+    """Tolerância da requisição atual, se ela lê de uma réplica; senão None."""
+    if has_request_context() and g.get('_replica') is not None:
+        return g._max_staleness
+    return None
+
+
+def read_replica(view):
+    """Rota GET que pode ler de uma réplica. Use depois de ``@jwt_required()``."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        max_staleness = current_app.config['REPLICA_MAX_STALENESS']
+        if STALENESS_HEADER in request.headers:
+            try:
+                max_staleness = float(request.headers[STALENESS_HEADER])
+            except ValueError:
+                return jsonify({"msg": f"{STALENESS_HEADER} deve ser um número de segundos."}), 400
+
+        replica = replica_router.choose(max_staleness)
+        g._replica, g._max_staleness = replica, max_staleness
+        response = make_response(view(*args, **kwargs))
+        response.headers[SOURCE_HEADER] = replica.name if replica is not None else PRIMARY
+        return response
+
+    return wrapper
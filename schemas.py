@@ -1,9 +1,17 @@
 from marshmallow import Schema, fields, validate, EXCLUDE
 
+from metrics import timed
+from serialization import OutputSchema
+
 class BaseSchema(Schema):
     class Meta:
         unknown = EXCLUDE 
 
+    def load(self, *args, **kwargs):
+        # tempo de validação entra no Server-Timing e no /metrics
+        with timed('validation'):
+            return super().load(*args, **kwargs)
+
 class AuthSchema(BaseSchema):
     username = fields.Str(
         required=True, 
@@ -45,4 +53,57 @@ class DispositivoSchema(BaseSchema):
     categoria_id = fields.Int(
         required=False, 
         allow_none=True 
-    )
\ No newline at end of file
+    )
+
+class BatchSelectionSchema(BaseSchema):
+    # ids opcionais: sem eles a seleção vem dos filtros da query string
+    ids = fields.List(
+        fields.Int(),
+        required=False,
+        validate=validate.Length(min=1, error="Informe ao menos um id.")
+    )
+
+class TarefaSchema(BaseSchema):
+    # Os tipos aceitos e os parâmetros de cada um ficam em jobs.JOB_TYPES
+    tipo = fields.Str(
+        required=True,
+        error_messages={"required": "O campo 'tipo' é obrigatório."}
+    )
+    params = fields.Dict(required=False, load_default=dict)
+
+class ReatribuicaoCategoriaSchema(BaseSchema):
+    # null = dispositivos sem categoria
+    categoria_origem_id = fields.Int(
+        required=True,
+        allow_none=True,
+        error_messages={"required": "O campo 'categoria_origem_id' é obrigatório."}
+    )
+    categoria_destino_id = fields.Int(
+        required=True,
+        allow_none=True,
+        error_messages={"required": "O campo 'categoria_destino_id' é obrigatório."}
+    )
+    status = fields.Str(
+        required=False,
+        validate=validate.OneOf(
+            choices=["ativo", "inativo"],
+            error="Status deve ser 'ativo' ou 'inativo'."
+        )
+    )
+
+
+# Schemas sem estado entre chamadas: uma instância por processo, reaproveitada
+# em todas as requisições (load recebe partial por argumento)
+auth_schema = AuthSchema()
+categoria_schema = CategoriaSchema()
+dispositivo_schema = DispositivoSchema()
+batch_selection_schema = BatchSelectionSchema()
+tarefa_schema = TarefaSchema()
+reatribuicao_categoria_schema = ReatribuicaoCategoriaSchema()
+
+# Saída
+categoria_output = OutputSchema(('id', 'nome', 'descricao', 'created_at', 'updated_at'))
+dispositivo_output = OutputSchema(
+    ('id', 'nome', 'serial', 'status', 'categoria_id', 'created_at', 'updated_at'),
+    computed={'categoria_nome': 'categoria.nome'},
+)
@@ -0,0 +1,138 @@
+import re
+
+from sqlalchemy import DDL, column, event, func, inspect, literal_column, or_, select, table, text
+
+from extensions import db
+from models import Dispositivo
+
+FTS_TABLE = 'dispositivo_fts'
+
+# DDL do índice, usada pelo create_all (eventos abaixo) e pela migração
+# 7c1d2e9a4f60, para os dois caminhos criarem o mesmo índice.
+#
+# Tabela FTS5 em modo "external content": guarda só o índice e lê nome/serial
+# da própria tabela dispositivo. Os triggers mantêm o índice em sincronia em
+# qualquer INSERT/UPDATE/DELETE, inclusive os feitos em lote fora do ORM.
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        nome, serial,
+        content='dispositivo', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON dispositivo BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nome, serial) VALUES (new.id, new.nome, new.serial);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON dispositivo BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nome, serial) VALUES ('delete', old.id, old.nome, old.serial);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF nome, serial ON dispositivo BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nome, serial) VALUES ('delete', old.id, old.nome, old.serial);
+        INSERT INTO {FTS_TABLE}(rowid, nome, serial) VALUES (new.id, new.nome, new.serial);
+    END""",
+]
+
+# No Postgres os índices de expressão (tsvector + trigramas) se mantêm sozinhos.
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE INDEX IF NOT EXISTS ix_dispositivo_busca_tsv ON dispositivo
+        USING gin (to_tsvector('simple', coalesce(nome, '') || ' ' || coalesce(serial, '')))""",
+    "CREATE INDEX IF NOT EXISTS ix_dispositivo_serial_trgm ON dispositivo USING gin (serial gin_trgm_ops)",
+]
+
+for _statement in SQLITE_DDL:
+    event.listen(Dispositivo.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_DDL:
+    event.listen(Dispositivo.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(Dispositivo.__table__, 'before_drop',
+             DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect='sqlite'))
+
+_fts = table(FTS_TABLE, column('rowid'))
+_backends = {}
+
+
+def backend_for(bind):
+    """'fts5', 'postgres' ou 'like' (fallback quando o índice não existe)."""
+    if bind.dialect.name == 'postgresql':
+        return 'postgres'
+    if bind.dialect.name == 'sqlite' and inspect(bind).has_table(FTS_TABLE):
+        return 'fts5'
+    return 'like'
+
+
+def search_backend():
+    engine = db.session.get_bind()
+    key = str(engine.url)
+    if key not in _backends:
+        _backends[key] = backend_for(engine)
+    return _backends[key]
+
+
+def fts5_query(term):
+    # Cada palavra vira uma frase com prefixo ("SRV-00"* casa com SRV-001);
+    # palavras separadas por espaço precisam aparecer todas (AND implícito).
+    words = term.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def tsquery(term):
+    return ' & '.join(f'{token}:*' for token in re.findall(r'\w+', term))
+
+
+def _pg_vector():
+    # Precisa ser textualmente igual à expressão de ix_dispositivo_busca_tsv,
+    # senão o planner do Postgres não usa o índice.
+    return literal_column(
+        "to_tsvector('simple', coalesce(dispositivo.nome, '') || ' ' || coalesce(dispositivo.serial, ''))"
+    )
+
+
+def _escape_like(term):
+    # % e _ digitados na busca são literais, não curingas do LIKE
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _like_clause(term):
+    pattern = f"%{_escape_like(term)}%"
+    return or_(Dispositivo.nome.ilike(pattern, escape='\\'), Dispositivo.serial.ilike(pattern, escape='\\'))
+
+
+def _fts5_matches(term):
+    return (select(_fts.c.rowid.label('id'),
+                   literal_column(f'bm25({FTS_TABLE}, 1.0, 2.0)').label('rank'))
+            .select_from(_fts)
+            .where(text(f'{FTS_TABLE} MATCH :fts_query').bindparams(fts_query=fts5_query(term))))
+
+
+def apply_search(query, term, order_by_relevance=False, backend=None):
+    """Filtra ``query`` pelo termo de busca usando o índice disponível.
+
+    Com ``order_by_relevance`` as linhas vêm das mais relevantes para as menos
+    (bm25 no SQLite, ts_rank no Postgres), com ``id`` como desempate.
+    ``backend`` dispensa a detecção via db.session (usado fora do Flask).
+    """
+    backend = backend or search_backend()
+
+    if backend == 'fts5' and term.split():
+        matches = _fts5_matches(term).subquery()
+        if order_by_relevance:
+            return (query.join(matches, matches.c.id == Dispositivo.id)
+                    .order_by(matches.c.rank, Dispositivo.id))
+        return query.filter(Dispositivo.id.in_(select(matches.c.id)))
+
+    if backend == 'postgres' and tsquery(term):
+        ts_query = func.to_tsquery(literal_column("'simple'"), tsquery(term))
+        query = query.filter(or_(_pg_vector().op('@@')(ts_query),
+                                 Dispositivo.serial.ilike(f"{_escape_like(term)}%", escape='\\')))
+        if order_by_relevance:
+            query = query.order_by(func.ts_rank(_pg_vector(), ts_query).desc(), Dispositivo.id)
+        return query
+
+    return query.filter(_like_clause(term))
+
+
+def rebuild_index(commit=True):
+    """Reconstroi o índice FTS5 a partir da tabela dispositivo."""
+    if search_backend() == 'fts5':
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        if commit:
+            db.session.commit()
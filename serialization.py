@@ -0,0 +1,139 @@
+import decimal
+from datetime import date
+from operator import attrgetter, itemgetter
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+
+class OutputSchema:
+    """Serializador de saída de um modelo, montado uma única vez.
+
+    Monta o dict direto, sem o ciclo de fields/hooks do marshmallow. Datas e
+    horas ficam como objetos nativos: o provider JSON da aplicação os escreve
+    em ISO 8601. ``computed`` mapeia nomes de campos derivados para um caminho
+    pontuado (``'categoria.nome'``, None se algum elo for None) ou uma função
+    ``obj -> valor``.
+    """
+
+    def __init__(self, fields, computed=None):
+        self.fields = tuple(fields)
+        self.computed = {name: _path_getter(source) if isinstance(source, str) else source
+                         for name, source in (computed or {}).items()}
+        self._from_state = _tuple_getter(itemgetter, self.fields)
+        self._from_attrs = _tuple_getter(attrgetter, self.fields)
+
+    def _values(self, obj):
+        try:
+            # Colunas já carregadas ficam no __dict__ da instância: lê sem passar
+            # pelo descriptor instrumentado do SQLAlchemy, que domina o custo
+            return self._from_state(obj.__dict__)
+        except (AttributeError, KeyError):
+            # expirada após commit, coluna adiada ou objeto sem __dict__
+            return self._from_attrs(obj)
+
+    def dump(self, obj):
+        data = dict(zip(self.fields, self._values(obj)))
+        for name, compute in self.computed.items():
+            data[name] = compute(obj)
+        return data
+
+    def dump_many(self, objs):
+        return [self.dump(obj) for obj in objs]
+
+
+def _tuple_getter(getter, fields):
+    get = getter(*fields)
+    # item/attrgetter com um único nome devolve o valor, não uma tupla
+    return get if len(fields) > 1 else (lambda obj: (get(obj),))
+
+
+def _loaded(obj, name):
+    try:
+        return obj.__dict__[name]
+    except (AttributeError, KeyError):
+        return getattr(obj, name)
+
+
+def _path_getter(path):
+    names = path.split('.')
+
+    def get(obj):
+        for name in names:
+            if obj is None:
+                return None
+            obj = _loaded(obj, name)
+        return obj
+    return get
+
+
+def _default(obj):
+    # Mesmo contrato nos dois providers: datas em ISO 8601 (o padrão do Flask seria o formato HTTP)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Provider padrão do Flask (módulo json), só com datas em ISO 8601."""
+
+    default = staticmethod(_default)
+
+
+class ORJSONProvider(JSONProvider):
+    """Provider JSON com orjson: serializa datetime, UUID e dataclasses em C.
+
+    Mantém o comportamento do provider padrão onde ele é visível para o
+    cliente: chaves ordenadas e saída indentada em modo debug. A diferença é
+    que texto não ASCII sai em UTF-8 em vez de escapes ``\\uXXXX``.
+    """
+
+    mimetype = 'application/json'
+    sort_keys = True
+    compact = None
+
+    def __init__(self, app):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+
+    def dumps(self, obj, **kwargs):
+        orjson = self._orjson
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        return self._app.response_class(f'{self.dumps(obj, **dump_args)}\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Troca o provider JSON da aplicação conforme ``JSON_PROVIDER`` ("orjson" ou "stdlib").
+
+    Precisa rodar antes de quem embrulha ``app.json.dumps`` (métricas).
+    """
+    app.config.setdefault('JSON_PROVIDER', 'orjson')
+    provider = app.config['JSON_PROVIDER']
+    if provider == 'orjson':
+        try:
+            app.json = ORJSONProvider(app)
+        except ImportError as exc:
+            raise RuntimeError("JSON_PROVIDER='orjson' requer o pacote 'orjson' instalado.") from exc
+    elif provider == 'stdlib':
+        app.json = StdlibJSONProvider(app)
+    else:
+        raise RuntimeError(f"JSON_PROVIDER desconhecido: {provider!r}")
@@ -0,0 +1,179 @@
+from collections import Counter
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from cache import DISPOSITIVOS, invalidate_on_commit
+from extensions import db
+from models import Categoria, Dispositivo, EstatisticaCriacaoDiaria, EstatisticaDispositivo
+
+# Chave de "sem categoria" na tabela de estatísticas
+SEM_CATEGORIA = 0
+
+
+def _categoria_key(categoria_id):
+    return SEM_CATEGORIA if categoria_id is None else categoria_id
+
+
+def _upsert(connection, model, keys, deltas):
+    """INSERT ... ON CONFLICT DO UPDATE SET total = total + delta, um executemany por tabela."""
+    rows = [dict(zip(keys, key), total=delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={'total': model.__table__.c.total + stmt.excluded.total},
+    )
+    connection.execute(stmt, rows)
+
+
+def apply_deltas(connection, por_status_categoria, por_dia):
+    """Soma os deltas às tabelas de estatística na transação de ``connection``.
+
+    ``por_status_categoria`` é um Counter de (status, categoria_id) -> delta e
+    ``por_dia`` um Counter de date -> delta.
+    """
+    pairs = Counter()
+    for (status, categoria_id), delta in por_status_categoria.items():
+        pairs[(status, _categoria_key(categoria_id))] += delta
+    _upsert(connection, EstatisticaDispositivo, ['status', 'categoria_id'], pairs)
+    _upsert(connection, EstatisticaCriacaoDiaria, ['dia'],
+            Counter({(dia,): delta for dia, delta in por_dia.items() if dia is not None}))
+
+
+def _day(created_at):
+    return created_at.date() if created_at is not None else None
+
+
+def record_inserted(session, rows):
+    """Atualiza as estatísticas de linhas inseridas via Core (que não disparam eventos de mapper)."""
+    pairs, days = Counter(), Counter()
+    for row in rows:
+        pairs[(row['status'], row.get('categoria_id'))] += 1
+        days[_day(row['created_at'])] += 1
+    apply_deltas(session.connection(), pairs, days)
+
+
+# ---------- MANUTENÇÃO POR EVENTOS ----------
+# Os deltas vão na mesma transação do INSERT/UPDATE/DELETE: um rollback desfaz os dois.
+
+def _previous(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr)
+
+
+# active_history: ao trocar status/categoria de um objeto carregado parcialmente,
+# o valor antigo é buscado para que o after_update saiba o que decrementar.
+for _attr in (Dispositivo.status, Dispositivo.categoria_id, Dispositivo.created_at):
+    event.listen(_attr, 'set', lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+@event.listens_for(Dispositivo, 'after_insert')
+def _dispositivo_inserted(mapper, connection, target):
+    apply_deltas(connection,
+                 Counter({(target.status, target.categoria_id): 1}),
+                 Counter({_day(target.created_at): 1}))
+
+
+@event.listens_for(Dispositivo, 'after_update')
+def _dispositivo_updated(mapper, connection, target):
+    state = inspect(target)
+    pairs, days = Counter(), Counter()
+
+    old_pair = (_previous(state, 'status'), _previous(state, 'categoria_id'))
+    new_pair = (target.status, target.categoria_id)
+    if old_pair != new_pair:
+        pairs[old_pair] -= 1
+        pairs[new_pair] += 1
+
+    old_day, new_day = _day(_previous(state, 'created_at')), _day(target.created_at)
+    if old_day != new_day:
+        days[old_day] -= 1
+        days[new_day] += 1
+
+    apply_deltas(connection, pairs, days)
+
+
+@event.listens_for(Dispositivo, 'after_delete')
+def _dispositivo_deleted(mapper, connection, target):
+    state = inspect(target)
+    apply_deltas(connection,
+                 Counter({(_previous(state, 'status'), _previous(state, 'categoria_id')): -1}),
+                 Counter({_day(_previous(state, 'created_at')): -1}))
+
+
+# ---------- LEITURA E RECONCILIAÇÃO ----------
+
+def dispositivo_stats():
+    """Resumo servido só das tabelas de estatística: O(status x categorias + dias)."""
+    pairs = db.session.execute(
+        select(EstatisticaDispositivo.status, EstatisticaDispositivo.categoria_id,
+               Categoria.nome, EstatisticaDispositivo.total)
+        .outerjoin(Categoria, Categoria.id == EstatisticaDispositivo.categoria_id)
+        .where(EstatisticaDispositivo.total != 0)
+        .order_by(EstatisticaDispositivo.categoria_id, EstatisticaDispositivo.status)
+    ).all()
+    days = db.session.execute(
+        select(EstatisticaCriacaoDiaria.dia, EstatisticaCriacaoDiaria.total)
+        .where(EstatisticaCriacaoDiaria.total != 0)
+        .order_by(EstatisticaCriacaoDiaria.dia)
+    ).all()
+
+    por_status = Counter()
+    por_categoria = {}
+    por_status_categoria = []
+    for status, categoria_key, categoria_nome, total in pairs:
+        categoria_id = None if categoria_key == SEM_CATEGORIA else categoria_key
+        por_status[status] += total
+        entry = por_categoria.setdefault(categoria_id, {
+            'categoria_id': categoria_id, 'categoria_nome': categoria_nome, 'total': 0,
+        })
+        entry['total'] += total
+        por_status_categoria.append({'status': status, 'categoria_id': categoria_id, 'total': total})
+
+    return {
+        'total': sum(por_status.values()),
+        'por_status': dict(por_status),
+        'por_categoria': list(por_categoria.values()),
+        'por_status_categoria': por_status_categoria,
+        'criados_por_dia': [{'dia': str(dia), 'total': total} for dia, total in days],
+    }
+
+
+def rebuild_stats(session, commit=True):
+    """Recalcula as tabelas de estatística a partir de ``dispositivo`` (GROUP BY).
+
+    Com ``commit=False`` deixa a transação aberta para quem chama (tarefas em segundo plano).
+    """
+    session.execute(delete(EstatisticaDispositivo))
+    session.execute(delete(EstatisticaCriacaoDiaria))
+
+    categoria_key = func.coalesce(Dispositivo.categoria_id, SEM_CATEGORIA)
+    session.execute(EstatisticaDispositivo.__table__.insert().from_select(
+        ['status', 'categoria_id', 'total'],
+        select(Dispositivo.status, categoria_key, func.count()).group_by(Dispositivo.status, categoria_key),
+    ))
+    dia = func.date(Dispositivo.created_at)
+    session.execute(EstatisticaCriacaoDiaria.__table__.insert().from_select(
+        ['dia', 'total'],
+        select(dia, func.count()).where(Dispositivo.created_at.is_not(None)).group_by(dia),
+    ))
+    invalidate_on_commit(session, DISPOSITIVOS)
+    if commit:
+        session.commit()
+
+
+stats_cli = AppGroup('stats', help='Estatísticas agregadas de dispositivos.')
+
+
+@stats_cli.command('rebuild')
+def rebuild_command():
+    """Reconcilia as tabelas de estatística com a tabela de dispositivos."""
+    rebuild_stats(db.session)
+    click.echo('Estatísticas recalculadas.')
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import event
+from app import create_app
+from config import Config
+from extensions import db
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    JWT_SECRET_KEY = 'teste-secret'
+    # Custo baixo para não pesar nos testes
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    # Os testes disparam muitas requisições seguidas do mesmo usuário
+    RATELIMIT_ENABLED = False
+    # Sem threads de tarefas: os testes executam com jobs.run_pending
+    JOBS_WORKERS = 0
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def auth_header(client):
+
+    client.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    
+    response = client.post('/auth/login', json={'username': 'testuser', 'password': 'password'})
+    token = response.get_json()['access_token']
+
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def statements(app):
+    captured = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    yield captured
+    event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
@@ -0,0 +1,159 @@
+from app import create_app
+from extensions import db
+from models import Alteracao, Dispositivo
+from tests.conftest import TestConfig
+
+
+def _changes(client, auth_header, since='', **params):
+    response = client.get('/dispositivos/changes', query_string={'since': since, **params}, headers=auth_header)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_insert_update_delete_em_ordem(client, auth_header):
+    cat = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    a = client.post('/dispositivos', json={'nome': 'A', 'serial': 'SN-A', 'categoria_id': cat['id']},
+                    headers=auth_header).get_json()
+    b = client.post('/dispositivos', json={'nome': 'B', 'serial': 'SN-B'}, headers=auth_header).get_json()
+
+    page = _changes(client, auth_header)
+    assert [(c['entidade'], c['op'], c['id']) for c in page['changes']] == [
+        ('categoria', 'insert', cat['id']), ('dispositivo', 'insert', a['id']), ('dispositivo', 'insert', b['id']),
+    ]
+    assert page['changes'][1]['data']['categoria_nome'] == 'Rede'
+    assert page['has_more'] is False
+    cursor = page['next_cursor']
+
+    client.patch(f"/dispositivos/{a['id']}", json={'status': 'inativo'}, headers=auth_header)
+    client.delete(f"/dispositivos/{b['id']}", headers=auth_header)
+
+    page = _changes(client, auth_header, cursor)
+    assert [(c['op'], c['id']) for c in page['changes']] == [('update', a['id']), ('delete', b['id'])]
+    assert page['changes'][0]['data']['status'] == 'inativo'
+    assert page['changes'][1]['data'] is None
+
+    # nada novo: cursor não anda
+    assert _changes(client, auth_header, page['next_cursor']) == {
+        'changes': [], 'next_cursor': page['next_cursor'], 'has_more': False,
+    }
+
+
+def test_pagina_junta_alteracoes_da_mesma_entidade(client, auth_header):
+    dev = client.post('/dispositivos', json={'nome': 'A', 'serial': 'SN-A'}, headers=auth_header).get_json()
+    for nome in ('A1', 'A2', 'A3'):
+        client.patch(f"/dispositivos/{dev['id']}", json={'nome': nome}, headers=auth_header)
+    # PATCH sem mudança efetiva não gera registro
+    client.patch(f"/dispositivos/{dev['id']}", json={'nome': 'A3'}, headers=auth_header)
+
+    page = _changes(client, auth_header)
+    assert len(page['changes']) == 1
+    assert page['changes'][0]['op'] == 'update' and page['changes'][0]['data']['nome'] == 'A3'
+    assert page['next_cursor'] == '4'
+
+
+def test_paginacao_do_feed(client, auth_header):
+    for i in range(5):
+        client.post('/dispositivos', json={'nome': f'D{i}', 'serial': f'SN-{i}'}, headers=auth_header)
+    first = _changes(client, auth_header, limit=2)
+    assert len(first['changes']) == 2 and first['has_more'] is True
+    rest = _changes(client, auth_header, first['next_cursor'], limit=10)
+    assert [c['data']['serial'] for c in rest['changes']] == ['SN-2', 'SN-3', 'SN-4']
+
+
+def test_caminhos_em_lote_tambem_registram(client, auth_header, app):
+    body = '\n'.join(f'{{"nome": "D{i}", "serial": "SN-{i}", "status": "ativo"}}' for i in range(4))
+    client.post('/dispositivos/bulk', data=body, headers={**auth_header, 'Content-Type': 'application/x-ndjson'})
+    cursor = _changes(client, auth_header)['next_cursor']
+    with app.app_context():
+        assert Alteracao.query.filter_by(operacao='insert').count() == 4
+
+    # status muda: o log é gravado antes do UPDATE, enquanto o filtro ainda casa
+    client.patch('/dispositivos/batch?status=ativo', json={'status': 'inativo'}, headers=auth_header)
+    page = _changes(client, auth_header, cursor)
+    assert sorted(c['data']['serial'] for c in page['changes']) == ['SN-0', 'SN-1', 'SN-2', 'SN-3']
+    assert {c['op'] for c in page['changes']} == {'update'}
+
+    client.delete('/dispositivos/batch', json={'ids': [1, 2]}, headers=auth_header)
+    page = _changes(client, auth_header, page['next_cursor'])
+    assert [(c['op'], c['id']) for c in page['changes']] == [('delete', 1), ('delete', 2)]
+
+
+def test_updated_since_e_cursor_invalido(client, auth_header):
+    client.post('/dispositivos', json={'nome': 'A', 'serial': 'SN-A'}, headers=auth_header)
+    assert len(_changes(client, auth_header, updated_since='2000-01-01T00:00:00Z')['changes']) == 1
+    assert _changes(client, auth_header, updated_since='2999-01-01T00:00:00')['changes'] == []
+
+    response = client.get('/dispositivos/changes?since=abc', headers=auth_header)
+    assert response.status_code == 400
+    response = client.get('/dispositivos/changes?updated_since=ontem', headers=auth_header)
+    assert response.status_code == 400
+
+
+def _stream_app(**settings):
+    config = type('Config', (TestConfig,), {'CHANGES_POLL_INTERVAL': 0.01, 'CHANGES_STREAM_MAX_SECONDS': 0.1,
+                                            'CHANGES_STREAM_MAX_CONCURRENT': 1, **settings})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'testuser', 'password': 'password'}).get_json()['access_token']
+    return client, {'Authorization': f'Bearer {token}'}
+
+
+def test_stream_sse():
+    client, headers = _stream_app()
+    client.post('/dispositivos', json={'nome': 'A', 'serial': 'SN-A'}, headers=headers)
+    client.post('/dispositivos', json={'nome': 'B', 'serial': 'SN-B'}, headers=headers)
+
+    response = client.get('/dispositivos/changes/stream', headers={**headers, 'Last-Event-ID': '1'})
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.startswith('retry: 10\n\n')
+    assert 'id: 2\nevent: change\ndata: {' in body
+    assert '"SN-B"' in body and '"SN-A"' not in body
+
+
+def test_stream_acima_do_limite_responde_503():
+    client, headers = _stream_app()
+    first = client.get('/dispositivos/changes/stream', headers=headers, buffered=False)
+    assert first.status_code == 200
+
+    second = client.get('/dispositivos/changes/stream', headers=headers)
+    assert second.status_code == 503
+    assert second.headers['Retry-After']
+
+    # a vaga volta quando o primeiro stream fecha
+    first.close()
+    assert client.get('/dispositivos/changes/stream', headers=headers).status_code == 200
+
+
+def test_stream_desligado_no_worker_sync():
+    client, headers = _stream_app(CHANGES_STREAM_MAX_CONCURRENT=0)
+    assert client.get('/dispositivos/changes/stream', headers=headers).status_code == 503
+    # o feed por polling continua disponível
+    assert client.get('/dispositivos/changes', headers=headers).status_code == 200
+
+
+def test_log_gravado_no_commit_e_descartado_no_rollback(app):
+    with app.app_context():
+        db.session.add(Dispositivo(nome='A', serial='SN-A'))
+        db.session.flush()
+        assert db.session.info['alteracoes'] and Alteracao.query.count() == 0
+        db.session.rollback()
+        assert 'alteracoes' not in db.session.info
+
+        db.session.add(Dispositivo(nome='B', serial='SN-B'))
+        db.session.commit()  # sem flush antes: o flush do commit também entra no log
+        assert [(a.operacao, a.entidade_id) for a in Alteracao.query] == [('insert', 1)]
+
+
+def test_prune_mantem_a_ultima_alteracao(client, auth_header, app):
+    for nome in ('Rede', 'Energia'):
+        client.post('/categorias', json={'nome': nome}, headers=auth_header)
+
+    result = app.test_cli_runner().invoke(args=['changes', 'prune', '--days', '-1'])
+    assert '1 alterações removidas.' in result.output
+    with app.app_context():
+        # MAX(id) é o ETag das listagens: não pode voltar para trás
+        assert [a.id for a in Alteracao.query.all()] == [2]
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiosqlite')
+
+import httpx  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+from app import create_app  # noqa: E402
+from asgi import async_database_url, create_asgi_app  # noqa: E402
+from extensions import db  # noqa: E402
+from tests.conftest import TestConfig  # noqa: E402
+from tokens import SQLiteBlocklist  # noqa: E402
+
+
+@pytest.fixture
+def file_config(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+
+    flask_app = create_app(FileConfig)
+    with flask_app.app_context():
+        db.create_all()
+    return FileConfig
+
+
+@pytest.fixture
+def asgi_client(file_config):
+    with TestClient(create_asgi_app(file_config)) as client:
+        yield client
+
+
+@pytest.fixture
+def asgi_auth(asgi_client):
+    asgi_client.post('/auth/register', json={'username': 'assincrono', 'password': 'password'})
+    token = asgi_client.post('/auth/login', json={'username': 'assincrono', 'password': 'password'}).json()
+    return {'Authorization': f"Bearer {token['access_token']}"}
+
+
+def test_async_database_url():
+    assert async_database_url('sqlite:////tmp/app.db') == 'sqlite+aiosqlite:////tmp/app.db'
+    assert async_database_url('postgresql://u:p@h/db') == 'postgresql+asyncpg://u:p@h/db'
+    assert async_database_url('postgresql+psycopg2://u:p@h/db') == 'postgresql+asyncpg://u:p@h/db'
+
+
+def test_crud_assincrono(asgi_client, asgi_auth):
+    cat = asgi_client.post('/categorias', json={'nome': 'Rede'}, headers=asgi_auth)
+    assert cat.status_code == 201
+    cat_id = cat.json()['id']
+
+    dev = asgi_client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1', 'categoria_id': cat_id},
+                           headers=asgi_auth)
+    assert dev.status_code == 201
+    assert dev.json()['categoria_nome'] == 'Rede'
+
+    duplicate = asgi_client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1'}, headers=asgi_auth)
+    assert duplicate.status_code == 409
+
+    invalid = asgi_client.post('/dispositivos', json={'nome': 'SW'}, headers=asgi_auth)
+    assert invalid.status_code == 400
+    assert 'serial' in invalid.json()['errors']
+
+    assert asgi_client.delete(f'/categorias/{cat_id}', headers=asgi_auth).status_code == 400
+
+    updated = asgi_client.patch(f"/dispositivos/{dev.json()['id']}", json={'categoria_id': None, 'status': 'inativo'},
+                                headers=asgi_auth)
+    assert updated.json()['categoria_nome'] is None
+    assert updated.json()['status'] == 'inativo'
+
+    assert asgi_client.delete(f'/categorias/{cat_id}', headers=asgi_auth).status_code == 204
+    assert asgi_client.get(f'/categorias/{cat_id}', headers=asgi_auth).status_code == 404
+
+
+def test_listagem_assincrona_offset_e_cursor(asgi_client, asgi_auth):
+    for i in range(5):
+        asgi_client.post('/dispositivos', json={'nome': f'Câmera {i}', 'serial': f'CAM-{i}'}, headers=asgi_auth)
+
+    page = asgi_client.get('/dispositivos', params={'limit': 2, 'page': 3}, headers=asgi_auth).json()
+    assert [item['serial'] for item in page['items']] == ['CAM-4']
+    assert page['pagination']['total_records'] == 5
+    assert page['pagination']['total_pages'] == 3
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        body = asgi_client.get('/dispositivos', params={'cursor': cursor, 'limit': 2, 'sort': 'serial',
+                                                        'order': 'desc'}, headers=asgi_auth).json()
+        seen += [item['serial'] for item in body['items']]
+        cursor = body['pagination']['next_cursor']
+    assert seen == ['CAM-4', 'CAM-3', 'CAM-2', 'CAM-1', 'CAM-0']
+
+    found = asgi_client.get('/dispositivos', params={'busca': 'camera'}, headers=asgi_auth).json()
+    assert found['pagination']['total_records'] == 5
+
+
+def test_token_do_flask_vale_no_asgi(file_config, asgi_client):
+    flask_client = create_app(file_config).test_client()
+    flask_client.post('/auth/register', json={'username': 'sincrono', 'password': 'password'})
+    token = flask_client.post('/auth/login', json={'username': 'sincrono', 'password': 'password'}).get_json()
+
+    response = asgi_client.get('/categorias', headers={'Authorization': f"Bearer {token['access_token']}"})
+    assert response.status_code == 200
+
+    assert asgi_client.get('/categorias').status_code == 401
+    assert asgi_client.get('/categorias', headers={'Authorization': 'Bearer x.y.z'}).status_code == 422
+
+
+def test_respostas_iguais_nos_dois_modos(file_config, asgi_client):
+    flask_client = create_app(file_config).test_client()
+    flask_client.post('/auth/register', json={'username': 'sincrono', 'password': 'password'})
+    token = flask_client.post('/auth/login', json={'username': 'sincrono', 'password': 'password'}).get_json()
+    headers = {'Authorization': f"Bearer {token['access_token']}"}
+    cat = flask_client.post('/categorias', json={'nome': 'Rede'}, headers=headers).get_json()
+    for i in range(25):
+        flask_client.post('/dispositivos', json={'nome': f'SW {i}', 'serial': f'S{i:02}', 'categoria_id': cat['id']},
+                          headers=headers)
+
+    for url, params in (('/categorias', {}), (f"/categorias/{cat['id']}", {}), ('/dispositivos/1', {}),
+                        # limite fora da faixa vira 20 nos dois modos (regra do paginate)
+                        ('/dispositivos', {'limit': 0}), ('/dispositivos', {'limit': -5, 'page': -1}),
+                        ('/dispositivos', {'limit': 10, 'page': 3})):
+        wsgi = flask_client.get(url, query_string=params, headers=headers)
+        asgi = asgi_client.get(url, params=params, headers=headers)
+        assert asgi.status_code == wsgi.status_code == 200
+        assert asgi.json() == wsgi.get_json(), url
+    assert len(asgi_client.get('/dispositivos', params={'limit': 0}, headers=headers).json()['items']) == 20
+
+
+def test_exclusao_de_categoria_com_dispositivos_assincrona(file_config, asgi_client, asgi_auth):
+    rede = asgi_client.post('/categorias', json={'nome': 'Rede'}, headers=asgi_auth).json()
+    energia = asgi_client.post('/categorias', json={'nome': 'Energia'}, headers=asgi_auth).json()
+    for i in range(3):
+        asgi_client.post('/dispositivos', json={'nome': f'SW {i}', 'serial': f'S{i}', 'categoria_id': rede['id']},
+                         headers=asgi_auth)
+
+    url = f"/categorias/{rede['id']}"
+    assert asgi_client.delete(url, params={'dispositivos': 'sumir'}, headers=asgi_auth).status_code == 400
+    assert asgi_client.delete(url, params={'dispositivos': 'reatribuir', 'destino': rede['id']},
+                              headers=asgi_auth).status_code == 400
+    response = asgi_client.delete(url, params={'dispositivos': 'reatribuir', 'destino': energia['id']},
+                                  headers=asgi_auth)
+    assert response.status_code == 204
+    items = asgi_client.get('/dispositivos', headers=asgi_auth).json()['items']
+    assert {d['categoria_nome'] for d in items} == {'Energia'}
+
+    url = f"/categorias/{energia['id']}"
+    assert asgi_client.delete(url, params={'dispositivos': 'excluir'}, headers=asgi_auth).status_code == 204
+    assert asgi_client.get('/dispositivos', headers=asgi_auth).json()['items'] == []
+
+    # estatísticas e feed de alterações acompanham, como no modo WSGI
+    flask_client = create_app(file_config).test_client()
+    stats = flask_client.get('/dispositivos/stats', headers=asgi_auth).get_json()
+    assert stats['total'] == 0
+    changes = flask_client.get('/dispositivos/changes', headers=asgi_auth).get_json()['changes']
+    assert {(c['entidade'], c['op']) for c in changes} == {('dispositivo', 'delete'), ('categoria', 'delete')}
+
+
+def test_logout_no_asgi_vale_no_flask(file_config, asgi_client, asgi_auth):
+    flask_client = create_app(file_config).test_client()
+    assert asgi_client.post('/auth/logout', headers=asgi_auth).status_code == 200
+    response = flask_client.get('/categorias', headers=asgi_auth)
+    assert response.status_code == 401
+    assert response.get_json()['msg'] == 'Token has been revoked'
+
+
+def test_refresh_e_logout_assincronos(asgi_client):
+    asgi_client.post('/auth/register', json={'username': 'assincrono', 'password': 'password'})
+    tokens = asgi_client.post('/auth/login', json={'username': 'assincrono', 'password': 'password'}).json()
+    access = {'Authorization': f"Bearer {tokens['access_token']}"}
+    refresh = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+
+    novo = asgi_client.post('/auth/refresh', headers=refresh)
+    assert novo.status_code == 200
+    assert asgi_client.post('/auth/refresh', headers=access).status_code == 422
+
+    logout = asgi_client.post('/auth/logout', headers=access, json={'refresh_token': tokens['refresh_token']})
+    assert logout.status_code == 200
+    assert asgi_client.get('/categorias', headers=access).status_code == 401
+    assert asgi_client.post('/auth/refresh', headers=refresh).status_code == 401
+    assert asgi_client.get('/categorias', headers={'Authorization': f"Bearer {novo.json()['access_token']}"}
+                           ).status_code == 200
+
+
+def _inside_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_blocklist_consultada_fora_do_event_loop(asgi_auth, asgi_client, monkeypatch):
+    lookups = []
+    original = SQLiteBlocklist._lookup
+
+    def lookup(self, jti):
+        lookups.append(_inside_event_loop())
+        return original(self, jti)
+
+    monkeypatch.setattr(SQLiteBlocklist, '_lookup', lookup)
+    assert asgi_client.get('/categorias', headers=asgi_auth).status_code == 200
+    assert lookups == [False]
+    # a resposta negativa fica guardada: a próxima requisição não consulta o arquivo
+    assert asgi_client.get('/categorias', headers=asgi_auth).status_code == 200
+    assert lookups == [False]
+
+
+# Processo novo: o app Flask (que importa os módulos dos eventos) não pode estar carregado
+ASGI_ONLY_PROBE = """
+import sys
+from sqlalchemy import create_engine, text
+from starlette.testclient import TestClient
+import asgi
+from extensions import db
+from config import Config
+
+class FileConfig(Config):
+    SQLALCHEMY_DATABASE_URI = sys.argv[1]
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+assert 'app' not in sys.modules
+engine = create_engine(sys.argv[1])
+db.metadata.create_all(engine)
+with TestClient(asgi.create_asgi_app(FileConfig)) as client:
+    client.post('/auth/register', json={'username': 'assincrono', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'assincrono', 'password': 'password'}).json()
+    headers = {'Authorization': 'Bearer ' + token['access_token']}
+    cat = client.post('/categorias', json={'nome': 'Rede'}, headers=headers).json()
+    client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1', 'categoria_id': cat['id']}, headers=headers)
+with engine.connect() as connection:
+    print(connection.execute(text('SELECT status, categoria_id, total FROM estatistica_dispositivo')).all())
+    print(connection.execute(text('SELECT entidade, operacao FROM alteracao ORDER BY id')).all())
+"""
+
+
+def test_escrita_pelo_asgi_atualiza_estatisticas_e_log(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', ASGI_ONLY_PROBE, f"sqlite:///{tmp_path / 'asgi.db'}"],
+                            cwd=root, capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': root})
+    assert output.returncode == 0, output.stderr
+    stats, log = output.stdout.splitlines()
+    assert stats == "[('ativo', 1, 1)]"
+    assert log == "[('categoria', 'insert'), ('dispositivo', 'insert')]"
+
+
+def test_posts_duplicados_concorrentes_dao_409(file_config, asgi_client, asgi_auth):
+    app = create_asgi_app(file_config)
+
+    async def post_twice(url, body):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as client:
+            responses = await asyncio.gather(*(client.post(url, json=body, headers=asgi_auth) for _ in range(2)))
+        await app.state.api.shutdown()
+        return sorted(response.status_code for response in responses)
+
+    assert asyncio.run(post_twice('/categorias', {'nome': 'Rede'})) == [201, 409]
+    assert asyncio.run(post_twice('/dispositivos', {'nome': 'SW', 'serial': 'S1'})) == [201, 409]
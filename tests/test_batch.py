@@ -0,0 +1,165 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app import create_app
+from extensions import db
+from models import Dispositivo
+from stats import dispositivo_stats
+from tests.conftest import TestConfig
+
+
+def _seed(client, auth_header, total=6):
+    rede = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    energia = client.post('/categorias', json={'nome': 'Energia'}, headers=auth_header).get_json()
+    ids = [
+        client.post('/dispositivos', json={
+            'nome': f'Switch {i}', 'serial': f'S{i}', 'categoria_id': rede['id'] if i % 2 else energia['id'],
+        }, headers=auth_header).get_json()['id']
+        for i in range(total)
+    ]
+    return rede, energia, ids
+
+
+def _list(client, auth_header, **params):
+    return client.get('/dispositivos', query_string={'limit': 100, **params},
+                      headers=auth_header).get_json()['items']
+
+
+def test_patch_por_ids_em_um_update(client, auth_header, statements):
+    _, energia, ids = _seed(client, auth_header)
+
+    statements.clear()
+    response = client.patch('/dispositivos/batch', json={'ids': ids[:3], 'status': 'inativo'},
+                            headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json() == {'updated': 3}
+    assert sum(s.startswith('UPDATE dispositivo') for s in statements) == 1
+
+    inativos = _list(client, auth_header, status='inativo')
+    assert sorted(d['id'] for d in inativos) == ids[:3]
+
+
+def test_patch_por_filtros(client, auth_header):
+    rede, energia, ids = _seed(client, auth_header)
+
+    response = client.patch('/dispositivos/batch', query_string={'categoria_id': rede['id']},
+                            json={'categoria_id': energia['id'], 'status': 'inativo'}, headers=auth_header)
+    assert response.get_json() == {'updated': 3}
+
+    items = _list(client, auth_header)
+    assert all(d['categoria_nome'] == 'Energia' for d in items)
+    assert sum(d['status'] == 'inativo' for d in items) == 3
+
+    stats = client.get('/dispositivos/stats', headers=auth_header).get_json()
+    assert stats['por_status'] == {'ativo': 3, 'inativo': 3}
+    assert [(c['categoria_id'], c['total']) for c in stats['por_categoria']] == [(energia['id'], 6)]
+
+
+def test_patch_por_busca(client, auth_header):
+    _seed(client, auth_header)
+    client.post('/dispositivos', json={'nome': 'Roteador', 'serial': 'R1'}, headers=auth_header)
+
+    response = client.patch('/dispositivos/batch', query_string={'busca': 'Switch'},
+                            json={'status': 'inativo'}, headers=auth_header)
+    assert response.get_json() == {'updated': 6}
+    assert [d['nome'] for d in _list(client, auth_header, status='ativo')] == ['Roteador']
+
+
+def test_patch_validacoes(client, auth_header):
+    _, _, ids = _seed(client, auth_header, total=2)
+
+    sem_seletor = client.patch('/dispositivos/batch', json={'status': 'inativo'}, headers=auth_header)
+    assert sem_seletor.status_code == 400
+
+    serial = client.patch('/dispositivos/batch', json={'ids': ids, 'serial': 'X'}, headers=auth_header)
+    assert serial.status_code == 400
+
+    status = client.patch('/dispositivos/batch', json={'ids': ids, 'status': 'quebrado'}, headers=auth_header)
+    assert status.status_code == 400
+    assert 'status' in status.get_json()['errors']
+
+    ids_invalidos = client.patch('/dispositivos/batch', json={'ids': ['a'], 'status': 'inativo'},
+                                 headers=auth_header)
+    assert 'ids' in ids_invalidos.get_json()['errors']
+
+    categoria = client.patch('/dispositivos/batch', json={'ids': ids, 'categoria_id': 999}, headers=auth_header)
+    assert categoria.status_code == 400
+
+    vazio = client.patch('/dispositivos/batch', json={'ids': ids}, headers=auth_header)
+    assert vazio.status_code == 400
+
+
+def test_delete_por_filtros_e_ids(client, auth_header):
+    rede, _, ids = _seed(client, auth_header)
+
+    response = client.delete('/dispositivos/batch', query_string={'categoria_id': rede['id']}, headers=auth_header)
+    assert response.get_json() == {'deleted': 3}
+
+    # ids já removidos pelo lote anterior são simplesmente ignorados
+    response = client.delete('/dispositivos/batch', json={'ids': ids[:2]}, headers=auth_header)
+    assert response.get_json() == {'deleted': 1}
+
+    assert len(_list(client, auth_header)) == 2
+    stats = client.get('/dispositivos/stats', headers=auth_header).get_json()
+    assert stats['total'] == 2
+    assert sum(d['total'] for d in stats['criados_por_dia']) == 2
+
+    assert client.delete('/dispositivos/batch', headers=auth_header).status_code == 400
+
+
+def test_lote_invalida_cache_do_item(client, auth_header):
+    _, _, ids = _seed(client, auth_header, total=1)
+    assert client.get(f'/dispositivos/{ids[0]}', headers=auth_header).get_json()['status'] == 'ativo'
+
+    client.patch('/dispositivos/batch', json={'ids': ids, 'status': 'inativo'}, headers=auth_header)
+    assert client.get(f'/dispositivos/{ids[0]}', headers=auth_header).get_json()['status'] == 'inativo'
+
+
+@pytest.mark.parametrize('method, body, marker', [
+    ('patch', {'status': 'inativo'}, 'UPDATE dispositivo'),
+    ('delete', None, 'DELETE FROM dispositivo'),
+])
+def test_lote_com_escrita_concorrente_nao_desvia_estatisticas(tmp_path, method, body, marker):
+    path = tmp_path / 'lote.db'
+    config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'testuser', 'password': 'password'}).get_json()
+    auth_header = {'Authorization': f"Bearer {token['access_token']}"}
+    rede, _, ids = _seed(client, auth_header)
+
+    # outro worker remove um dispositivo do conjunto (com o delta dele) bem antes
+    # do UPDATE/DELETE em lote: ou espera o lote, ou o lote conta sem ele
+    def concorrente(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(marker):
+            return
+        other = sqlite3.connect(path, timeout=0.2)
+        try:
+            with other:
+                other.execute("UPDATE estatistica_dispositivo SET total = total - 1 "
+                              "WHERE status = 'ativo' AND categoria_id = ?", (rede['id'],))
+                other.execute('DELETE FROM dispositivo WHERE id = ?', (ids[1],))
+        except sqlite3.OperationalError:
+            pass  # travado pelo lote
+        finally:
+            other.close()
+
+    event.listen(engine, 'before_cursor_execute', concorrente)
+    try:
+        response = getattr(client, method)('/dispositivos/batch', query_string={'categoria_id': rede['id']},
+                                           json=body, headers=auth_header)
+    finally:
+        event.remove(engine, 'before_cursor_execute', concorrente)
+    assert response.status_code == 200
+
+    with app.app_context():
+        real = dict(db.session.execute(
+            select(Dispositivo.status, func.count()).group_by(Dispositivo.status)).all())
+        assert {k: v for k, v in dispositivo_stats()['por_status'].items() if v} == real
+        db.engine.dispose()
@@ -0,0 +1,63 @@
+import json
+
+
+def _ndjson(rows):
+    return '\n'.join(json.dumps(row) for row in rows) + '\n'
+
+
+def test_bulk_ndjson_insere_e_reporta_erros_por_linha(app, client, auth_header):
+    app.config['BULK_IMPORT_CHUNK_SIZE'] = 2
+    cat = client.post('/categorias', json={'nome': 'Sensores'}, headers=auth_header).get_json()
+    client.post('/dispositivos', json={'nome': 'Existente', 'serial': 'SN-0'}, headers=auth_header)
+
+    body = _ndjson([
+        {'nome': 'A', 'serial': 'SN-1', 'categoria_id': cat['id']},
+        {'nome': 'B', 'serial': 'SN-0'},                       # serial já no banco
+        {'nome': 'C', 'serial': 'SN-2', 'status': 'quebrado'},  # status inválido
+        {'nome': 'D', 'serial': 'SN-1'},                       # repetido em outro lote
+        {'nome': 'E', 'serial': 'SN-3', 'categoria_id': 999},  # categoria inexistente
+        {'nome': 'F', 'serial': 'SN-4', 'status': 'inativo'},
+    ]) + '{quebrado\n'
+
+    response = client.post('/dispositivos/bulk', data=body, content_type='application/x-ndjson',
+                           headers=auth_header)
+
+    report = response.get_json()
+    assert response.status_code == 200
+    assert report['inserted'] == 2
+    assert report['rejected'] == 5
+    assert sorted(error['line'] for error in report['errors']) == [2, 3, 4, 5, 7]
+
+    listed = client.get('/dispositivos', query_string={'limit': 50}, headers=auth_header).get_json()
+    assert {item['serial'] for item in listed['items']} == {'SN-0', 'SN-1', 'SN-4'}
+
+
+def test_bulk_csv(client, auth_header):
+    body = 'nome,serial,status,categoria_id\nRoteador,RT-1,ativo,\nSwitch,SW-1,,\nSemSerial,,,\n'
+
+    response = client.post('/dispositivos/bulk', data=body, content_type='text/csv', headers=auth_header)
+
+    report = response.get_json()
+    assert report['inserted'] == 2
+    assert report['errors'][0]['line'] == 4
+    assert 'serial' in report['errors'][0]['errors']
+
+
+def test_bulk_csv_fora_de_utf8(client, auth_header):
+    # Exportado pelo Excel em Windows-1252: "Câmera" não é UTF-8 válido
+    body = 'nome,serial\nRoteador,RT-1\nCâmera,CAM-1\n'.encode('cp1252')
+
+    response = client.post('/dispositivos/bulk', data=body, content_type='text/csv', headers=auth_header)
+    assert response.status_code == 400
+    assert response.get_json()['line'] == 3
+    assert 'UTF-8' in response.get_json()['msg']
+
+    # BOM do Excel em UTF-8 é aceito
+    body = '\ufeffnome,serial\nCâmera,CAM-2\n'.encode('utf-8')
+    response = client.post('/dispositivos/bulk', data=body, content_type='text/csv', headers=auth_header)
+    assert response.get_json()['inserted'] == 1
+
+
+def test_bulk_formato_nao_suportado(client, auth_header):
+    response = client.post('/dispositivos/bulk', json=[{'nome': 'A', 'serial': 'X'}], headers=auth_header)
+    assert response.status_code == 415
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from extensions import db
+from models import Dispositivo
+from search import apply_search, fts5_query, search_backend
+
+
+def _seed(client, auth_header):
+    for nome, serial in [('Servidor de Arquivos', 'SRV-CAM'), ('Switch Core', 'SW-0100'),
+                         ('Câmera Portaria', 'CAM-0001'), ('Câmera Garagem', 'CAM-0002')]:
+        client.post('/dispositivos', json={'nome': nome, 'serial': serial}, headers=auth_header)
+
+
+def _seriais(client, auth_header, **params):
+    response = client.get('/dispositivos', query_string=params, headers=auth_header)
+    assert response.status_code == 200
+    return [item['serial'] for item in response.get_json()['items']]
+
+
+def test_backend_fts5_no_sqlite(app):
+    with app.app_context():
+        assert search_backend() == 'fts5'
+
+
+def test_busca_por_prefixo_no_serial_e_no_nome(client, auth_header):
+    _seed(client, auth_header)
+
+    assert _seriais(client, auth_header, busca='CAM-000', sort='id') == ['CAM-0001', 'CAM-0002']
+    assert _seriais(client, auth_header, busca='camera gar') == ['CAM-0002']
+    assert _seriais(client, auth_header, busca='sw', cursor='') == ['SW-0100']
+
+
+def test_busca_ordena_por_relevancia_sem_sort_explicito(client, auth_header):
+    _seed(client, auth_header)
+
+    # as câmeras casam "cam" no nome e no serial; o servidor só no serial
+    resultado = _seriais(client, auth_header, busca='cam')
+    assert set(resultado[:2]) == {'CAM-0001', 'CAM-0002'}
+    assert resultado[2] == 'SRV-CAM'
+
+    assert _seriais(client, auth_header, busca='cam', sort='id') == ['SRV-CAM', 'CAM-0001', 'CAM-0002']
+
+
+def test_indice_acompanha_update_e_delete(client, auth_header):
+    _seed(client, auth_header)
+
+    client.patch('/dispositivos/2', json={'nome': 'Roteador Borda'}, headers=auth_header)
+    client.delete('/dispositivos/3', headers=auth_header)
+
+    assert _seriais(client, auth_header, busca='switch') == []
+    assert _seriais(client, auth_header, busca='roteador') == ['SW-0100']
+    assert _seriais(client, auth_header, busca='portaria') == []
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('SRV-0', '"SRV-0"*'),
+    ('camera  sala', '"camera"* "sala"*'),
+    ('a"b', '"a""b"*'),
+])
+def test_fts5_query(term, expected):
+    assert fts5_query(term) == expected
+
+
+
+def test_curingas_do_like_sao_literais(app, client, auth_header):
+    for serial in ('A_1', 'AB1', '100%', '1000', 'C\\1', 'C11'):
+        client.post('/dispositivos', json={'nome': 'X', 'serial': serial}, headers=auth_header)
+
+    with app.app_context():
+        query = db.session.query(Dispositivo.serial).order_by(Dispositivo.id)
+
+        def buscar(term):
+            return [serial for serial, in apply_search(query, term, backend='like')]
+
+        assert buscar('A_1') == ['A_1']
+        assert buscar('0%') == ['100%']
+        assert buscar('C\\1') == ['C\\1']
+
+
+def test_prefixo_do_serial_no_postgres_escapa_curingas(app):
+    with app.app_context():
+        query = apply_search(db.session.query(Dispositivo.id), '10_%', backend='postgres')
+        compiled = query.statement.compile(dialect=postgresql.dialect())
+    assert "ESCAPE '\\'" in str(compiled)
+    assert '10\\_\\%%' in compiled.params.values()
@@ -0,0 +1,107 @@
+import pytest
+
+from cache import LRUCache, RedisCache
+
+
+class FakeRedis:
+    """Implementa só o pedaço da API do redis-py usado pelo RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def backend(request, app):
+    if request.param == 'redis':
+        app.extensions['response_cache'].backend = RedisCache(FakeRedis())
+    return app.extensions['response_cache']
+
+
+def test_list_categorias_hit_miss_e_invalidacao(client, auth_header, backend):
+    client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+
+    assert len(client.get('/categorias', headers=auth_header).get_json()) == 1
+    assert len(client.get('/categorias', headers=auth_header).get_json()) == 1
+    assert backend.misses['categorias'] == 1
+    assert backend.hits['categorias'] == 1
+
+    client.post('/categorias', json={'nome': 'Energia'}, headers=auth_header)
+    assert len(client.get('/categorias', headers=auth_header).get_json()) == 2
+    assert backend.misses['categorias'] == 2
+
+
+def test_renomear_categoria_invalida_dispositivos(client, auth_header, backend):
+    cat = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    dev = client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1', 'categoria_id': cat['id']},
+                      headers=auth_header).get_json()
+
+    assert client.get(f"/dispositivos/{dev['id']}", headers=auth_header).get_json()['categoria_nome'] == 'Rede'
+    assert client.get('/dispositivos', headers=auth_header).get_json()['items'][0]['categoria_nome'] == 'Rede'
+
+    client.patch(f"/categorias/{cat['id']}", json={'nome': 'Redes'}, headers=auth_header)
+
+    assert client.get(f"/categorias/{cat['id']}", headers=auth_header).get_json()['nome'] == 'Redes'
+    assert client.get(f"/dispositivos/{dev['id']}", headers=auth_header).get_json()['categoria_nome'] == 'Redes'
+    assert client.get('/dispositivos', headers=auth_header).get_json()['items'][0]['categoria_nome'] == 'Redes'
+
+
+def test_update_delete_e_bulk_invalidam_dispositivos(client, auth_header, backend):
+    dev = client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1'}, headers=auth_header).get_json()
+    client.get(f"/dispositivos/{dev['id']}", headers=auth_header)
+    client.get('/dispositivos', headers=auth_header)
+
+    client.patch(f"/dispositivos/{dev['id']}", json={'status': 'inativo'}, headers=auth_header)
+    assert client.get(f"/dispositivos/{dev['id']}", headers=auth_header).get_json()['status'] == 'inativo'
+    assert client.get('/dispositivos', headers=auth_header).get_json()['items'][0]['status'] == 'inativo'
+
+    client.post('/dispositivos/bulk', data='{"nome": "R", "serial": "R1"}\n',
+                content_type='application/x-ndjson', headers=auth_header)
+    assert client.get('/dispositivos', headers=auth_header).get_json()['pagination']['total_records'] == 2
+
+    client.delete(f"/dispositivos/{dev['id']}", headers=auth_header)
+    assert client.get(f"/dispositivos/{dev['id']}", headers=auth_header).status_code == 404
+
+
+def test_cache_stats(client, auth_header):
+    client.get('/categorias', headers=auth_header)
+    client.get('/categorias', headers=auth_header)
+
+    stats = client.get('/cache/stats', headers=auth_header).get_json()
+    assert stats['backend'] == 'lru'
+    assert stats['hits']['categorias'] == 1
+    assert stats['misses']['categorias'] == 1
+
+
+def test_lru_respeita_limite_e_ttl():
+    lru = LRUCache(max_entries=2)
+    lru.set('a', 1, ttl=60)
+    lru.set('b', 2, ttl=60)
+    lru.get('a')
+    lru.set('c', 3, ttl=60)
+
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+
+    lru.set('d', 4, ttl=-1)
+    assert lru.get('d') is None
+
+
+def test_cache_stats_sem_entries_no_redis(client, auth_header, backend):
+    client.get('/categorias', headers=auth_header)
+    stats = client.get('/cache/stats', headers=auth_header).get_json()
+    if backend.backend.name == 'redis':
+        assert 'entries' not in stats
+    else:
+        assert stats['entries'] == 1
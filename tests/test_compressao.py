@@ -0,0 +1,116 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from compress import GzipCodec, ZstdCodec, negotiate
+
+
+def _seed(client, auth_header, total):
+    body = '\n'.join(json.dumps({'nome': f'Dispositivo {i}', 'serial': f'SN-{i:04d}'}) for i in range(total))
+    client.post('/dispositivos/bulk', data=body,
+                headers={**auth_header, 'Content-Type': 'application/x-ndjson'})
+
+
+def _gzip(headers):
+    return {**headers, 'Accept-Encoding': 'gzip'}
+
+
+class _Codec:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_negociacao():
+    codecs = [_Codec('zstd'), _Codec('br'), _Codec('gzip')]
+
+    def pick(header):
+        codec = negotiate(parse_accept_header(header, Accept), codecs)
+        return codec.name if codec else None
+
+    assert pick('gzip, deflate, br') == 'br'
+    assert pick('gzip;q=1.0, br;q=0.5') == 'gzip'
+    assert pick('*') == 'zstd'
+    assert pick('gzip;q=0') is None
+    assert pick('deflate') is None
+
+
+def test_lista_grande_comprimida(client, auth_header):
+    _seed(client, auth_header, 100)
+    plain = client.get('/dispositivos?limit=100', headers=auth_header)
+    response = client.get('/dispositivos?limit=100', headers=_gzip(auth_header))
+
+    assert 'Content-Encoding' not in plain.headers
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.data) / 4
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+
+def test_corpo_pequeno_sem_compressao(client, auth_header):
+    response = client.get('/categorias', headers=_gzip(auth_header))
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_revalidacao_com_etag_comprimido(client, auth_header):
+    _seed(client, auth_header, 50)
+    etag = client.get('/dispositivos?limit=50', headers=_gzip(auth_header)).headers['ETag']
+
+    response = client.get('/dispositivos?limit=50', headers={**_gzip(auth_header), 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_cache_de_corpos_comprimidos(client, auth_header, app, monkeypatch):
+    _seed(client, auth_header, 50)
+    calls = []
+    original = GzipCodec.compress
+    monkeypatch.setattr(GzipCodec, 'compress', lambda self, data: calls.append(1) or original(self, data))
+
+    first = client.get('/dispositivos?limit=50', headers=_gzip(auth_header))
+    second = client.get('/dispositivos?limit=50', headers=_gzip(auth_header))
+    assert first.data == second.data
+    assert len(calls) == 1
+
+    client.patch('/dispositivos/1', json={'nome': 'Renomeado'}, headers=auth_header)
+    third = client.get('/dispositivos?limit=50', headers=_gzip(auth_header))
+    assert b'Renomeado' in gzip.decompress(third.data)
+    assert len(calls) == 2
+
+    stats = client.get('/cache/stats', headers=auth_header).get_json()['compression']
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+
+def test_exportacao_comprimida_em_streaming(client, auth_header):
+    _seed(client, auth_header, 30)
+    response = client.get('/dispositivos/export', headers=_gzip(auth_header))
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+    assert len(lines) == 30
+
+    # ?gzip=true já vem comprimido: não comprime de novo
+    response = client.get('/dispositivos/export?gzip=true', headers=_gzip(auth_header))
+    assert 'Content-Encoding' not in response.headers
+    assert len(gzip.decompress(response.data).decode('utf-8').splitlines()) == 30
+
+
+def test_zstd_em_threads_simultaneas():
+    zstandard = pytest.importorskip('zstandard')
+    codec = ZstdCodec(3)
+    bodies = [json.dumps([{'id': i, 'serial': f'S{n}-{i}'} for i in range(2000)]).encode() for n in range(8)]
+
+    def roundtrip(body):
+        write, finish = codec.stream()
+        streamed = b''.join(write(body[i:i + 4096]) for i in range(0, len(body), 4096)) + finish()
+        decompressor = zstandard.ZstdDecompressor()
+        return (decompressor.decompress(codec.compress(body)) == body
+                and decompressor.decompressobj().decompress(streamed) == body)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(roundtrip, bodies * 4))
@@ -0,0 +1,77 @@
+import multiprocessing
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from database import engine_options
+from extensions import db
+from models import Dispositivo
+from tests.conftest import TestConfig
+
+PROCESSOS = 4
+ESCRITAS = 40
+
+
+def _escritor(config, worker, erros):
+    app = create_app(config)
+    with app.app_context():
+        for i in range(ESCRITAS):
+            try:
+                db.session.add(Dispositivo(nome=f'W{worker}', serial=f'W{worker}-{i}'))
+                db.session.commit()
+                # leitura entre escritas, como uma listagem concorrente
+                db.session.execute(text('SELECT COUNT(*) FROM dispositivo')).scalar()
+            except Exception as exc:  # noqa: BLE001 - o teste quer contar qualquer falha
+                db.session.rollback()
+                erros.put(repr(exc))
+
+
+@pytest.fixture
+def file_config(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'concorrencia.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+    return FileConfig
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='usa fork')
+def test_escritas_concorrentes_sem_database_locked(file_config):
+    context = multiprocessing.get_context('fork')
+    erros = context.Queue()
+    processos = [context.Process(target=_escritor, args=(file_config, n, erros)) for n in range(PROCESSOS)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(timeout=60)
+
+    falhas = []
+    while not erros.empty():
+        falhas.append(erros.get())
+    assert falhas == []
+
+    app = create_app(file_config)
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        assert Dispositivo.query.count() == PROCESSOS * ESCRITAS
+
+
+def test_engine_options():
+    config = {name: getattr(TestConfig, name) for name in dir(TestConfig) if name.isupper()}
+
+    memoria = engine_options(config)
+    assert 'pool_size' not in memoria
+    assert memoria['pool_pre_ping'] is True
+
+    arquivo = engine_options({**config, 'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/x.db', 'DB_POOL_SIZE': 7})
+    assert arquivo['pool_size'] == 7
+
+    postgres = engine_options({**config, 'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@h/db',
+                               'DB_STATEMENT_TIMEOUT_MS': 2500})
+    assert postgres['connect_args'] == {'options': '-c statement_timeout=2500'}
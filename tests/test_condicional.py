@@ -0,0 +1,134 @@
+from app import create_app
+from extensions import db
+from tests.conftest import TestConfig
+
+
+def _create(client, auth_header):
+    cat = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    dev = client.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1', 'categoria_id': cat['id']},
+                      headers=auth_header).get_json()
+    return cat, dev
+
+
+def _with(headers, **extra):
+    return {**headers, **extra}
+
+
+def test_item_etag_e_304(client, auth_header, statements):
+    _, dev = _create(client, auth_header)
+    url = f"/dispositivos/{dev['id']}"
+
+    first = client.get(url, headers=auth_header)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    statements.clear()
+    again = client.get(url, headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert again.status_code == 304
+    assert len(statements) == 1  # só o fingerprint, sem carregar o dispositivo
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+    client.patch(url, json={'status': 'inativo'}, headers=auth_header)
+    changed = client.get(url, headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_if_modified_since(client, auth_header):
+    cat, _ = _create(client, auth_header)
+    url = f"/categorias/{cat['id']}"
+
+    last_modified = client.get(url, headers=auth_header).headers['Last-Modified']
+    response = client.get(url, headers=_with(auth_header, **{'If-Modified-Since': last_modified}))
+    assert response.status_code == 304
+
+    response = client.get(url, headers=_with(auth_header, **{'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}))
+    assert response.status_code == 200
+
+
+def test_renomear_categoria_muda_etag_do_dispositivo(client, auth_header):
+    cat, dev = _create(client, auth_header)
+    etag = client.get(f"/dispositivos/{dev['id']}", headers=auth_header).headers['ETag']
+
+    client.patch(f"/categorias/{cat['id']}", json={'nome': 'Redes'}, headers=auth_header)
+
+    response = client.get(f"/dispositivos/{dev['id']}", headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.get_json()['categoria_nome'] == 'Redes'
+
+
+def test_colecoes_mudam_etag_em_insert_e_delete(client, auth_header):
+    _, dev = _create(client, auth_header)
+
+    listing = client.get('/dispositivos', query_string={'status': 'ativo'}, headers=auth_header)
+    etag = listing.headers['ETag']
+    assert 'Last-Modified' not in listing.headers
+    conditional = _with(auth_header, **{'If-None-Match': etag})
+
+    assert client.get('/dispositivos', query_string={'status': 'ativo'}, headers=conditional).status_code == 304
+    # outros parâmetros = outra representação
+    assert client.get('/dispositivos', query_string={'status': 'ativo', 'limit': 5},
+                      headers=conditional).status_code == 200
+
+    client.delete(f"/dispositivos/{dev['id']}", headers=auth_header)
+    assert client.get('/dispositivos', query_string={'status': 'ativo'}, headers=conditional).status_code == 200
+
+    etag = client.get('/categorias', headers=auth_header).headers['ETag']
+    client.post('/categorias', json={'nome': 'Energia'}, headers=auth_header)
+    response = client.get('/categorias', headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+
+def test_etag_da_listagem_nao_varre_dispositivos(client, auth_header, statements):
+    cat, _ = _create(client, auth_header)
+    params = {'cursor': '', 'total': 'false', 'status': 'ativo'}
+    etag = client.get('/dispositivos', query_string=params, headers=auth_header).headers['ETag']
+
+    statements.clear()
+    response = client.get('/dispositivos', query_string=params, headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    assert len(statements) == 1
+    assert 'alteracao' in statements[0] and 'dispositivo' not in statements[0]
+
+    # renomear a categoria muda categoria_nome nas páginas
+    client.patch(f"/categorias/{cat['id']}", json={'nome': 'Redes'}, headers=auth_header)
+    response = client.get('/dispositivos', query_string=params, headers=_with(auth_header, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+
+
+def test_etag_inexistente_responde_404(client, auth_header):
+    assert client.get('/dispositivos/999', headers=auth_header).status_code == 404
+
+
+def test_worker_sem_a_escrita_nao_serve_corpo_antigo_com_etag_novo(tmp_path):
+    # dois processos no mesmo banco, cada um com o próprio cache LRU
+    config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    worker_a, worker_b = create_app(config), create_app(config)
+    with worker_a.app_context():
+        db.create_all()
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+    client_a.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    token = client_a.post('/auth/login', json={'username': 'testuser', 'password': 'password'}).get_json()
+    auth_header = {'Authorization': f"Bearer {token['access_token']}"}
+    cat, _ = _create(client_a, auth_header)
+
+    for url in (f"/categorias/{cat['id']}", '/categorias', '/dispositivos'):
+        client_b.get(url, headers=auth_header)  # cache de B com a versão antiga
+    client_a.patch(f"/categorias/{cat['id']}", json={'nome': 'Redes'}, headers=auth_header)
+
+    item = client_b.get(f"/categorias/{cat['id']}", headers=auth_header)
+    assert item.get_json()['nome'] == 'Redes'
+    assert client_b.get('/categorias', headers=auth_header).get_json()[0]['nome'] == 'Redes'
+    listing = client_b.get('/dispositivos', headers=auth_header).get_json()
+    assert listing['items'][0]['categoria_nome'] == 'Redes'
+    # revalidar com o ETag novo continua dando 304
+    again = client_b.get(f"/categorias/{cat['id']}",
+                         headers=_with(auth_header, **{'If-None-Match': item.headers['ETag']}))
+    assert again.status_code == 304
+    with worker_a.app_context():
+        db.engine.dispose()
+    with worker_b.app_context():
+        db.engine.dispose()
@@ -0,0 +1,49 @@
+import pytest
+
+
+def _seed(client, auth_header, total):
+    categorias = [client.post('/categorias', json={'nome': f'Cat {i}'}, headers=auth_header).get_json()
+                  for i in range(5)]
+    for i in range(total):
+        client.post('/dispositivos', json={
+            'nome': f'Disp {i}', 'serial': f'SN-{i:03d}', 'categoria_id': categorias[i % 5]['id'],
+        }, headers=auth_header)
+
+
+@pytest.mark.parametrize('params', [{}, {'cursor': ''}])
+def test_listagem_tem_numero_fixo_de_consultas(client, auth_header, statements, params):
+    _seed(client, auth_header, 30)
+
+    counts = []
+    for limit in (5, 30):
+        statements.clear()
+        response = client.get('/dispositivos', query_string={**params, 'limit': limit}, headers=auth_header)
+        assert all(item['categoria_nome'] for item in response.get_json()['items'])
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert not any('FROM categoria' in s and 'dispositivo' not in s for s in statements)
+
+
+def test_get_create_update_carregam_categoria_no_mesmo_select(client, auth_header, statements):
+    cat = client.post('/categorias', json={'nome': 'Rack'}, headers=auth_header).get_json()
+
+    statements.clear()
+    created = client.post('/dispositivos', json={'nome': 'D', 'serial': 'X1', 'categoria_id': cat['id']},
+                          headers=auth_header).get_json()
+    assert created['categoria_nome'] == 'Rack'
+    after_insert = statements[[s.startswith('INSERT') for s in statements].index(True) + 1:]
+    # descontando os upserts das tabelas de estatística e o log de alterações, feitos no mesmo flush
+    after_insert = [s for s in after_insert if 'estatistica_' not in s and 'INTO alteracao' not in s]
+    assert len(after_insert) == 1 and 'JOIN categoria' in after_insert[0]
+
+    statements.clear()
+    client.get(f"/dispositivos/{created['id']}", headers=auth_header)
+    # fingerprint do ETag (só colunas) + o SELECT com JOIN
+    assert len(statements) == 2
+    assert all('JOIN categoria' in s for s in statements)
+
+    statements.clear()
+    updated = client.patch(f"/dispositivos/{created['id']}", json={'nome': 'D2'}, headers=auth_header).get_json()
+    assert updated['categoria_nome'] == 'Rack'
+    assert len([s for s in statements if 'INTO alteracao' not in s]) == 3
@@ -0,0 +1,114 @@
+import re
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app
+from extensions import db
+from models import Dispositivo
+from stats import dispositivo_stats
+from tests.conftest import TestConfig
+
+
+def _stats(client, auth_header):
+    response = client.get('/dispositivos/stats', headers=auth_header)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _seed(client, auth_header):
+    rede = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    energia = client.post('/categorias', json={'nome': 'Energia'}, headers=auth_header).get_json()
+    ids = []
+    for i, (status, categoria) in enumerate([('ativo', rede), ('ativo', rede), ('inativo', rede),
+                                              ('ativo', energia), ('inativo', None)]):
+        payload = {'nome': f'D{i}', 'serial': f'S{i}', 'status': status}
+        if categoria:
+            payload['categoria_id'] = categoria['id']
+        ids.append(client.post('/dispositivos', json=payload, headers=auth_header).get_json()['id'])
+    return rede, energia, ids
+
+
+def test_stats_acompanham_insert_update_delete(client, auth_header):
+    rede, energia, ids = _seed(client, auth_header)
+
+    stats = _stats(client, auth_header)
+    assert stats['total'] == 5
+    assert stats['por_status'] == {'ativo': 3, 'inativo': 2}
+    por_categoria = {c['categoria_id']: (c['categoria_nome'], c['total']) for c in stats['por_categoria']}
+    assert por_categoria == {rede['id']: ('Rede', 3), energia['id']: ('Energia', 1), None: (None, 1)}
+    assert {'status': 'inativo', 'categoria_id': rede['id'], 'total': 1} in stats['por_status_categoria']
+    assert sum(d['total'] for d in stats['criados_por_dia']) == 5
+
+    client.patch(f'/dispositivos/{ids[0]}', json={'status': 'inativo', 'categoria_id': energia['id']},
+                 headers=auth_header)
+    client.delete(f'/dispositivos/{ids[4]}', headers=auth_header)
+
+    stats = _stats(client, auth_header)
+    assert stats['total'] == 4
+    assert stats['por_status'] == {'ativo': 2, 'inativo': 2}
+    por_categoria = {c['categoria_id']: c['total'] for c in stats['por_categoria']}
+    assert por_categoria == {rede['id']: 2, energia['id']: 2}
+
+
+def test_stats_incluem_importacao_em_lote(client, auth_header):
+    body = '\n'.join(f'{{"nome": "B{i}", "serial": "B{i}", "status": "inativo"}}' for i in range(10))
+    client.post('/dispositivos/bulk', data=body, content_type='application/x-ndjson', headers=auth_header)
+
+    assert _stats(client, auth_header)['por_status'] == {'inativo': 10}
+
+
+def test_stats_nao_leem_a_tabela_de_dispositivos(client, auth_header, statements):
+    _seed(client, auth_header)
+
+    statements.clear()
+    _stats(client, auth_header)
+    assert statements
+    assert not any(re.search(r'\bdispositivo\b', s) for s in statements)
+
+
+def test_rebuild_reconcilia(app, client, auth_header):
+    _seed(client, auth_header)
+    esperado = _stats(client, auth_header)
+
+    with app.app_context():
+        # Desvio simulado: alteração feita por fora da aplicação
+        db.session.execute(db.text("UPDATE estatistica_dispositivo SET total = total + 7"))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['stats', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    assert _stats(client, auth_header) == esperado
+
+
+def test_rollback_desfaz_os_deltas(app, client, auth_header):
+    _seed(client, auth_header)
+
+    with app.app_context():
+        esperado = dispositivo_stats()
+        # o primeiro INSERT (e seus deltas) acontece; o segundo viola o serial único
+        db.session.add_all([Dispositivo(nome='Novo', serial='NOVO'), Dispositivo(nome='X', serial='S0')])
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        assert dispositivo_stats() == esperado
+
+
+def test_cache_de_outro_worker_nao_segura_stats_antigas(tmp_path):
+    # cada worker com o próprio cache LRU: a invalidação só roda no que escreveu
+    config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    worker_a, worker_b = create_app(config), create_app(config)
+    with worker_a.app_context():
+        db.create_all()
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+    client_a.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    token = client_a.post('/auth/login', json={'username': 'testuser', 'password': 'password'}).get_json()
+    auth_header = {'Authorization': f"Bearer {token['access_token']}"}
+
+    assert _stats(client_b, auth_header)['total'] == 0
+    client_a.post('/dispositivos', json={'nome': 'SW', 'serial': 'S1'}, headers=auth_header)
+    assert _stats(client_b, auth_header)['total'] == 1
+    with worker_a.app_context():
+        db.engine.dispose()
+    with worker_b.app_context():
+        db.engine.dispose()
@@ -0,0 +1,69 @@
+import pytest
+
+
+def _seed(client, auth_header, total=3):
+    origem = client.post('/categorias', json={'nome': 'Origem'}, headers=auth_header).get_json()
+    destino = client.post('/categorias', json={'nome': 'Destino'}, headers=auth_header).get_json()
+    for i in range(total):
+        client.post('/dispositivos', json={'nome': f'D{i}', 'serial': f'S{i}', 'categoria_id': origem['id']},
+                    headers=auth_header)
+    return origem, destino
+
+
+def _items(client, auth_header):
+    return client.get('/dispositivos', query_string={'limit': 100}, headers=auth_header).get_json()['items']
+
+
+def test_guarda_usa_exists_em_vez_de_count(client, auth_header, statements):
+    origem, _ = _seed(client, auth_header)
+
+    statements.clear()
+    response = client.delete(f"/categorias/{origem['id']}", headers=auth_header)
+    assert response.status_code == 400
+    assert any('EXISTS' in s for s in statements)
+    assert not any('count(' in s.lower() for s in statements)
+
+
+def test_reatribuir_move_dispositivos_e_exclui(client, auth_header):
+    origem, destino = _seed(client, auth_header)
+
+    response = client.delete(f"/categorias/{origem['id']}",
+                             query_string={'dispositivos': 'reatribuir', 'destino': destino['id']},
+                             headers=auth_header)
+    assert response.status_code == 204
+    assert client.get(f"/categorias/{origem['id']}", headers=auth_header).status_code == 404
+    assert [d['categoria_nome'] for d in _items(client, auth_header)] == ['Destino'] * 3
+
+    stats = client.get('/dispositivos/stats', headers=auth_header).get_json()
+    assert [(c['categoria_id'], c['total']) for c in stats['por_categoria']] == [(destino['id'], 3)]
+
+
+def test_desvincular_e_excluir(client, auth_header):
+    origem, destino = _seed(client, auth_header)
+    client.post('/dispositivos', json={'nome': 'Outro', 'serial': 'X', 'categoria_id': destino['id']},
+                headers=auth_header)
+
+    response = client.delete(f"/categorias/{origem['id']}", query_string={'dispositivos': 'desvincular'},
+                             headers=auth_header)
+    assert response.status_code == 204
+    assert sorted(d['categoria_id'] is None for d in _items(client, auth_header)) == [False, True, True, True]
+
+    response = client.delete(f"/categorias/{destino['id']}", query_string={'dispositivos': 'excluir'},
+                             headers=auth_header)
+    assert response.status_code == 204
+    assert [d['nome'] for d in _items(client, auth_header)] == ['D0', 'D1', 'D2']
+    assert client.get('/dispositivos/stats', headers=auth_header).get_json()['total'] == 3
+
+
+@pytest.mark.parametrize('params', [
+    {'dispositivos': 'reatribuir'},
+    {'dispositivos': 'reatribuir', 'destino': 999},
+    {'dispositivos': 'qualquer'},
+])
+def test_opcoes_invalidas_nao_alteram_nada(client, auth_header, params):
+    origem, _ = _seed(client, auth_header)
+
+    response = client.delete(f"/categorias/{origem['id']}", query_string=params, headers=auth_header)
+    assert response.status_code == 400
+    assert client.get(f"/categorias/{origem['id']}", headers=auth_header).status_code == 200
+    assert len(_items(client, auth_header)) == 3
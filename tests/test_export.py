@@ -0,0 +1,39 @@
+import csv
+import gzip
+import io
+import json
+
+
+def _seed(client, auth_header):
+    cat = client.post('/categorias', json={'nome': 'Câmeras'}, headers=auth_header).get_json()
+    for i in range(5):
+        client.post('/dispositivos', json={
+            'nome': f'Cam {i}', 'serial': f'CAM-{i}', 'status': 'ativo' if i % 2 else 'inativo',
+            'categoria_id': cat['id'] if i < 3 else None,
+        }, headers=auth_header)
+
+
+def test_export_ndjson_com_filtro(app, client, auth_header):
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    _seed(client, auth_header)
+
+    response = client.get('/dispositivos/export', query_string={'status': 'ativo'}, headers=auth_header)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['serial'] for row in rows] == ['CAM-1', 'CAM-3']
+    assert rows[0]['categoria_nome'] == 'Câmeras'
+    assert rows[1]['categoria_nome'] is None
+
+
+def test_export_csv_gzip(client, auth_header):
+    _seed(client, auth_header)
+
+    response = client.get('/dispositivos/export', query_string={'format': 'csv', 'gzip': 'true'},
+                          headers=auth_header)
+
+    assert response.mimetype == 'application/gzip'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.data).decode('utf-8'))))
+    assert len(rows) == 5
+    assert rows[0]['serial'] == 'CAM-0'
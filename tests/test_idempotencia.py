@@ -0,0 +1,146 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from extensions import db
+from models import Categoria, ChaveIdempotencia, Dispositivo
+from schemas import dispositivo_schema
+from tests.conftest import TestConfig
+
+
+@pytest.fixture(params=['database', 'memory'])
+def app(request):
+    app = create_app(type('Config', (TestConfig,), {'IDEMPOTENCY_STORE': request.param}))
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _post(client, auth_header, key, payload, path='/dispositivos'):
+    return client.post(path, json=payload, headers={**auth_header, 'Idempotency-Key': key})
+
+
+def test_retry_repete_a_primeira_resposta(client, auth_header, app, statements):
+    payload = {'nome': 'Sensor', 'serial': 'SN-1'}
+    first = _post(client, auth_header, 'k-1', payload)
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    statements.clear()
+    retry = _post(client, auth_header, 'k-1', payload)
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert not any('INSERT INTO dispositivo' in s for s in statements)
+
+    with app.app_context():
+        assert Dispositivo.query.count() == 1
+
+
+def test_mesma_chave_com_outro_corpo(client, auth_header):
+    _post(client, auth_header, 'k-1', {'nome': 'Sensor', 'serial': 'SN-1'})
+    response = _post(client, auth_header, 'k-1', {'nome': 'Sensor', 'serial': 'SN-2'})
+    assert response.status_code == 422
+
+
+def test_erro_4xx_tambem_e_repetido(client, auth_header):
+    first = _post(client, auth_header, 'k-1', {'nome': 'Sem serial'})
+    assert first.status_code == 400
+    retry = _post(client, auth_header, 'k-1', {'nome': 'Sem serial'})
+    assert retry.status_code == 400
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_chave_por_usuario_e_rota(client, auth_header):
+    assert _post(client, auth_header, 'k-1', {'nome': 'Rede'}, path='/categorias').status_code == 201
+    assert _post(client, auth_header, 'k-1', {'nome': 'Sensor', 'serial': 'SN-1'}).status_code == 201
+
+    client.post('/auth/register', json={'username': 'outro', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'outro', 'password': 'password'}).get_json()['access_token']
+    response = _post(client, {'Authorization': f'Bearer {token}'}, 'k-1', {'nome': 'Sensor', 'serial': 'SN-1'})
+    assert response.status_code == 409
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+def test_requisicao_em_andamento(client, auth_header, app):
+    payload = {'nome': 'Sensor', 'serial': 'SN-1'}
+    store = app.extensions['idempotency']
+    original_complete = store.complete
+    store.complete = lambda *args: None  # a primeira "nunca termina"
+    try:
+        _post(client, auth_header, 'k-1', payload)
+    finally:
+        store.complete = original_complete
+    response = _post(client, auth_header, 'k-1', payload)
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_worker_que_morreu_depois_do_begin_nao_trava_a_chave(client, auth_header, app, monkeypatch):
+    payload = {'nome': 'Sensor', 'serial': 'SN-1'}
+    app.config['IDEMPOTENCY_LEASE_SECONDS'] = 0.2
+    store = app.extensions['idempotency']
+
+    # o worker reserva a chave e morre no meio da view, sem completar nem liberar
+    def morre(data):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(dispositivo_schema, 'load', morre)
+        patch.setattr(store, 'release', lambda key: None)
+        with pytest.raises(KeyboardInterrupt):
+            _post(client, auth_header, 'k-1', payload)
+
+    assert _post(client, auth_header, 'k-1', payload).status_code == 409
+    time.sleep(0.3)
+    retry = _post(client, auth_header, 'k-1', payload)
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+
+    # a resposta concluída fica pelo IDEMPOTENCY_TTL, não pelo lease
+    time.sleep(0.3)
+    replay = _post(client, auth_header, 'k-1', payload)
+    assert replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_sem_header_nao_guarda_nada(client, auth_header, app):
+    client.post('/dispositivos', json={'nome': 'Sensor', 'serial': 'SN-1'}, headers=auth_header)
+    with app.app_context():
+        assert ChaveIdempotencia.query.count() == 0
+
+
+def test_chave_invalida(client, auth_header):
+    assert _post(client, auth_header, 'x' * 256, {'nome': 'Rede'}, path='/categorias').status_code == 400
+
+
+def test_chave_vencida_e_reaproveitada(client, auth_header, app):
+    if app.config['IDEMPOTENCY_STORE'] != 'database':
+        pytest.skip('vencimento da tabela')
+    _post(client, auth_header, 'k-1', {'nome': 'Rede'}, path='/categorias')
+    with app.app_context():
+        db.session.query(ChaveIdempotencia).update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+    response = _post(client, auth_header, 'k-1', {'nome': 'Rede'}, path='/categorias')
+    assert response.status_code == 409  # executou de novo: nome já existe
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+def test_unicidade_pela_constraint_sem_select_previo(client, auth_header, app, statements):
+    client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    client.post('/dispositivos', json={'nome': 'Sensor', 'serial': 'SN-1'}, headers=auth_header)
+
+    statements.clear()
+    response = client.post('/dispositivos', json={'nome': 'Outro', 'serial': 'SN-1'}, headers=auth_header)
+    assert response.status_code == 409
+    assert not any(s.lstrip().startswith('SELECT') and 'dispositivo.serial' in s for s in statements)
+
+    response = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    assert response.status_code == 409
+    with app.app_context():
+        assert Categoria.query.count() == 1
+        assert Dispositivo.query.count() == 1
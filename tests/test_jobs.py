@@ -0,0 +1,236 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from app import create_app
+from extensions import db
+from models import Alteracao, Tarefa
+from tests.conftest import TestConfig
+
+
+def _seed(client, auth_header, total=7):
+    rede = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header).get_json()
+    energia = client.post('/categorias', json={'nome': 'Energia'}, headers=auth_header).get_json()
+    for i in range(total):
+        client.post('/dispositivos', json={'nome': f'Switch {i}', 'serial': f'S{i}', 'categoria_id': rede['id']},
+                    headers=auth_header)
+    return rede, energia
+
+
+def _reatribuir(client, auth_header, rede, energia):
+    return client.post('/jobs', json={'tipo': 'reatribuir_categoria', 'params': {
+        'categoria_origem_id': rede['id'], 'categoria_destino_id': energia['id'],
+    }}, headers=auth_header)
+
+
+def test_submete_e_acompanha_reatribuicao(app, client, auth_header):
+    rede, energia = _seed(client, auth_header)
+    app.config['JOBS_CHUNK_SIZE'] = 3
+
+    response = _reatribuir(client, auth_header, rede, energia)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert response.headers['Location'] == f"/jobs/{job['id']}"
+    assert job['status'] == 'pendente'
+
+    assert jobs.run_pending(app) == 1
+
+    job = client.get(f"/jobs/{job['id']}", headers=auth_header).get_json()
+    assert job['status'] == 'concluida'
+    assert job['progresso'] == {'processados': 7, 'total': 7, 'percentual': 100.0}
+    assert job['resultado'] == {'processados': 7}
+    assert job['started_at'] and job['finished_at']
+
+    # mesmo caminho do PATCH em lote: estatísticas e cache acompanham
+    stats = client.get('/dispositivos/stats', headers=auth_header).get_json()
+    assert [(c['categoria_id'], c['total']) for c in stats['por_categoria']] == [(energia['id'], 7)]
+    items = client.get('/dispositivos', query_string={'limit': 100}, headers=auth_header).get_json()['items']
+    assert all(d['categoria_nome'] == 'Energia' for d in items)
+
+
+def test_retoma_do_checkpoint_depois_de_queda(app, client, auth_header, monkeypatch):
+    rede, energia = _seed(client, auth_header)
+    app.config['JOBS_CHUNK_SIZE'] = 3
+    job_id = _reatribuir(client, auth_header, rede, energia).get_json()['id']
+
+    # o processo "morre" no meio da segunda parte, antes do commit
+    job_type = jobs.JOB_TYPES['reatribuir_categoria']
+    original_step, calls = job_type.step, []
+
+    def step_que_cai(params, checkpoint, chunk_size):
+        calls.append(checkpoint)
+        result = original_step(params, checkpoint, chunk_size)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return result
+
+    monkeypatch.setattr(job_type, 'step', step_que_cai)
+    with pytest.raises(KeyboardInterrupt):
+        jobs.run_pending(app, executor='morto')
+    monkeypatch.setattr(job_type, 'step', original_step)
+
+    with app.app_context():
+        db.session.rollback()
+        tarefa = db.session.get(Tarefa, job_id)
+        assert (tarefa.status, tarefa.processados, tarefa.executor) == ('executando', 3, 'morto')
+        # lease ainda válido: ninguém pega
+        assert jobs.run_pending(app) == 0
+        tarefa.heartbeat_at = datetime.utcnow() - timedelta(seconds=app.config['JOBS_LEASE_SECONDS'] + 1)
+        db.session.commit()
+
+    assert jobs.run_pending(app) == 1
+    job = client.get(f'/jobs/{job_id}', headers=auth_header).get_json()
+    assert job['status'] == 'concluida'
+    assert job['progresso']['processados'] == 7
+
+    with app.app_context():
+        # cada dispositivo alterado uma vez só: a parte perdida não foi gravada
+        assert db.session.query(Alteracao).filter_by(operacao='update').count() == 7
+
+
+def test_executor_que_perdeu_o_lease_nao_grava(app, client, auth_header):
+    rede, energia = _seed(client, auth_header, total=2)
+    job_id = _reatribuir(client, auth_header, rede, energia).get_json()['id']
+
+    with app.app_context():
+        assert jobs._claim('antigo', 60) == job_id
+        db.session.execute(db.update(Tarefa).values(executor='novo'))
+        db.session.commit()
+        jobs.run_job(job_id, 'antigo', 500)
+        tarefa = db.session.get(Tarefa, job_id)
+        assert (tarefa.status, tarefa.processados, tarefa.total) == ('executando', 0, None)
+
+
+def test_parte_unica_nao_faz_commit_sozinha(app, client, auth_header, monkeypatch):
+    _seed(client, auth_header, total=2)
+    job_id = client.post('/jobs', json={'tipo': 'recalcular_estatisticas'}, headers=auth_header).get_json()['id']
+
+    with app.app_context():
+        db.session.execute(db.text("UPDATE estatistica_dispositivo SET total = total + 7"))
+        db.session.commit()
+        assert jobs._claim('antigo', 60) == job_id
+        db.session.execute(db.update(Tarefa).values(total=1))
+        db.session.commit()
+
+    def perde_o_lease(params, checkpoint, chunk_size):
+        result = original_step(params, checkpoint, chunk_size)
+        # outro executor assume no meio da parte (no :memory: a conexão é uma só,
+        # então a troca vai na mesma transação em vez de num commit à parte)
+        db.session.execute(db.update(Tarefa).values(executor='novo'))
+        return result
+
+    job_type = jobs.JOB_TYPES['recalcular_estatisticas']
+    original_step = job_type.step
+    monkeypatch.setattr(job_type, 'step', perde_o_lease)
+    with app.app_context():
+        # quem perdeu o lease recalcula, mas não grava: o resultado fica para o novo dono
+        jobs.run_job(job_id, 'antigo', 500)
+        assert db.session.execute(db.text("SELECT SUM(total) FROM estatistica_dispositivo")).scalar() == 9
+
+
+def test_lease_renovado_durante_parte_longa(tmp_path, monkeypatch):
+    config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'jobs.db'}",
+                                            'JOBS_LEASE_SECONDS': 0.3})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        job_id = jobs.submit('reindexar_busca', {}).id
+
+    heartbeats = []
+
+    def step_demorado(params, checkpoint, chunk_size):
+        for _ in range(3):
+            time.sleep(0.15)
+            with db.engine.connect() as connection:
+                heartbeats.append(connection.execute(
+                    db.select(Tarefa.heartbeat_at).where(Tarefa.id == job_id)).scalar())
+            # outro executor tentando pegar a tarefa no meio da parte
+            with app.app_context():
+                assert jobs._claim('intruso', app.config['JOBS_LEASE_SECONDS']) is None
+        return None, 1, True
+
+    monkeypatch.setattr(jobs.JOB_TYPES['reindexar_busca'], 'step', step_demorado)
+    assert jobs.run_pending(app) == 1
+    assert len(set(heartbeats)) > 1
+    with app.app_context():
+        assert db.session.get(Tarefa, job_id).status == 'concluida'
+        db.engine.dispose()
+
+
+def test_falha_fica_registrada(app, client, auth_header, monkeypatch):
+    def quebra(session, commit=True):
+        raise RuntimeError('disco cheio')
+
+    monkeypatch.setattr(jobs, 'rebuild_stats', quebra)
+    job_id = client.post('/jobs', json={'tipo': 'recalcular_estatisticas'}, headers=auth_header).get_json()['id']
+    jobs.run_pending(app)
+
+    job = client.get(f'/jobs/{job_id}', headers=auth_header).get_json()
+    assert job['status'] == 'falhou'
+    assert job['erro'] == 'disco cheio'
+
+
+def test_tarefas_de_uma_parte(app, client, auth_header):
+    _seed(client, auth_header, total=2)
+    ids = [client.post('/jobs', json={'tipo': tipo}, headers=auth_header).get_json()['id']
+           for tipo in ('recalcular_estatisticas', 'reindexar_busca')]
+    assert jobs.run_pending(app) == 2
+    for job_id in ids:
+        job = client.get(f'/jobs/{job_id}', headers=auth_header).get_json()
+        assert job['status'] == 'concluida'
+        assert job['progresso']['percentual'] == 100.0
+
+
+def test_validacoes(client, auth_header):
+    response = client.post('/jobs', json={'tipo': 'apagar_tudo'}, headers=auth_header)
+    assert response.status_code == 400
+    assert 'tipo' in response.get_json()['errors']
+
+    response = client.post('/jobs', json={'tipo': 'reatribuir_categoria', 'params': {
+        'categoria_origem_id': None, 'categoria_destino_id': 999,
+    }}, headers=auth_header)
+    assert response.status_code == 400
+    assert 'categoria_destino_id' in response.get_json()['errors']
+
+    response = client.post('/jobs', json={'tipo': 'reatribuir_categoria', 'params': {}}, headers=auth_header)
+    assert response.status_code == 400
+
+
+def test_tarefa_de_outro_usuario_nao_aparece(client, auth_header):
+    job_id = client.post('/jobs', json={'tipo': 'reindexar_busca'}, headers=auth_header).get_json()['id']
+
+    client.post('/auth/register', json={'username': 'outro', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'outro', 'password': 'password'}).get_json()['access_token']
+    response = client.get(f'/jobs/{job_id}', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+    assert client.get('/jobs/999', headers=auth_header).status_code == 404
+
+
+def test_workers_em_threads_executam_sozinhos(tmp_path):
+    class ThreadedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'jobs.db'}"
+        JOBS_WORKERS = 2
+        JOBS_POLL_INTERVAL = 0.05
+
+    app = create_app(ThreadedConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
+    token = client.post('/auth/login', json={'username': 'testuser', 'password': 'password'}).get_json()['access_token']
+    auth_header = {'Authorization': f'Bearer {token}'}
+    assert app.extensions['jobs'].threads
+
+    rede, energia = _seed(client, auth_header, total=5)
+    job_id = _reatribuir(client, auth_header, rede, energia).get_json()['id']
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}', headers=auth_header).get_json()
+        if job['status'] == 'concluida':
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'concluida'
+    assert job['progresso']['processados'] == 5
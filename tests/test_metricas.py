@@ -0,0 +1,79 @@
+import re
+
+from app import create_app
+from extensions import db
+from tests.conftest import TestConfig
+
+
+def _metric(text, name, **labels):
+    rendered = ','.join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(rendered)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_server_timing_por_requisicao(client, auth_header):
+    response = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    timing = response.headers['Server-Timing']
+    assert re.search(r'app;dur=[\d.]+', timing)
+    assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', timing)
+    assert 'json;dur=' in timing and 'validation;dur=' in timing
+
+    response = client.get('/categorias', headers=auth_header)
+    assert 'desc="2 queries"' in response.headers['Server-Timing']
+
+
+def test_comando_com_erro_entra_na_medicao(client, auth_header):
+    client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    # o INSERT duplicado falha na constraint: conta como comando e não deixa timer pendurado
+    response = client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    assert response.status_code == 409
+    assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+    response = client.get('/categorias', headers=auth_header)
+    assert 'desc="2 queries"' in response.headers['Server-Timing']
+
+
+def test_metrics_em_formato_prometheus(client, auth_header):
+    client.post('/categorias', json={'nome': 'Rede'}, headers=auth_header)
+    for _ in range(3):
+        client.get('/categorias', headers=auth_header)
+    client.get('/nao-existe')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+
+    assert _metric(text, 'http_requests_total', endpoint='list_categorias', method='GET', status=200) == 3
+    assert _metric(text, 'http_requests_total', endpoint='<unmatched>', method='GET', status=404) == 1
+    assert _metric(text, 'http_request_duration_seconds_count', endpoint='list_categorias', method='GET') == 3
+    assert _metric(text, 'http_request_duration_seconds_bucket',
+                   endpoint='list_categorias', method='GET', le='+Inf') == 3
+    assert _metric(text, 'db_statements_per_request_sum', endpoint='list_categorias', method='GET') >= 3
+    assert _metric(text, 'validation_seconds_total', endpoint='create_categoria', method='POST') > 0
+    assert _metric(text, 'json_serialization_seconds_total', endpoint='create_categoria', method='POST') > 0
+
+
+def _app(**overrides):
+    app = create_app(type('MetricsConfig', (TestConfig,), overrides))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_amostragem_zero_so_conta_requisicoes():
+    client = _app(METRICS_SAMPLE_RATE=0.0).test_client()
+
+    response = client.get('/')
+    assert 'Server-Timing' not in response.headers
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert _metric(text, 'http_requests_total', endpoint='index', method='GET', status=200) == 1
+    assert _metric(text, 'http_request_duration_seconds_count', endpoint='index', method='GET') is None
+
+
+def test_desativado():
+    client = _app(METRICS_ENABLED=False).test_client()
+
+    assert 'Server-Timing' not in client.get('/').headers
+    assert 'http_requests_total{' not in client.get('/metrics').get_data(as_text=True)
@@ -0,0 +1,62 @@
+import pytest
+
+
+def _seed(client, auth_header, total=7):
+    cat = client.post('/categorias', json={'nome': 'Switches'}, headers=auth_header).get_json()
+    for i in range(total):
+        client.post('/dispositivos', json={
+            'nome': f'Disp {i % 3}',
+            'serial': f'SN-{i:03d}',
+            'status': 'ativo' if i % 2 else 'inativo',
+            # metade sem categoria para exercitar NULLs no cursor
+            'categoria_id': cat['id'] if i % 2 else None,
+        }, headers=auth_header)
+
+
+def _walk(client, auth_header, params):
+    ids, cursor = [], ''
+    while cursor is not None:
+        response = client.get('/dispositivos', query_string={**params, 'cursor': cursor, 'limit': 2},
+                              headers=auth_header)
+        assert response.status_code == 200
+        body = response.get_json()
+        ids.extend(item['id'] for item in body['items'])
+        cursor = body['pagination']['next_cursor']
+    return ids
+
+
+@pytest.mark.parametrize('sort', ['id', 'nome', 'categoria_id', 'created_at'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_percorre_todos_na_mesma_ordem_do_offset(client, auth_header, sort, order):
+    _seed(client, auth_header)
+
+    offset_ids = [item['id'] for item in client.get(
+        '/dispositivos', query_string={'sort': sort, 'order': order, 'limit': 100},
+        headers=auth_header).get_json()['items']]
+
+    assert _walk(client, auth_header, {'sort': sort, 'order': order}) == offset_ids
+    assert len(offset_ids) == 7
+
+
+def test_cursor_respeita_filtros_e_total_opcional(client, auth_header):
+    _seed(client, auth_header)
+
+    response = client.get('/dispositivos', query_string={'cursor': '', 'status': 'ativo', 'total': 'false'},
+                          headers=auth_header)
+    body = response.get_json()
+
+    assert 'total_records' not in body['pagination']
+    assert all(item['status'] == 'ativo' for item in body['items'])
+    assert _walk(client, auth_header, {'status': 'ativo'}) == [2, 4, 6]
+
+
+def test_cursor_invalido_ou_de_outra_ordenacao(client, auth_header):
+    _seed(client, auth_header)
+
+    response = client.get('/dispositivos', query_string={'cursor': 'lixo', 'limit': 2}, headers=auth_header)
+    assert response.status_code == 400
+
+    cursor = client.get('/dispositivos', query_string={'cursor': '', 'limit': 2},
+                        headers=auth_header).get_json()['pagination']['next_cursor']
+    response = client.get('/dispositivos', query_string={'cursor': cursor, 'sort': 'nome'}, headers=auth_header)
+    assert response.status_code == 400
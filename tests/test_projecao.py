@@ -0,0 +1,81 @@
+from extensions import db
+from models import Categoria, Dispositivo
+
+
+def _seed(app, total=5):
+    with app.app_context():
+        categoria = Categoria(nome='Sensores', descricao='')
+        db.session.add(categoria)
+        db.session.flush()
+        db.session.add_all([
+            Dispositivo(nome=f'Disp {i}', serial=f'SN-{i}', status='ativo' if i % 2 else 'inativo',
+                        categoria_id=categoria.id if i % 2 else None)
+            for i in range(total)
+        ])
+        db.session.commit()
+
+
+def test_fields_devolve_so_as_colunas_pedidas(client, auth_header, app, statements):
+    _seed(app)
+    completo = client.get('/dispositivos', headers=auth_header).get_json()['items']
+
+    statements.clear()
+    response = client.get('/dispositivos?fields=id,serial,status', headers=auth_header)
+    assert response.status_code == 200
+    items = response.get_json()['items']
+    assert items == [{k: item[k] for k in ('id', 'serial', 'status')} for item in completo]
+
+    page = next(s for s in statements if 'LIMIT' in s and 'FROM dispositivo' in s)
+    assert 'JOIN categoria' not in page
+    assert 'dispositivo.nome' not in page and 'dispositivo.created_at' not in page
+
+
+def test_fields_com_categoria_nome(client, auth_header, app):
+    _seed(app)
+    items = client.get('/dispositivos?fields=categoria_nome,id&total=false', headers=auth_header).get_json()['items']
+    assert items[0] == {'id': 1, 'categoria_nome': None}
+    assert items[1] == {'id': 2, 'categoria_nome': 'Sensores'}
+
+
+def test_fields_com_filtros_ordenacao_e_cursor(client, auth_header, app):
+    _seed(app, total=7)
+    url = '/dispositivos?fields=serial&sort=nome&order=desc&status=ativo&limit=2&cursor='
+    first = client.get(url, headers=auth_header).get_json()
+    assert first['items'] == [{'serial': 'SN-5'}, {'serial': 'SN-3'}]
+
+    second = client.get(url + first['pagination']['next_cursor'], headers=auth_header).get_json()
+    assert second['items'] == [{'serial': 'SN-1'}]
+    assert second['pagination']['next_cursor'] is None
+
+    paged = client.get('/dispositivos?fields=id&page=2&limit=3', headers=auth_header).get_json()
+    assert paged['items'] == [{'id': 4}, {'id': 5}, {'id': 6}]
+    assert paged['pagination']['total_records'] == 7
+    assert paged['pagination']['total_pages'] == 3
+
+
+def test_fields_com_busca(client, auth_header, app):
+    _seed(app)
+    response = client.get('/dispositivos?fields=serial&busca=SN-3', headers=auth_header)
+    assert response.get_json()['items'] == [{'serial': 'SN-3'}]
+
+
+def test_fields_invalido(client, auth_header):
+    response = client.get('/dispositivos?fields=id,senha', headers=auth_header)
+    assert response.status_code == 400
+    assert 'senha' in response.get_json()['msg']
+
+    response = client.get('/categorias?fields=categoria_nome', headers=auth_header)
+    assert response.status_code == 400
+
+
+def test_fields_em_categorias(client, auth_header, app):
+    _seed(app)
+    response = client.get('/categorias?fields=nome', headers=auth_header)
+    assert response.get_json() == [{'nome': 'Sensores'}]
+
+    # representações diferentes não compartilham ETag
+    completo = client.get('/categorias', headers=auth_header)
+    assert completo.get_json()[0]['id'] == 1
+    assert completo.headers['ETag'] != response.headers['ETag']
+    revalidado = client.get('/categorias?fields=nome', headers={**auth_header, 'If-None-Match': response.headers['ETag']})
+    assert revalidado.status_code == 304
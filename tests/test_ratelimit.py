@@ -0,0 +1,127 @@
+import multiprocessing
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import create_app
+from extensions import db
+from ratelimit import MemoryBucketStore, SQLiteBucketStore, take_tokens
+from tests.conftest import TestConfig
+
+
+def _app(**overrides):
+    app = create_app(type('Config', (TestConfig,), {
+        'RATELIMIT_ENABLED': True, 'RATELIMIT_STORAGE': 'memory', **overrides,
+    }))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _token(client, username='testuser'):
+    client.post('/auth/register', json={'username': username, 'password': 'password'})
+    response = client.post('/auth/login', json={'username': username, 'password': 'password'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_token_bucket():
+    allowed, state, _ = take_tokens(None, 3, capacity=5, rate=1, now=100.0)
+    assert allowed and state == (2, 100.0)
+    allowed, state, retry_after = take_tokens(state, 3, capacity=5, rate=1, now=100.5)
+    assert not allowed and retry_after == pytest.approx(0.5)
+    # reposição limitada à capacidade
+    allowed, state, _ = take_tokens(state, 1, capacity=5, rate=1, now=1000.0)
+    assert allowed and state == (4, 1000.0)
+
+
+def test_limite_por_usuario_com_retry_after():
+    app = _app(RATELIMIT_CAPACITY=3, RATELIMIT_REFILL_RATE=0.5)
+    client = app.test_client()
+    alice, bob = _token(client, 'alice'), _token(client, 'bobby')
+
+    assert [client.get('/categorias', headers=alice).status_code for _ in range(4)] == [200, 200, 200, 429]
+    response = client.get('/categorias', headers=alice)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    # outro usuário tem o próprio bucket
+    assert client.get('/categorias', headers=bob).status_code == 200
+    # /metrics não entra no limite
+    assert client.get('/metrics').status_code == 200
+
+
+def test_busca_custa_mais():
+    app = _app(RATELIMIT_CAPACITY=10, RATELIMIT_REFILL_RATE=0.01)
+    client = app.test_client()
+    headers = _token(client)
+    statuses = [client.get('/dispositivos?busca=abc', headers=headers).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_blocklist_consultada_uma_vez_por_requisicao(monkeypatch):
+    app = _app(JWT_BLOCKLIST_TYPE='memory')
+    client = app.test_client()
+    headers = _token(client)
+    blocklist, consultas = app.extensions['jwt_blocklist'], []
+    original = type(blocklist).__contains__
+    monkeypatch.setattr(type(blocklist), '__contains__', lambda self, jti: consultas.append(jti) or original(self, jti))
+
+    assert client.get('/categorias', headers=headers).status_code == 200
+    assert len(consultas) == 1
+
+
+def test_login_limitado_por_ip():
+    app = _app(RATELIMIT_AUTH_CAPACITY=3, RATELIMIT_AUTH_REFILL_RATE=0.01)
+    client = app.test_client()
+    statuses = [client.post('/auth/login', json={'username': 'ninguem', 'password': 'errada'}).status_code
+                for _ in range(4)]
+    assert statuses == [401, 401, 401, 429]
+
+
+def _consume(path, results):
+    store = SQLiteBucketStore(path)
+    results.put(sum(store.take('user:1', 1, 20, 0.001, 1000.0)[0] for _ in range(10)))
+
+
+def test_sqlite_compartilhado_entre_processos(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=_consume, args=(path, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    # 4 processos x 10 tentativas num bucket de 20: exatamente 20 passam
+    assert sum(results.get() for _ in processes) == 20
+
+
+def test_memoria_por_processo():
+    store = MemoryBucketStore()
+    assert [store.take('k', 1, 2, 0.001, 10.0)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_admissao_recusa_com_503_quando_lotado(client, auth_header, app):
+    slots = app.extensions['admission']
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    try:
+        response = client.get('/categorias', headers=auth_header)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert client.get('/metrics').status_code == 200
+    finally:
+        for _ in range(taken):
+            slots.release()
+    assert client.get('/categorias', headers=auth_header).status_code == 200
+
+
+def test_timeout_do_pool_vira_503():
+    app = _app(RATELIMIT_ENABLED=False)
+
+    @app.route('/pool-esgotado')
+    def pool_esgotado():
+        raise PoolTimeoutError('QueuePool limit reached')
+
+    response = app.test_client().get('/pool-esgotado')
+    assert response.status_code == 503
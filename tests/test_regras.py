@@ -1,36 +1,7 @@
 import pytest
 import json
-from app import create_app
-from extensions import db
 from models import User, Categoria, Dispositivo
 
-@pytest.fixture
-def client():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:' 
-    app.config['JWT_SECRET_KEY'] = 'teste-secret' 
-    
-    with app.test_client() as client:
-      
-        with app.app_context():
-            db.create_all()
-
-        yield client
-        with app.app_context():
-            db.drop_all()
-
-@pytest.fixture
-def auth_header(client):
-
-    client.post('/auth/register', json={'username': 'testuser', 'password': 'password'})
-    
-    response = client.post('/auth/login', json={'username': 'testuser', 'password': 'password'})
-    token = response.get_json()['access_token']
-
-    return {'Authorization': f'Bearer {token}'}
-
-
 
 def test_delete_categoria_com_dispositivo_vinculado(client, auth_header):
 
@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import insert, select
+
+from app import create_app
+from extensions import db
+from models import Categoria
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('Config', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_REPLICA_URIS': [f"sqlite:///{tmp_path / 'replica.db'}"],
+        'REPLICA_STICKY_SECONDS': 60,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(_replica_engine(app, 0))
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    for replica in app.extensions['replicas'].replicas:
+        replica.engine.dispose()
+
+
+def _replica_engine(app, index):
+    return app.extensions['replicas'].replicas[index].engine
+
+
+def _token(client, username):
+    client.post('/auth/register', json={'username': username, 'password': 'password'})
+    response = client.post('/auth/login', json={'username': username, 'password': 'password'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _nomes(response):
+    return [item['nome'] for item in response.get_json()]
+
+
+def _only_on_replica(app, nome):
+    # Simula uma linha que já chegou à réplica: o primário não a tem
+    with app.app_context():
+        with _replica_engine(app, 0).begin() as connection:
+            connection.execute(insert(Categoria.__table__).values(nome=nome))
+
+
+def test_get_le_da_replica(app):
+    client = app.test_client()
+    headers = _token(client, 'leitor')
+    _only_on_replica(app, 'Só na réplica')
+
+    response = client.get('/categorias', headers=headers)
+    assert response.headers['X-Read-Source'] == 'replica_0'
+    assert _nomes(response) == ['Só na réplica']
+
+    response = client.get('/categorias', headers={**headers, 'X-Max-Staleness': '0'})
+    assert response.headers['X-Read-Source'] == 'primary'
+    assert _nomes(response) == []
+
+    assert client.get('/categorias', headers={**headers, 'X-Max-Staleness': 'x'}).status_code == 400
+
+
+def test_escrita_vai_ao_primario_e_gruda_o_usuario(app):
+    client = app.test_client()
+    escritor, leitor = _token(client, 'escritor'), _token(client, 'leitor')
+
+    created = client.post('/categorias', json={'nome': 'Nova'}, headers=escritor)
+    assert created.status_code == 201
+    with app.app_context():
+        assert db.session.execute(select(Categoria.nome)).scalars().all() == ['Nova']
+        with _replica_engine(app, 0).connect() as connection:
+            assert connection.execute(select(Categoria.nome)).scalars().all() == []
+
+    # quem escreveu lê do primário (vê a própria escrita); os outros seguem na réplica
+    response = client.get('/categorias', headers=escritor)
+    assert response.headers['X-Read-Source'] == 'primary' and _nomes(response) == ['Nova']
+    response = client.get(f"/categorias/{created.get_json()['id']}", headers=escritor)
+    assert response.status_code == 200
+    response = client.get('/categorias', headers=leitor)
+    assert response.headers['X-Read-Source'] == 'replica_0' and _nomes(response) == []
+
+
+def test_sessao_fica_no_primario_depois_de_escrever(app):
+    with app.test_request_context():
+        from flask import g
+        g._replica = app.extensions['replicas'].replicas[0]
+        assert db.session.get_bind() is _replica_engine(app, 0)
+        db.session.add(Categoria(nome='Lida em seguida'))
+        db.session.flush()
+        assert db.session.get_bind() is db.engines[None]
+        assert db.session.execute(select(Categoria.nome)).scalars().all() == ['Lida em seguida']
+        db.session.rollback()
+
+
+def test_replica_atrasada_ou_fora_do_ar_sai_da_rotacao(app):
+    client = app.test_client()
+    headers = _token(client, 'leitor')
+    replica = app.extensions['replicas'].replicas[0]
+
+    replica.check()
+    replica.lag = 30.0
+    assert client.get('/categorias', headers=headers).headers['X-Read-Source'] == 'primary'
+    # o cliente aceita o atraso
+    response = client.get('/categorias', headers={**headers, 'X-Max-Staleness': '60'})
+    assert response.headers['X-Read-Source'] == 'replica_0'
+
+    replica.lag, replica.healthy = 0.0, False
+    assert client.get('/categorias', headers=headers).headers['X-Read-Source'] == 'primary'
+    # no próximo health check ela volta
+    replica.checked_at = None
+    assert client.get('/categorias', headers=headers).headers['X-Read-Source'] == 'replica_0'
+
+
+def test_round_robin_entre_replicas(tmp_path):
+    config = type('Config', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_REPLICA_URIS': [f"sqlite:///{tmp_path / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}",
+                                    f"sqlite:///{tmp_path / 'ausente' / 'r2.db'}"],
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        for index in (0, 1):
+            db.metadata.create_all(_replica_engine(app, index))
+    client = app.test_client()
+    headers = _token(client, 'leitor')
+
+    sources = [client.get('/categorias', headers=headers).headers['X-Read-Source'] for _ in range(6)]
+    # replica_2 não abre (diretório inexistente) e é pulada
+    assert sorted(set(sources)) == ['replica_0', 'replica_1']
+    with app.app_context():
+        db.engine.dispose()
+    for replica in app.extensions['replicas'].replicas:
+        replica.engine.dispose()
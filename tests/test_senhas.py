@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from extensions import db
+from models import User
+from passwords import PasswordHasher, PasswordHasherBusy, password_hasher
+
+CREDENCIAIS = {'username': 'alice', 'password': 'segredo'}
+
+
+def _password_hash(app):
+    with app.app_context():
+        return db.session.execute(db.select(User.password_hash)).scalar_one()
+
+
+def test_hash_usa_metodo_do_config(app, client):
+    client.post('/auth/register', json=CREDENCIAIS)
+    assert _password_hash(app).startswith('pbkdf2:sha256:1000$')
+
+
+def test_login_regrava_hash_quando_metodo_muda(app, client):
+    client.post('/auth/register', json=CREDENCIAIS)
+    antigo = _password_hash(app)
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    password_hasher.init_app(app)
+
+    assert client.post('/auth/login', json=CREDENCIAIS).status_code == 200
+    novo = _password_hash(app)
+    assert novo != antigo
+    assert novo.startswith('pbkdf2:sha256:2000$')
+
+    # Hash já atualizado: o próximo login não regrava
+    assert client.post('/auth/login', json=CREDENCIAIS).status_code == 200
+    assert _password_hash(app) == novo
+
+
+def test_login_com_senha_errada_nao_regrava(app, client):
+    client.post('/auth/register', json=CREDENCIAIS)
+    antigo = _password_hash(app)
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    password_hasher.init_app(app)
+
+    response = client.post('/auth/login', json={**CREDENCIAIS, 'password': 'errada'})
+    assert response.status_code == 401
+    assert _password_hash(app) == antigo
+
+
+def test_needs_rehash_considera_padroes_do_werkzeug():
+    hasher = PasswordHasher(method='scrypt', workers=1)
+    assert not hasher.needs_rehash('scrypt:32768:8:1$' + 'a' * 16 + '$abc')
+    assert hasher.needs_rehash('scrypt:16384:8:1$' + 'a' * 16 + '$abc')
+    assert hasher.needs_rehash('scrypt:32768:8:1$' + 'a' * 8 + '$abc')
+
+
+def test_pool_cheio_responde_503(app, client, monkeypatch):
+    client.post('/auth/register', json=CREDENCIAIS)
+
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, max_pending=1)
+    liberar = threading.Event()
+    ocupado = hasher._submit(liberar.wait)
+    monkeypatch.setattr('models.password_hasher', hasher)
+    try:
+        response = client.post('/auth/login', json=CREDENCIAIS)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        liberar.set()
+        ocupado.result()
+
+    assert client.post('/auth/login', json=CREDENCIAIS).status_code == 200
+
+
+def test_pool_limita_chamadas_pendentes():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, max_pending=2)
+    liberar = threading.Event()
+    pendentes = [hasher._submit(liberar.wait) for _ in range(2)]
+    with pytest.raises(PasswordHasherBusy):
+        hasher.verify('pbkdf2:sha256:1000$x$y', 'senha')
+    liberar.set()
+    for future in pendentes:
+        future.result()
+    # slots liberados ao terminar
+    assert hasher.verify(hasher.hash('senha'), 'senha')
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from extensions import db
+from models import Categoria, Dispositivo
+from schemas import categoria_output, dispositivo_output
+from tests.conftest import TestConfig
+
+
+def _seed():
+    categoria = Categoria(nome='Sensores', descricao='Ambiente')
+    db.session.add(categoria)
+    db.session.flush()
+    db.session.add_all([
+        Dispositivo(nome='Termômetro', serial='T-1', categoria_id=categoria.id),
+        Dispositivo(nome='Avulso', serial='A-1', status='inativo'),
+    ])
+    db.session.commit()
+
+
+def test_output_schema_igual_ao_to_dict(app):
+    with app.app_context():
+        _seed()
+        for categoria in Categoria.query.all():
+            assert json.loads(app.json.dumps(categoria_output.dump(categoria))) == categoria.to_dict()
+        dispositivos = Dispositivo.query.all()
+        assert json.loads(app.json.dumps(dispositivo_output.dump_many(dispositivos))) == \
+            [dev.to_dict() for dev in dispositivos]
+
+
+def test_listagem_serializa_datas_em_iso(client, auth_header, app):
+    with app.app_context():
+        _seed()
+        esperado = [dev.to_dict() for dev in Dispositivo.query.order_by(Dispositivo.id)]
+
+    response = client.get('/dispositivos', headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json()['items'] == esperado
+    datetime.fromisoformat(esperado[0]['created_at'])
+
+
+@pytest.mark.parametrize('provider', ['orjson', 'stdlib'])
+def test_providers_com_mesmo_contrato(provider):
+    app = create_app(type('Config', (TestConfig,), {'JSON_PROVIDER': provider}))
+    with app.app_context():
+        body = app.json.dumps({'b': datetime(2024, 5, 1, 12, 30, 0, 123456), 'a': 'ação'})
+        assert json.loads(body) == {'a': 'ação', 'b': '2024-05-01T12:30:00.123456'}
+        # chaves ordenadas, como no provider padrão do Flask
+        assert body.index('"a"') < body.index('"b"')
+        assert app.json.loads(b'{"x": [1, 2]}') == {'x': [1, 2]}
+
+
+def test_json_invalido_continua_400(client, auth_header):
+    response = client.post('/categorias', data='{nome:', headers={**auth_header, 'Content-Type': 'application/json'})
+    assert response.status_code == 400
+
+
+def test_provider_desconhecido():
+    with pytest.raises(RuntimeError):
+        create_app(type('Config', (TestConfig,), {'JSON_PROVIDER': 'xml'}))
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, text
+
+import migrate_if_needed
+from config import Config
+from database import dispose_after_fork
+from extensions import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_nao_importa_alembic():
+    probe = 'import sys, app; app.create_app(); print(sorted(m for m in ("alembic", "flask_migrate") if m in sys.modules))'
+    output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+
+def test_cli_continua_com_flask_db():
+    output = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'heads'], cwd=ROOT,
+                            capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': ROOT})
+    assert output.returncode == 0, output.stderr
+    assert '(head)' in output.stdout
+
+
+def test_upgrade_so_quando_fora_da_head(tmp_path, monkeypatch):
+    heads = migrate_if_needed.head_revisions()
+    assert len(heads) == 1
+
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', url)
+    calls = []
+    monkeypatch.setattr(migrate_if_needed.subprocess, 'run',
+                        lambda command, **kwargs: calls.append(command) or subprocess.CompletedProcess(command, 0))
+
+    # banco vazio: roda o upgrade
+    assert migrate_if_needed.current_revisions(url) == set()
+    assert migrate_if_needed.main() == 0
+    assert calls and calls[0][-2:] == ['db', 'upgrade']
+
+    # já na head: não chama o flask
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)'))
+        connection.execute(text('INSERT INTO alembic_version VALUES (:head)'), {'head': next(iter(heads))})
+    engine.dispose()
+    calls.clear()
+    assert migrate_if_needed.main() == 0
+    assert calls == []
+
+
+def test_dispose_depois_do_fork_troca_os_pools(app):
+    with app.app_context():
+        pool = db.engine.pool
+    dispose_after_fork(app)
+    with app.app_context():
+        assert db.engine.pool is not pool
@@ -0,0 +1,188 @@
+import time
+
+import flask_jwt_extended.jwt_manager
+
+from app import create_app
+from extensions import db
+from tests.conftest import TestConfig
+from tokens import MemoryBlocklist, RedisBlocklist, SQLiteBlocklist, VerifiedTokenCache
+
+CREDENCIAIS = {'username': 'alice', 'password': 'segredo'}
+
+
+def _login(client):
+    client.post('/auth/register', json=CREDENCIAIS)
+    return client.post('/auth/login', json=CREDENCIAIS).get_json()
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_refresh_emite_novo_access_token(client):
+    tokens = _login(client)
+
+    response = client.post('/auth/refresh', headers=_bearer(tokens['refresh_token']))
+    assert response.status_code == 200
+    novo = response.get_json()['access_token']
+    assert client.get('/categorias', headers=_bearer(novo)).status_code == 200
+
+    # access token não serve para refresh, nem refresh token para as rotas
+    assert client.post('/auth/refresh', headers=_bearer(tokens['access_token'])).status_code == 422
+    assert client.get('/categorias', headers=_bearer(tokens['refresh_token'])).status_code == 422
+
+
+def test_logout_revoga_access_e_refresh(client):
+    tokens = _login(client)
+    outra_sessao = client.post('/auth/login', json=CREDENCIAIS).get_json()
+
+    response = client.post('/auth/logout', headers=_bearer(tokens['access_token']),
+                           json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+
+    revogado = client.get('/categorias', headers=_bearer(tokens['access_token']))
+    assert revogado.status_code == 401
+    assert revogado.get_json()['msg'] == 'Token has been revoked'
+    assert client.post('/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+
+    # tokens de outro login continuam válidos
+    assert client.get('/categorias', headers=_bearer(outra_sessao['access_token'])).status_code == 200
+
+
+def test_logout_recusa_refresh_de_outro_usuario(client):
+    tokens = _login(client)
+    client.post('/auth/register', json={'username': 'bob', 'password': 'segredo'})
+    alheio = client.post('/auth/login', json={'username': 'bob', 'password': 'segredo'}).get_json()
+
+    response = client.post('/auth/logout', headers=_bearer(tokens['access_token']),
+                           json={'refresh_token': alheio['refresh_token']})
+    assert response.status_code == 422
+    assert client.post('/auth/refresh', headers=_bearer(alheio['refresh_token'])).status_code == 200
+
+
+def test_token_verificado_uma_vez(app, client, monkeypatch):
+    tokens = _login(client)
+    original = flask_jwt_extended.jwt_manager._decode_jwt
+    chamadas = []
+
+    def contar(**kwargs):
+        chamadas.append(kwargs['encoded_token'])
+        return original(**kwargs)
+
+    monkeypatch.setattr(flask_jwt_extended.jwt_manager, '_decode_jwt', contar)
+
+    for _ in range(3):
+        assert client.get('/categorias', headers=_bearer(tokens['access_token'])).status_code == 200
+    assert chamadas == [tokens['access_token']]
+
+    # Revogação é checada mesmo com as claims em cache
+    client.post('/auth/logout', headers=_bearer(tokens['access_token']))
+    assert client.get('/categorias', headers=_bearer(tokens['access_token'])).status_code == 401
+
+
+def test_cache_descarta_token_expirado():
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.set('expirado', {'jti': 'a', 'exp': time.time() - 1})
+    cache.set('valido', {'jti': 'b', 'exp': time.time() + 60})
+    assert cache.get('expirado') is None
+    assert cache.get('valido')['jti'] == 'b'
+
+    cache.set('outro', {'jti': 'c', 'exp': time.time() + 60})
+    cache.set('mais um', {'jti': 'd', 'exp': time.time() + 60})
+    assert len(cache) == 2
+    assert cache.get('valido') is None
+
+
+def test_blocklist_em_memoria_esquece_expirados():
+    blocklist = MemoryBlocklist()
+    blocklist.add('antigo', time.time() - 1)
+    blocklist.add('atual', time.time() + 60)
+    assert 'antigo' not in blocklist
+    assert 'atual' in blocklist
+    assert len(blocklist) == 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.lookups = 0
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+    def ttl(self, key):
+        self.lookups += 1
+        return self.data[key][1] if key in self.data else -2
+
+
+def test_blocklist_redis_compartilhada():
+    client = FakeRedis()
+    worker_a, worker_b = RedisBlocklist(client), RedisBlocklist(client)
+
+    worker_a.add('jti-1', time.time() + 120)
+    assert 0 < client.data['jwt-blocklist:jti-1'][1] <= 120
+
+    assert 'jti-1' in worker_b
+    assert 'jti-2' not in worker_b
+    # revogado já visto, ou não revogado visto há pouco, não consulta o store de novo
+    chamadas = client.lookups
+    assert 'jti-1' in worker_a and 'jti-1' in worker_b
+    assert 'jti-2' not in worker_b
+    assert client.lookups == chamadas
+
+
+def test_blocklist_sqlite_compartilhada(tmp_path):
+    path = str(tmp_path / 'blocklist.db')
+    worker_a, worker_b = SQLiteBlocklist(path), SQLiteBlocklist(path)
+
+    worker_a.add('jti-1', time.time() + 120)
+    worker_a.add('expirado', time.time() - 1)
+    assert 'jti-1' in worker_b
+    assert 'jti-2' not in worker_b
+    assert 'expirado' not in worker_b
+
+
+def test_blocklist_compartilhada_guarda_a_resposta_negativa(tmp_path, monkeypatch):
+    path = str(tmp_path / 'blocklist.db')
+    worker_a, worker_b = SQLiteBlocklist(path), SQLiteBlocklist(path, recheck_interval=60)
+    assert 'jti-1' not in worker_b
+
+    # o logout no outro worker só é visto aqui quando a resposta local vence
+    worker_a.add('jti-1', time.time() + 120)
+    lookups = []
+    monkeypatch.setattr(worker_b, '_lookup', lambda jti: lookups.append(jti))
+    assert 'jti-1' not in worker_b
+    assert lookups == []
+    assert worker_b.cached('jti-1') is False
+
+    monkeypatch.undo()
+    worker_b.recheck_interval = 0
+    assert worker_b.cached('jti-1') is None
+    assert 'jti-1' in worker_b
+    assert worker_b.cached('jti-1') is True
+
+
+def test_logout_vale_nos_outros_workers(tmp_path):
+    # dois processos do gunicorn: logout num, token recusado no outro
+    config = type('Config', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'JWT_BLOCKLIST_SQLITE_PATH': str(tmp_path / 'blocklist.db'),
+        'JWT_BLOCKLIST_RECHECK_SECONDS': 0.2,
+    })
+    worker_a, worker_b = create_app(config), create_app(config)
+    with worker_a.app_context():
+        db.create_all()
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+    tokens = _login(client_a)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    assert client_b.get('/categorias', headers=headers).status_code == 200
+
+    assert client_a.post('/auth/logout', headers=headers).status_code == 200
+    assert client_a.get('/categorias', headers=headers).status_code == 401
+    # B guarda por JWT_BLOCKLIST_RECHECK_SECONDS que o token não estava revogado
+    time.sleep(0.3)
+    assert client_b.get('/categorias', headers=headers).status_code == 401
+    with worker_a.app_context():
+        db.engine.dispose()
+    with worker_b.app_context():
+        db.engine.dispose()
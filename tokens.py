@@ -0,0 +1,251 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+
+
+class VerifiedTokenCache:
+    """Claims de tokens já verificados, por SHA-256 do token, até o ``exp``.
+
+    Um token repetido (o caso comum: o mesmo cliente chamando várias rotas)
+    pula o parse e a verificação HMAC. A revogação continua sendo checada a
+    cada requisição, fora deste cache.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            claims, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # cópia: quem recebe pode alterar o dicionário
+        return dict(claims)
+
+    def set(self, token, claims):
+        expires_at = claims.get('exp')
+        if not self.max_entries or expires_at is None:
+            return
+        with self._lock:
+            self._data[self._key(token)] = (dict(claims), expires_at)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBlocklist:
+    """jti revogados do processo, guardados só até o ``exp`` do token."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            # token expirado já é recusado na verificação; não precisa ocupar memória
+            for stale in [key for key, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[stale]
+            self._revoked[jti] = expires_at
+
+    def __contains__(self, jti):
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def cached(self, jti):
+        return jti in self
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+class _SharedBlocklist:
+    """Base das blocklists com store compartilhado (Redis, arquivo SQLite).
+
+    Revogação não se desfaz, então um jti visto como revogado fica no conjunto
+    local e não volta a consultar o store. Um jti visto como *não* revogado só
+    é consultado de novo depois de ``recheck_interval`` segundos: um logout
+    feito em outro worker leva até esse tempo para valer aqui (no próprio
+    worker vale na hora).
+    """
+
+    def __init__(self, recheck_interval=5.0, max_entries=4096):
+        self.recheck_interval = recheck_interval
+        self.max_entries = max_entries
+        self._known = MemoryBlocklist()
+        self._allowed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, jti):
+        """``exp`` do jti revogado no store, ou None."""
+        raise NotImplementedError
+
+    def _store(self, jti, expires_at):
+        raise NotImplementedError
+
+    def add(self, jti, expires_at):
+        self._store(jti, expires_at)
+        self._known.add(jti, expires_at)
+        with self._lock:
+            self._allowed.pop(jti, None)
+
+    def cached(self, jti):
+        """True/False se a resposta local ainda vale; None se é preciso consultar o store."""
+        if jti in self._known:
+            return True
+        with self._lock:
+            checked_at = self._allowed.get(jti)
+            if checked_at is not None and time.monotonic() - checked_at < self.recheck_interval:
+                return False
+        return None
+
+    def __contains__(self, jti):
+        revoked = self.cached(jti)
+        if revoked is not None:
+            return revoked
+        expires_at = self._lookup(jti)
+        if expires_at is not None and expires_at > time.time():
+            self._known.add(jti, expires_at)
+            return True
+        if self.recheck_interval > 0:
+            with self._lock:
+                self._allowed[jti] = time.monotonic()
+                self._allowed.move_to_end(jti)
+                while len(self._allowed) > self.max_entries:
+                    self._allowed.popitem(last=False)
+        return False
+
+    def __len__(self):
+        return len(self._known)
+
+
+class RedisBlocklist(_SharedBlocklist):
+    """Blocklist compartilhada entre workers/instâncias.
+
+    Cada jti vira uma chave com TTL até o ``exp`` do token.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client, prefix='jwt-blocklist:', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    def _store(self, jti, expires_at):
+        ttl = max(1, int(expires_at - time.time()))
+        self.client.set(self.prefix + jti, '1', ex=ttl)
+
+    def _lookup(self, jti):
+        # TTL negativo: chave inexistente (nunca revogado ou já expirado)
+        ttl = self.client.ttl(self.prefix + jti)
+        return time.time() + ttl if ttl > 0 else None
+
+
+class SQLiteBlocklist(_SharedBlocklist):
+    """Blocklist num arquivo SQLite local, compartilhada entre os workers da máquina.
+
+    Mesmo esquema do ``ratelimit.SQLiteBucketStore``: uma conexão por thread e
+    por processo (seguro após o fork).
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS revogado (jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _store(self, jti, expires_at):
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO revogado (jti, expires_at) VALUES (?, ?)', (jti, expires_at))
+        # token expirado já é recusado na verificação; não precisa ocupar espaço
+        conn.execute('DELETE FROM revogado WHERE expires_at <= ?', (time.time(),))
+
+    def _lookup(self, jti):
+        row = self._connection().execute('SELECT expires_at FROM revogado WHERE jti = ?', (jti,)).fetchone()
+        return row[0] if row else None
+
+
+def create_blocklist(config):
+    blocklist_type = config.get('JWT_BLOCKLIST_TYPE', 'sqlite')
+    if blocklist_type == 'memory':
+        return MemoryBlocklist()
+    recheck = {'recheck_interval': config.get('JWT_BLOCKLIST_RECHECK_SECONDS', 5.0)}
+    if blocklist_type == 'sqlite':
+        path = config.get('JWT_BLOCKLIST_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'api-jwt-blocklist.db')
+        return SQLiteBlocklist(path, **recheck)
+    if blocklist_type == 'redis':
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("JWT_BLOCKLIST_TYPE='redis' requer o pacote 'redis' instalado.") from exc
+        return RedisBlocklist(redis.Redis.from_url(config['JWT_BLOCKLIST_REDIS_URL']), **recheck)
+    raise ValueError(f"JWT_BLOCKLIST_TYPE desconhecido: {blocklist_type!r}")
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager que guarda as claims de tokens já verificados.
+
+    Tokens com CSRF ou decodificados com ``allow_expired`` seguem o caminho normal.
+    """
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.config.setdefault('JWT_TOKEN_CACHE_MAX_ENTRIES', 4096)
+        app.config.setdefault('JWT_BLOCKLIST_TYPE', 'sqlite')
+        app.config.setdefault('JWT_BLOCKLIST_RECHECK_SECONDS', 5.0)
+        app.extensions['jwt_token_cache'] = VerifiedTokenCache(app.config['JWT_TOKEN_CACHE_MAX_ENTRIES'])
+        app.extensions['jwt_blocklist'] = create_blocklist(app.config)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        token_cache = current_app.extensions['jwt_token_cache']
+        claims = token_cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            token_cache.set(encoded_token, claims)
+        return claims
+
+
+def revoke_token(claims):
+    """Revoga o token (pelo jti) até ele expirar."""
+    current_app.extensions['jwt_blocklist'].add(claims['jti'], claims['exp'])
+
+
+def is_token_revoked(claims):
+    return claims['jti'] in current_app.extensions['jwt_blocklist']